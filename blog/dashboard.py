@@ -0,0 +1,168 @@
+import calendar
+import hashlib
+from datetime import date
+from decimal import Decimal
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.db.models import CharField, Count, Max, Sum, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from expenses.budgets import budget_report, month_period
+from expenses.models import Budget, Category, Expense, FixedExpense
+from income.models import Income
+from poker.models import PokerMonthlyRollup
+from thisisus.dates import month_filter
+
+from .models import DashboardMonth
+
+# The version in the key already changes with the data; this only bounds how
+# long superseded snapshots of the open month sit in the cache
+OPEN_MONTH_TIMEOUT = 60 * 10
+
+BUDGET_AMOUNTS = ('total_budget', 'total_expenses', 'remaining_budget')
+
+
+def _stamp(source, queryset, changed, total=None):
+    """
+    One row describing `queryset`: its size, latest change and optionally a
+    summed amount. Grouping by a constant is no grouping, so this is a plain
+    aggregate, but unlike aggregate() it can still be combined with union().
+    """
+    return queryset.order_by().annotate(_all=Value(1)).values('_all').annotate(
+        source=Value(source),
+        n=Count('pk'),
+        changed=Cast(Max(changed), CharField()),
+        total=Cast(Sum(total), CharField()) if total else Value('', output_field=CharField()),
+    ).values('source', 'n', 'changed', 'total')
+
+
+class DashboardSnapshot:
+    """
+    Every number on the home dashboard for one month, computed in four
+    queries. The current month is cached under a data version (row counts
+    and latest-change stamps of everything the snapshot reads, fetched in
+    one query), so a change made by another worker or by a bulk load such as
+    import_sessions is picked up on the next request without any
+    invalidation. Closed months are kept in DashboardMonth rows for good and
+    only rebuilt if their version moves.
+    """
+    def __init__(self, year, month):
+        self.year = int(year)
+        self.month = int(month)
+
+    @property
+    def first_day(self):
+        return date(self.year, self.month, 1)
+
+    @staticmethod
+    def cache_key(year, month, version):
+        return f'dashboard:{year}-{month:02d}:{version}'
+
+    @property
+    def is_closed(self):
+        today = timezone.localdate()
+        return (self.year, self.month) < (today.year, today.month)
+
+    def data_version(self):
+        month = month_filter('created', self.year, self.month)
+        stamps = [
+            _stamp('expense', Expense.objects.filter(**month), 'updated_at'),
+            # Income has no updated stamp; the sum catches edits to the amount
+            _stamp('income', Income.objects.filter(**month), 'pk', total='amount'),
+            _stamp('poker', PokerMonthlyRollup.objects.filter(month=self.first_day), 'updated'),
+            _stamp('fixed', FixedExpense.objects.all(), 'updated_at'),
+            _stamp('budget', Budget.objects.all(), 'updated_at'),
+            _stamp('category', Category.objects.all(), 'updated_at'),
+        ]
+        rows = sorted(stamps[0].union(*stamps[1:], all=True), key=itemgetter('source'))
+        return hashlib.md5(repr(rows).encode()).hexdigest()[:16]
+
+    def get(self):
+        version = self.data_version()
+        if self.is_closed:
+            return self.stored(version)
+        key = self.cache_key(self.year, self.month, version)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = self.compute()
+            cache.set(key, snapshot, OPEN_MONTH_TIMEOUT)
+        return snapshot
+
+    def stored(self, version):
+        row = DashboardMonth.objects.filter(month=self.first_day, version=version).first()
+        if row is None:
+            totals = self.totals()
+            DashboardMonth.objects.update_or_create(
+                month=self.first_day, defaults={'version': version, **totals},
+            )
+            return self.context(**totals)
+        return self.context(
+            total_expenses=row.total_expenses,
+            total_budget_all=row.total_budget_all,
+            fixed_expenses=row.fixed_expenses,
+            all_income=row.all_income,
+            poker_profit=row.poker_profit,
+            poker_hours=row.poker_hours,
+            budget_rows=[
+                {**budget, **{field: Decimal(budget[field]) for field in BUDGET_AMOUNTS}}
+                for budget in row.budget_rows
+            ],
+        )
+
+    def compute(self):
+        return self.context(**self.totals())
+
+    def totals(self):
+        """The stored inputs; everything else on the page is derived from these."""
+        # 1. Budget vs. spend per category (see expenses.budgets)
+        budget = budget_report([month_period(self.year, self.month)])[0]
+        # 2-4. Single-row aggregates
+        fixed_expenses = FixedExpense.objects.aggregate(total=Sum('amount'))['total']
+        total_income = Income.objects.filter(
+            **month_filter('created', self.year, self.month)
+        ).aggregate(total=Sum('amount'))['total'] or 0
+        poker = PokerMonthlyRollup.objects.filter(month=self.first_day).aggregate(
+            profit=Sum('profit'), hours=Sum('hours'),
+        )
+
+        return {
+            'total_expenses': budget['total_expenses_all'],
+            'total_budget_all': budget['total_budget_all'],
+            'fixed_expenses': fixed_expenses,
+            'all_income': total_income,
+            'poker_profit': poker['profit'] or 0,
+            'poker_hours': poker['hours'] or 0,
+            'budget_rows': budget['rows'],
+        }
+
+    def context(self, total_expenses, total_budget_all, fixed_expenses, all_income,
+                poker_profit, poker_hours, budget_rows):
+        all_expenses = (
+            fixed_expenses + total_expenses if total_expenses != 0 else Decimal(0)
+        ) if fixed_expenses is not None else Decimal(0)
+
+        overall_earned = Decimal(poker_profit)
+        overall_hours = Decimal(poker_hours)
+        overall_hourly_rate = overall_earned / overall_hours if overall_hours != 0 else Decimal(0)
+
+        remaining_total = total_budget_all - total_expenses if total_expenses != 0 else Decimal(0)
+
+        return {
+            'total_expenses': total_expenses,
+            'fixed_expenses': fixed_expenses,
+            'all_expenses': all_expenses,
+            'all_income': all_income,
+            'differential': all_income - all_expenses,
+            'overall_hourly_rate': overall_hourly_rate,
+            'overall_hours': overall_hours,
+            'overall_earned': overall_earned,
+            'overall_total': overall_earned,
+            'current_month_name': calendar.month_name[self.month],
+            'current_year': self.year,
+            'budget_remaining': budget_rows,
+            'total_expenses_all': total_expenses,
+            'total_budget_all': total_budget_all,
+            'remaining_total': remaining_total,
+        }
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.27 on 2026-10-18 10:16
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('version', models.CharField(max_length=32)),
+                ('total_expenses', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_budget_all', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('fixed_expenses', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('all_income', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('poker_profit', models.IntegerField()),
+                ('poker_hours', models.IntegerField()),
+                ('budget_rows', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -70,3 +71,27 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'Comment by {self.name} on {self.post}'
+
+
+class DashboardMonth(models.Model):
+    """
+    Stored inputs of the home dashboard for one closed month, so an old month
+    is computed once rather than aging out of the cache. `version` is the
+    data version it was built from; a row whose version no longer matches is
+    rebuilt (see blog.dashboard).
+    """
+    month = models.DateField(unique=True)
+    version = models.CharField(max_length=32)
+    total_expenses = models.DecimalField(max_digits=12, decimal_places=2)
+    total_budget_all = models.DecimalField(max_digits=12, decimal_places=2)
+    # Null when there are no fixed expenses at all, as in the live compute
+    fixed_expenses = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    all_income = models.DecimalField(max_digits=12, decimal_places=2)
+    poker_profit = models.IntegerField()
+    poker_hours = models.IntegerField()
+    budget_rows = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Dashboard {self.month:%B %Y}'
+
@@ -1,3 +1,97 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from expenses.models import Budget, Category, Expense, FixedExpense
+from poker.imports import import_sessions
+from thisisus.testing import plain_static_storage
+
+from .dashboard import DashboardSnapshot
+from .models import DashboardMonth
+
+
+class DashboardSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        cls.category = Category.objects.create(name='Groceries')
+        cls.day = date(2024, 3, 5)
+
+    def setUp(self):
+        cache.clear()
+        self.closed = DashboardSnapshot(self.day.year, self.day.month)
+
+    def expense(self, amount='10.00', created=None):
+        return Expense.objects.create(user=self.user, category=self.category, name='Food',
+                                      amount=Decimal(amount), created=created or self.day)
+
+    def test_version_follows_every_source_in_one_query(self):
+        with self.assertNumQueries(1):
+            version = self.closed.data_version()
+
+        self.expense(created=date(2024, 4, 1))  # another month
+        self.assertEqual(self.closed.data_version(), version)
+
+        self.category.name = 'Food'
+        self.category.save()
+        renamed = self.closed.data_version()
+        self.assertNotEqual(renamed, version)
+
+        budget = Budget.objects.create(category=self.category, amount=Decimal('300.00'), description='food')
+        budgeted = self.closed.data_version()
+        self.assertNotEqual(budgeted, renamed)
+        budget.period = Budget.Period.YEAR
+        budget.save()
+        self.assertNotEqual(self.closed.data_version(), budgeted)
+
+    def test_closed_month_is_stored_and_read_back(self):
+        self.expense('12.50')
+        Budget.objects.create(category=self.category, amount=Decimal('300.00'), description='food')
+        FixedExpense.objects.create(name='Rent', frequency='PT', amount=Decimal('1000.00'), day_to_pay=1)
+
+        first = self.closed.get()
+        self.assertEqual(DashboardMonth.objects.get().month, date(2024, 3, 1))
+        cache.clear()
+        # Version plus the stored row; none of the aggregates run again
+        with self.assertNumQueries(2):
+            stored = self.closed.get()
+        self.assertEqual(stored, first)
+        # The budget starts today, so it doesn't cover March 2024
+        self.assertEqual(stored['budget_remaining'][0]['remaining_budget'], Decimal('-12.50'))
+
+    def test_stored_month_is_rebuilt_when_its_data_changes(self):
+        expense = self.expense()
+        self.closed.get()
+        expense.amount = Decimal('25.00')
+        expense.save()
+        self.assertEqual(self.closed.get()['total_expenses'], Decimal('25.00'))
+        self.assertEqual(DashboardMonth.objects.get().total_expenses, Decimal('25.00'))
+
+        # Bulk loads send no signals but still move the version
+        import_sessions(self.user, [
+            {'date': '2024-03-09', 'stakes': '2/5', 'casino': 'Bike', 'hours': 3, 'buy_in': 300, 'cash_out': 900},
+        ])
+        self.assertEqual(self.closed.get()['overall_earned'], Decimal(600))
+
+    def test_open_month_is_cached_not_stored(self):
+        today = timezone.localdate()
+        current = DashboardSnapshot(today.year, today.month)
+        self.expense(created=today)
+        snapshot = current.get()
+        with self.assertNumQueries(1):
+            self.assertEqual(current.get(), snapshot)
+        self.assertFalse(DashboardMonth.objects.exists())
+
 
-# Create your tests here.
+@plain_static_storage
+class IndexPeriodParamTests(TestCase):
+    def test_invalid_year_and_month_fall_back_to_today(self):
+        self.client.force_login(User.objects.create_user('hero'))
+        for query in ({'year': '99999'}, {'year': 'abc', 'month': '13'}, {'month': '0'}):
+            response = self.client.get(reverse('index'), query)
+            self.assertEqual(response.status_code, 200, query)
@@ -4,108 +4,24 @@ from django.core.paginator import Paginator, EmptyPage,\
                                   PageNotAnInteger
 from django.views.generic import ListView
 from .forms import EmailPostForm, CommentForm, PostForm
-from expenses.models import Expense, FixedExpense, Budget, Category
-from income.models import Income
-from poker.models import PokerSession
 from django.core.mail import send_mail
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.utils.timezone import now
-import calendar
-from datetime import datetime
-from datetime import datetime, timedelta
 from django.utils import timezone
-from django.db.models import Sum, F, DecimalField, Value
-from django.db.models.functions import Coalesce
-from decimal import Decimal
 from django.utils.text import slugify
+from thisisus.dates import valid_month, valid_year
+
+from .dashboard import DashboardSnapshot
 
 
 @login_required
 def index(request):
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    current_month_name = calendar.month_name[current_month]
-    expenses = Expense.objects.filter(created__month=current_month, created__year=current_year)
-    total_expenses = expenses.aggregate(Sum('amount'))['amount__sum'] 
-    fixed_expenses = FixedExpense.objects.aggregate(Sum('amount'))['amount__sum']
-    all_expenses =     (
-    fixed_expenses + total_expenses if total_expenses != 0 else Decimal(0)
-) if fixed_expenses is not None and total_expenses is not None else Decimal(0)
-    
-    #income calculations
-    monthly_incomes = Income.objects.filter(created__month=current_month, created__year=current_year)
-    total_monthly_income = monthly_incomes.aggregate(Sum('amount'))['amount__sum'] or 0
-    differential = total_monthly_income - all_expenses
-    #Poker calculations
-    sessions =  PokerSession.objects.filter(date__month=current_month, date__year=current_year)
-    overall_cash = sessions.aggregate(Sum('cash_out'))['cash_out__sum']
-    overall_buyin = sessions.aggregate(Sum('buy_in'))['buy_in__sum']
-    if overall_cash is None and overall_buyin is None:
-        overall_earned = Decimal(0)
-    else:
-        overall_earned = (overall_cash or Decimal(0)) - (overall_buyin or Decimal(0))
-    overall_hours = sessions.aggregate(Sum('hours'))['hours__sum']
-    overall_earned = overall_earned or Decimal(0)
-    overall_hours = overall_hours or Decimal(0)
-    overall_hourly_rate = (
-    overall_earned/ overall_hours if overall_hours != 0 else Decimal(0)
-) if overall_earned is not None and overall_hours is not None else Decimal(0)
-    
-    
-    #Budget calcs
-    today = datetime.now()
-    first_day_of_month = today.replace(day=1)
-    last_day_of_month = (first_day_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-    categories = Category.objects.all()
-    
-    expenses = Expense.objects.filter(created__range=(first_day_of_month, last_day_of_month)) \
-                              .values('category')\
-                              .annotate(total_expenses=Coalesce(Sum('amount'), Value(0, output_field=DecimalField())))
-    
-    budgets = Budget.objects.all()\
-                            .values('category')\
-                            .annotate(total_budget=Coalesce(Sum('amount'), Value(0, output_field=DecimalField())))
-    
-    total_expenses_all = sum(item['total_expenses'] for item in expenses)
-    total_budget_all = sum(item['total_budget'] for item in budgets)
-    remaining_total = total_budget_all - total_expenses_all if total_expenses_all != 0 else Decimal(0)
-
-    budget_remaining = []
-    for category in categories:
-        total_expenses = next((item['total_expenses'] for item in expenses if item['category'] == category.id), 0)
-        total_budget = next((item['total_budget'] for item in budgets if item['category'] == category.id), 0)
-        total_expenses = total_expenses or Decimal(0)
-        total_budget = total_budget or Decimal(0)
-
-        remaining_budget = total_budget - total_expenses
-        budget_remaining.append({
-            'category_name': category.name,
-            'total_budget': total_budget,
-            'total_expenses': total_expenses,
-            'remaining_budget': remaining_budget
-            
-        })
-   
-
-    context = {
-        'expenses': expenses,
-        'total_expenses': total_expenses,
-        'fixed_expenses': fixed_expenses,
-        'all_expenses': all_expenses,
-        'all_income': total_monthly_income,
-        'differential': differential,
-        'overall_hourly_rate': overall_hourly_rate,
-        'overall_hours': overall_hours,
-        'overall_total': overall_earned,
-        'current_month_name': current_month_name,
-        'current_year': current_year,
-        'budget_remaining': budget_remaining, 
-        'total_expenses_all': total_expenses_all, 
-        'total_budget_all': total_budget_all, 
-        'remaining_total': remaining_total
+    today = timezone.localdate()
+    year = valid_year(request.GET.get('year')) or today.year
+    month = valid_month(request.GET.get('month')) or today.month
 
-    }
+    context = DashboardSnapshot(year, month).get()
     return render(request, 'blog/index.html', context)
 
 
@@ -37,9 +37,12 @@ admin.site.register(Account, AccountAdmin)
 
 
 class DebtAdmin(admin.ModelAdmin):
-    list_display = ('name', 'owed', 'total_amount_paid')
+    list_display = ('name', 'owed', 'total_amount_paid', 'paid_by_earnings')
     search_fields = ('name',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_balances()
+
 admin.site.register(Debt, DebtAdmin)
 
 class PaymentAdmin(admin.ModelAdmin):
@@ -0,0 +1,141 @@
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear, Greatest, Least
+
+from thisisus.dates import month_range, quarter_range, year_range
+
+from .models import Budget, Category, Expense
+
+# A reporting window: half-open [start, end) plus its length in months
+Period = namedtuple('Period', ['label', 'start', 'end', 'months'])
+
+PERIOD_KINDS = ('month', 'quarter', 'year')
+CENTS = Decimal('0.01')
+ZERO = Value(Decimal(0), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+# Months covered by one budget of each Budget.period
+BUDGET_MONTHS = {
+    Budget.Period.MONTH: 1,
+    Budget.Period.QUARTER: 3,
+    Budget.Period.YEAR: 12,
+}
+
+
+def month_period(year, month):
+    start, end = month_range(year, month)
+    return Period(start.strftime('%B %Y'), start, end, 1)
+
+
+def quarter_period(year, quarter):
+    start, end = quarter_range(year, quarter)
+    return Period(f'Q{quarter} {year}', start, end, 3)
+
+
+def year_period(year):
+    start, end = year_range(year)
+    return Period(str(year), start, end, 12)
+
+
+def period_for(kind, day):
+    if kind == 'year':
+        return year_period(day.year)
+    if kind == 'quarter':
+        return quarter_period(day.year, (day.month - 1) // 3 + 1)
+    return month_period(day.year, day.month)
+
+
+def previous_periods(kind, day, count):
+    """`count` consecutive periods of `kind`, oldest first, ending with the one containing `day`."""
+    periods = [period_for(kind, day)]
+    while len(periods) < count:
+        previous_day = date.fromordinal(periods[0].start.toordinal() - 1)
+        periods.insert(0, period_for(kind, previous_day))
+    return periods
+
+
+def _spent(period):
+    return Subquery(
+        Expense.objects.filter(category=OuterRef('pk'), created__gte=period.start, created__lt=period.end)
+        .values('category').annotate(total=Sum('amount')).values('total')[:1]
+    )
+
+
+def _month_index(year, month):
+    return year * 12 + month - 1
+
+
+def _budgeted(period):
+    """
+    Sum of the category's budgets that are live during `period`, each scaled
+    by the months it actually covers (a monthly budget counts 3x in a
+    quarter, a yearly one 1/12 in a month). A budget counts from the month
+    of its date through the month of its end_date, so one started in
+    October adds three months to that year, not twelve.
+    """
+    first = Greatest(
+        Value(_month_index(period.start.year, period.start.month)),
+        _month_index(ExtractYear('date'), ExtractMonth('date')),
+    )
+    last = Coalesce(
+        Least(
+            Value(_month_index(period.end.year, period.end.month)),
+            _month_index(ExtractYear('end_date'), ExtractMonth('end_date')) + 1,
+        ),
+        Value(_month_index(period.end.year, period.end.month)),
+    )
+    live_months = Greatest(last - first, Value(0))
+    scaled = Case(
+        *[
+            When(period=kind, then=F('amount') * live_months / Value(Decimal(months)))
+            for kind, months in BUDGET_MONTHS.items()
+        ],
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    return Subquery(
+        Budget.objects.filter(category=OuterRef('pk'), date__lt=period.end)
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=period.start))
+        .values('category').annotate(total=Sum(scaled)).values('total')[:1]
+    )
+
+
+def budget_report(periods):
+    """
+    Budget vs. actual per category for each period, in a single query.
+
+    Every category is returned (budgeted or not), with a spent_N / budget_N
+    subquery pair per period, so comparing several periods costs no extra
+    round trips. Returns one dict per period with `rows` in the shape the
+    budget templates use plus the period totals.
+    """
+    annotations = {}
+    for i, period in enumerate(periods):
+        annotations[f'spent_{i}'] = Coalesce(_spent(period), ZERO)
+        annotations[f'budget_{i}'] = Coalesce(_budgeted(period), ZERO)
+    categories = list(Category.objects.order_by('name').values('id', 'name').annotate(**annotations))
+
+    report = []
+    for i, period in enumerate(periods):
+        rows = []
+        for category in categories:
+            total_budget = category[f'budget_{i}'].quantize(CENTS)
+            total_expenses = category[f'spent_{i}']
+            rows.append({
+                'category_id': category['id'],
+                'category_name': category['name'],
+                'total_budget': total_budget,
+                'total_expenses': total_expenses,
+                'remaining_budget': total_budget - total_expenses,
+            })
+        total_budget_all = sum((row['total_budget'] for row in rows), Decimal(0))
+        total_expenses_all = sum((row['total_expenses'] for row in rows), Decimal(0))
+        report.append({
+            'period': period,
+            'rows': rows,
+            'total_budget_all': total_budget_all,
+            'total_expenses_all': total_expenses_all,
+            'remaining_total': total_budget_all - total_expenses_all,
+        })
+    return report
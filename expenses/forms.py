@@ -18,7 +18,8 @@ class FixedExpenseForm(forms.ModelForm):
 class BudgetForm(forms.ModelForm):
     class Meta:
         model = Budget
-        fields = ['category', 'amount', 'description']
+        fields = ['category', 'amount', 'period', 'end_date', 'description']
+        widgets = {'end_date': forms.DateInput(attrs={'type': 'date'})}
         
 class PaymentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0002_date_range_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='budget',
+            name='end_date',
+            field=models.DateField(blank=True, help_text='Last day this budget applies. Blank = ongoing.', null=True),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='period',
+            field=models.CharField(choices=[('M', 'Monthly'), ('Q', 'Quarterly'), ('Y', 'Yearly')], default='M', help_text='How often this amount is available.', max_length=1),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+def mark_van_debts(apps, schema_editor):
+    # Debts used to pick up earnings by having "van" in their name; make that explicit
+    Debt = apps.get_model('expenses', 'Debt')
+    Debt.objects.filter(name__icontains='van').update(paid_by_earnings=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0003_budget_period'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='debt',
+            name='paid_by_earnings',
+            field=models.BooleanField(default=False, help_text='Reimbursable work and mileage earnings pay down this debt.'),
+        ),
+        migrations.RunPython(mark_van_debts, migrations.RunPython.noop),
+    ]
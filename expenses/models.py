@@ -1,7 +1,10 @@
 from django.db import models
 from django.utils.timezone import now
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from john.ledger import current_ledger
 
 
 FREQUENCY_CHOICES = (
@@ -15,6 +18,7 @@ class PAYMENT_CHOICES(models.TextChoices):
     
 class Category(models.Model):
     name = models.CharField(max_length=255, blank=False, null=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Categories"
@@ -29,6 +33,37 @@ class Account(models.Model):
         return self.name
 
     
+def payments_total(fk):
+    """
+    Correlated SUM(amount_paid) of the Payment rows pointing at the outer row
+    through `fk`, 0 when there are none. Used by the with_balances() querysets
+    so list pages don't fire one payments query per row.
+    """
+    totals = (
+        Payment.objects.filter(**{fk: OuterRef('pk')})
+        .values(fk).annotate(total=Sum('amount_paid')).values('total')[:1]
+    )
+    return Coalesce(
+        Subquery(totals),
+        Value(0, output_field=DecimalField(max_digits=10, decimal_places=2)),
+    )
+
+
+class FixedExpenseQuerySet(models.QuerySet):
+    def with_balances(self):
+        return self.annotate(paid_to_date=payments_total('fixed_expense'))
+
+
+class DebtQuerySet(models.QuerySet):
+    def with_balances(self):
+        return self.annotate(paid_to_date=payments_total('debt')).annotate(balance=F('owed') - F('paid_to_date'))
+
+
+class SavingsQuerySet(models.QuerySet):
+    def with_balances(self):
+        return self.annotate(saved_to_date=payments_total('savings')).annotate(goal_remaining=F('goal') - F('saved_to_date'))
+
+
 class FixedExpense(models.Model):
     account = models.ForeignKey(Account, on_delete=models.CASCADE,  blank=True, null=True)
     name = models.CharField(max_length=50,  blank=False, null=False)
@@ -38,13 +73,17 @@ class FixedExpense(models.Model):
     day_to_pay = models.IntegerField(blank=False, null=False)
     created = models.DateField(default=now)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FixedExpenseQuerySet.as_manager()
     
     def __str__(self):
         return self.name
 
     @property
     def fixed_amount_paid(self):
-        return sum(payment.amount_paid for payment in self.payments.all())
+        if hasattr(self, 'paid_to_date'):
+            return self.paid_to_date
+        return self.payments.aggregate(total=Sum('amount_paid'))['total'] or 0
 
     @property
     def is_paid(self):
@@ -59,15 +98,29 @@ class Expense(models.Model):
     created = models.DateField(default=now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=["created"], name="expense_created"),
+            models.Index(fields=["category", "created"], name="expense_category_created"),
+        ]
     
     def __str__(self):
         return self.name
     
 class Budget(models.Model):
+    class Period(models.TextChoices):
+        MONTH = 'M', 'Monthly'
+        QUARTER = 'Q', 'Quarterly'
+        YEAR = 'Y', 'Yearly'
+
     category = models.ForeignKey(Category, on_delete=models.CASCADE,  blank=False, null=False)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    period = models.CharField(max_length=1, choices=Period.choices, default=Period.MONTH,
+                              help_text="How often this amount is available.")
     description = models.TextField()
     date = models.DateField(auto_now_add=True)
+    end_date = models.DateField(blank=True, null=True, help_text="Last day this budget applies. Blank = ongoing.")
+    updated_at = models.DateTimeField(auto_now=True)
     
 def __str__(self):
         return f"{self.date} - {self.amount}"
@@ -79,45 +132,45 @@ class Debt(models.Model):
     owed = models.DecimalField(max_digits=10, decimal_places=2)
     due_by = models.DateField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    paid_by_earnings = models.BooleanField(
+        default=False,
+        help_text="Reimbursable work and mileage earnings pay down this debt.",
+    )
+
+    objects = DebtQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name} - {self.owed}"
 
     @property
     def total_amount_paid(self):
-        return sum(payment.amount_paid for payment in self.payments.all())
+        # Annotated by Debt.objects.with_balances(); otherwise one aggregate query
+        if hasattr(self, 'paid_to_date'):
+            return self.paid_to_date
+        return self.payments.aggregate(total=Sum('amount_paid'))['total'] or 0
     
     @property
     def remaining_balance(self):
         """Calculate remaining balance after payments."""
+        if hasattr(self, 'balance'):
+            return self.balance
         return self.owed - self.total_amount_paid
     
     def remaining_after_john_earnings(self):
-        """For debts with 'van' in name, subtract John app earnings from remaining balance."""
-        if 'van' not in self.name.lower():
-            return None  # Only applies to van-related debts
-        
-        from john.models import WorkEntry, MileageEntry
-        from decimal import Decimal
-        
-        # Get total from work entries
-        work_total = WorkEntry.objects.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        # Get total from mileage entries
-        mileage_total = MileageEntry.objects.aggregate(
-            total=Sum('amount')
-        )['total'] or Decimal('0.00')
-        
-        total_john_earnings = work_total + mileage_total
-        remaining = self.remaining_balance - total_john_earnings
-        
+        """
+        Remaining balance once the earnings ledger is applied. Reads the
+        ledger's running totals (one primary-key lookup), so it's O(1).
+        """
+        if not self.paid_by_earnings:
+            return None  # Only debts marked paid_by_earnings are paid down by earnings
+
+        ledger = current_ledger()
+        total_john_earnings = ledger.total
         return {
-            'work_total': work_total,
-            'mileage_total': mileage_total,
+            'work_total': ledger.work_total,
+            'mileage_total': ledger.mileage_total,
             'total_john_earnings': total_john_earnings,
-            'remaining': remaining
+            'remaining': self.remaining_balance - total_john_earnings,
         }
     
 class Savings(models.Model):
@@ -126,12 +179,16 @@ class Savings(models.Model):
     goal = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SavingsQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} - {self.goal}"
     
     @property
     def total_amount_saved(self):
-        return sum(payment.amount_paid for payment in self.payments.all())
+        if hasattr(self, 'saved_to_date'):
+            return self.saved_to_date
+        return self.payments.aggregate(total=Sum('amount_paid'))['total'] or 0
 
 class Payment(models.Model):
     debt = models.ForeignKey(Debt, related_name='payments', on_delete=models.CASCADE, blank=True, null=True)
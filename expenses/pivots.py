@@ -0,0 +1,119 @@
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from thisisus.dates import month_filter
+
+from .models import Expense
+
+ZERO = Decimal(0)
+
+
+def expense_pivot(start, end):
+    """
+    (year x month x category) expense totals for [start, end) from one
+    TruncMonth + values() grouped query.
+
+    Returns a dict with:
+      cells[(year, month)][category] -> total
+      month_totals[(year, month)]    -> total
+      year_totals[year]              -> total
+      category_year_totals[(category, year)] -> total
+      years, categories              -> sorted axis labels
+    """
+    rows = (
+        Expense.objects.filter(created__gte=start, created__lt=end)
+        .annotate(month=TruncMonth('created'))
+        .values('month', 'category__name')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+
+    cells = defaultdict(dict)
+    month_totals = defaultdict(lambda: ZERO)
+    year_totals = defaultdict(lambda: ZERO)
+    category_year_totals = defaultdict(lambda: ZERO)
+    categories = set()
+    for row in rows:
+        key = (row['month'].year, row['month'].month)
+        category = row['category__name']
+        cells[key][category] = row['total']
+        month_totals[key] += row['total']
+        year_totals[key[0]] += row['total']
+        category_year_totals[(category, key[0])] += row['total']
+        categories.add(category)
+
+    return {
+        'cells': dict(cells),
+        'month_totals': dict(month_totals),
+        'year_totals': dict(year_totals),
+        'category_year_totals': dict(category_year_totals),
+        'years': list(range(start.year, (end - timedelta(days=1)).year + 1)),
+        'categories': sorted(categories),
+    }
+
+
+def monthly_totals_rows(pivot, year):
+    """[(month number, month name, total)] for every month of `year`."""
+    return [
+        (month, calendar.month_name[month], pivot['month_totals'].get((year, month), ZERO))
+        for month in range(1, 13)
+    ]
+
+
+def year_over_year(pivot):
+    """
+    Template-ready rows for the year-over-year page: one row per month and one
+    per category, each with a value per year and the change from the year before.
+    """
+    years = pivot['years']
+
+    def with_changes(values):
+        return [
+            {'year': year, 'value': value, 'change': value - values[i - 1] if i else None}
+            for i, (year, value) in enumerate(zip(years, values))
+        ]
+
+    months = [
+        {
+            'month': month,
+            'name': calendar.month_name[month],
+            'values': with_changes([pivot['month_totals'].get((year, month), ZERO) for year in years]),
+        }
+        for month in range(1, 13)
+    ]
+    categories = [
+        {
+            'name': category,
+            'values': with_changes([pivot['category_year_totals'].get((category, year), ZERO) for year in years]),
+        }
+        for category in pivot['categories']
+    ]
+    totals = with_changes([pivot['year_totals'].get(year, ZERO) for year in years])
+    return {'years': years, 'months': months, 'categories': categories, 'totals': totals}
+
+
+def expenses_by_category(year, month):
+    """
+    One ordered fetch of a month's expenses grouped by category in Python:
+    [{'category__name', 'total', 'expenses': [...]}] sorted by category name.
+    """
+    expenses = (
+        Expense.objects.filter(**month_filter('created', year, month))
+        .select_related('category', 'user')
+        .order_by('category__name', 'created', 'id')
+    )
+    grouped = []
+    for name, items in groupby(expenses, key=lambda expense: expense.category.name):
+        items = list(items)
+        grouped.append({
+            'category__name': name,
+            'total': sum((expense.amount for expense in items), ZERO),
+            'expenses': items,
+        })
+    return grouped
@@ -1,3 +1,175 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from thisisus.testing import QueryBudgetMixin
+
+from .budgets import budget_report, month_period, quarter_period, year_period
+from .models import Budget, Category, Debt, Expense, FixedExpense, Payment, Savings
+from .pivots import expense_pivot, expenses_by_category, monthly_totals_rows, year_over_year
+
+
+class ExpenseViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget')
+        today = timezone.localdate()
+        categories = [Category.objects.create(name=f"Category {i}") for i in range(5)]
+        Expense.objects.bulk_create([
+            Expense(user=cls.user, category=categories[i % 5], name=f"Expense {i}",
+                    amount=Decimal("10.00"), created=today)
+            for i in range(40)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_expense_list(self):
+        # The per-row expense.category.name is served by select_related
+        self.assertViewQueryBudget(reverse('expenses:expense-list'), 4)
+
+
+class BudgetProrationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Groceries")
+
+    def budget(self, amount, period, start, end=None):
+        budget = Budget.objects.create(category=self.category, amount=Decimal(amount), period=period,
+                                       description="test", end_date=end)
+        # date is auto_now_add, so backdate it explicitly
+        Budget.objects.filter(pk=budget.pk).update(date=start)
+
+    def budgeted(self, period):
+        [report] = budget_report([period])
+        [row] = [row for row in report['rows'] if row['category_id'] == self.category.pk]
+        return row['total_budget']
+
+    def test_monthly_budget_started_mid_year_counts_only_live_months(self):
+        self.budget("100.00", Budget.Period.MONTH, date(2024, 10, 15))
+        self.assertEqual(self.budgeted(year_period(2024)), Decimal("300.00"))
+        self.assertEqual(self.budgeted(year_period(2025)), Decimal("1200.00"))
+
+    def test_monthly_budget_ended_mid_year_counts_through_end_month(self):
+        self.budget("100.00", Budget.Period.MONTH, date(2023, 6, 1), end=date(2024, 3, 10))
+        self.assertEqual(self.budgeted(year_period(2024)), Decimal("300.00"))
+        self.assertEqual(self.budgeted(quarter_period(2024, 2)), Decimal("0.00"))
+
+    def test_yearly_budget_is_prorated_within_quarter(self):
+        self.budget("1200.00", Budget.Period.YEAR, date(2024, 2, 1))
+        self.assertEqual(self.budgeted(quarter_period(2024, 1)), Decimal("200.00"))
+        self.assertEqual(self.budgeted(month_period(2024, 2)), Decimal("100.00"))
+        self.assertEqual(self.budgeted(month_period(2024, 1)), Decimal("0.00"))
+
+
+class ExpensePivotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('budget')
+        food = Category.objects.create(name='Food')
+        gas = Category.objects.create(name='Gas')
+        for category, day, amount in (
+            (food, date(2023, 1, 3), '10.00'),
+            (food, date(2023, 1, 31), '5.50'),
+            (gas, date(2023, 1, 15), '40.00'),
+            (food, date(2024, 1, 9), '20.00'),
+            (gas, date(2024, 12, 31), '30.00'),
+            (gas, date(2025, 1, 1), '99.00'),  # outside every range below
+        ):
+            Expense.objects.create(user=user, category=category, name='x', amount=Decimal(amount), created=day)
+
+    def test_pivot_is_one_query_with_consistent_totals(self):
+        with self.assertNumQueries(1):
+            pivot = expense_pivot(date(2023, 1, 1), date(2025, 1, 1))
+        self.assertEqual(pivot['years'], [2023, 2024])
+        self.assertEqual(pivot['categories'], ['Food', 'Gas'])
+        self.assertEqual(pivot['cells'][(2023, 1)], {'Food': Decimal('15.50'), 'Gas': Decimal('40.00')})
+        self.assertEqual(pivot['month_totals'][(2023, 1)], Decimal('55.50'))
+        self.assertEqual(pivot['year_totals'], {2023: Decimal('55.50'), 2024: Decimal('50.00')})
+        self.assertEqual(pivot['category_year_totals'][('Gas', 2024)], Decimal('30.00'))
+        self.assertEqual(sum(pivot['month_totals'].values()), sum(pivot['year_totals'].values()))
+
+    def test_monthly_rows_fill_empty_months(self):
+        rows = monthly_totals_rows(expense_pivot(date(2024, 1, 1), date(2025, 1, 1)), 2024)
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[0], (1, 'January', Decimal('20.00')))
+        self.assertEqual(rows[5][2], 0)
+
+    def test_year_over_year_changes(self):
+        context = year_over_year(expense_pivot(date(2023, 1, 1), date(2025, 1, 1)))
+        january = context['months'][0]['values']
+        self.assertEqual([value['change'] for value in january], [None, Decimal('-35.50')])
+        gas = next(row for row in context['categories'] if row['name'] == 'Gas')
+        self.assertEqual([value['value'] for value in gas['values']], [Decimal('40.00'), Decimal('30.00')])
+        self.assertEqual(context['totals'][1]['change'], Decimal('-5.50'))
+
+    def test_expenses_by_category_groups_in_one_query(self):
+        with self.assertNumQueries(1):
+            grouped = expenses_by_category(2023, 1)
+        self.assertEqual([(g['category__name'], g['total'], len(g['expenses'])) for g in grouped],
+                         [('Food', Decimal('15.50'), 2), ('Gas', Decimal('40.00'), 1)])
+
+
+class BalanceAnnotationTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget')
+        cls.card = Debt.objects.create(name='Card', description='', owed=Decimal('1000.00'))
+        cls.loan = Debt.objects.create(name='Loan', description='', owed=Decimal('500.00'))
+        cls.trip = Savings.objects.create(name='Trip', description='', goal=Decimal('800.00'))
+        cls.rent = FixedExpense.objects.create(name='Rent', frequency='PT', amount=Decimal('1200.00'), day_to_pay=1)
+        for amount in ('100.00', '250.50'):
+            Payment.objects.create(debt=cls.card, amount_paid=Decimal(amount))
+        Payment.objects.create(savings=cls.trip, amount_paid=Decimal('300.00'))
+        Payment.objects.create(fixed_expense=cls.rent, amount_paid=Decimal('1200.00'))
+
+    def test_annotations_match_the_per_row_properties(self):
+        for debt in Debt.objects.with_balances():
+            fresh = Debt.objects.get(pk=debt.pk)
+            self.assertEqual(debt.total_amount_paid, fresh.total_amount_paid)
+            self.assertEqual(debt.remaining_balance, fresh.remaining_balance)
+        balances = {debt.name: debt.balance for debt in Debt.objects.with_balances()}
+        # A debt with no payments is owed in full, not NULL
+        self.assertEqual(balances, {'Card': Decimal('649.50'), 'Loan': Decimal('500.00')})
+
+        trip = Savings.objects.with_balances().get()
+        self.assertEqual((trip.total_amount_saved, trip.goal_remaining), (Decimal('300.00'), Decimal('500.00')))
+        self.assertEqual(FixedExpense.objects.with_balances().get().fixed_amount_paid, Decimal('1200.00'))
+
+    def test_list_pages_do_not_query_per_row(self):
+        self.client.force_login(self.user)
+        Debt.objects.bulk_create([Debt(name=f'Debt {i}', description='', owed=Decimal('10.00')) for i in range(20)])
+        Savings.objects.bulk_create([Savings(name=f'Goal {i}', description='', goal=Decimal('10.00')) for i in range(20)])
+        self.assertViewQueryBudget(reverse('expenses:debt_list'), 4)
+        self.assertViewQueryBudget(reverse('expenses:savings_list'), 4)
+        self.assertViewQueryBudget(reverse('expenses:fixed_expense_list'), 4)
+
+
+class PeriodParamTests(TestCase):
+    """Bad ?year= values fall back to the current year instead of erroring."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('budget'))
+
+    def test_monthly_expense_totals(self):
+        for year in ('abc', '0', '99999'):
+            response = self.client.get(reverse('expenses:monthly_expense_totals'), {'year': year})
+            self.assertEqual(response.status_code, 200, year)
+            self.assertEqual(response.context['current_year'], timezone.localdate().year)
+
+    def test_yearly_budget_remaining(self):
+        # 9999 is valid for date() but its year_range() would end past date.max
+        for year in ('abc', '0', '9999', '99999'):
+            response = self.client.get(reverse('expenses:yearly_budget_remaining'), {'year': year})
+            self.assertEqual(response.status_code, 200, year)
+            self.assertEqual(response.context['year'], timezone.localdate().year)
 
-# Create your tests here.
+    def test_monthly_expenses_list(self):
+        for year in ('abc', '9999'):
+            response = self.client.get(reverse('expenses:monthly_expenses_list', args=[3]), {'year': year})
+            self.assertEqual(response.status_code, 200, year)
+            self.assertEqual(response.context['current_year'], timezone.localdate().year)
@@ -2,7 +2,7 @@ from django.urls import path
 from .views import expense_list, expense_detail, expense_create, expense_update, expense_delete, monthly_expense_totals, monthly_expenses_list,\
     fixed_expense_list, fixed_expense_detail, fixed_expense_create, fixed_expense_update, fixed_expense_delete, \
         expense_overview, budget_list, create_budget, edit_budget, delete_budget, calculate_budget_remaining, \
-            yearly_budget_remaining, debt_list, debt_details, savings_list, savings_details, create_payment
+            yearly_budget_remaining, expense_year_over_year, debt_list, debt_details, savings_list, savings_details, create_payment
 app_name = 'expenses' 
 
 urlpatterns = [
@@ -12,6 +12,7 @@ urlpatterns = [
     path('<int:expense_id>/delete/', expense_delete, name='expense-delete'),
     path('monthly-expense-totals/', monthly_expense_totals, name='monthly_expense_totals'),
     path('expenses/<int:month>/', monthly_expenses_list, name='monthly_expenses_list'),
+    path('year-over-year/', expense_year_over_year, name='expense_year_over_year'),
     path('fixed-expenses/', fixed_expense_list, name='fixed_expense_list'),
     path('fixed-expenses/<int:pk>/', fixed_expense_detail, name='fixed_expense_detail'),
     path('fixed-expenses/create/', fixed_expense_create, name='fixed_expense_create'),
@@ -10,6 +10,14 @@ from django.contrib.auth.models import User
 from django.utils.timezone import now
 import calendar
 from datetime import datetime
+from thisisus.dates import month_filter, valid_year, year_filter, year_range
+from .budgets import PERIOD_KINDS, budget_report, previous_periods, year_period
+from .pivots import expense_pivot, expenses_by_category, monthly_totals_rows, year_over_year
+
+
+def _requested_year(request):
+    # ?year= for the year-based reports; anything outside what date() accepts means this year
+    return valid_year(request.GET.get('year')) or timezone.localdate().year
 
 
 @login_required(login_url='/account/login/')
@@ -18,7 +26,7 @@ def expense_list(request):
     current_year = timezone.now().year
 
     # Get all expenses for the current month and year
-    expenses = Expense.objects.filter(created__month=current_month, created__year=current_year)
+    expenses = Expense.objects.filter(**month_filter('created', current_year, current_month)).select_related('category')
 
     # Group expenses by category and calculate total expenses for each category
     expenses_by_category = expenses.values('category__name') \
@@ -85,28 +93,15 @@ def expense_delete(request, expense_id):
 
 
 def monthly_expense_totals(request):
-    # Get the current year
-    current_year = datetime.now().year
-    
-    # Initialize a dictionary to hold monthly totals
-    monthly_totals = {}
-    
-    # Loop through each month of the year
-    for month in range(1, 13):
-        # Get expenses for the current month and year
-        expenses = Expense.objects.filter(created__year=current_year, created__month=month)
-        
-        # Calculate total expenses for the month
-        total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Add the total to the dictionary
-        month_name = calendar.month_name[month]
-        
-        # Add the total to the dictionary
-        monthly_totals[month_name] = total_expenses
-    
-    # Pass the monthly totals to the template for rendering
-    return render(request, 'expenses/monthly_totals.html', {'monthly_totals': monthly_totals})
+    current_year = _requested_year(request)
+    start, end = year_range(current_year)
+    pivot = expense_pivot(start, end)
+    context = {
+        'current_year': current_year,
+        'monthly_totals': monthly_totals_rows(pivot, current_year),
+        'year_total': pivot['year_totals'].get(current_year, 0),
+    }
+    return render(request, 'expenses/monthly_totals.html', context)
 
 def monthly_expenses_list(request, month):
     # Parse the month parameter from the URL or request data
@@ -119,34 +114,15 @@ def monthly_expenses_list(request, month):
         # Handle invalid month parameter, for example, redirect to an error page
         return render(request, 'error.html', {'error_message': 'Invalid month parameter'})
     
-    # Get the current year
-    current_year = datetime.now().year
-    
+    current_year = _requested_year(request)
     month_name = calendar.month_name[month]
-    
-    # Calculate total expenses for the month
-# Get expenses for the specified month and year
-    expenses = Expense.objects.filter(created__year=current_year, created__month=month)
-    
-    # Calculate total expenses for the month
-    total_expenses = expenses.aggregate(total=Sum('amount'))['total'] or 0
-    
-    # Calculate total expenses for each category
-    category_totals = expenses.values('category__name').annotate(total=Sum('amount'))
-    
- # Group expenses by category
-    category_list = expenses.values('category__name').annotate(total=Sum('amount'))
-    
-    # Get expenses for each category
-    for category in category_list:
-        category['expenses'] = Expense.objects.filter(created__year=current_year, created__month=month, category__name=category['category__name'])
-    
-    
-    
+
+    category_list = expenses_by_category(current_year, month)
+    total_expenses = sum(category['total'] for category in category_list)
+
     context={
-        'category_totals': category_totals,
+        'category_totals': category_list,
         'category_list': category_list,
-        'expenses': expenses, 
         'month': month, 
         'month_name': month_name, 
         'current_year':current_year,
@@ -158,12 +134,26 @@ def monthly_expenses_list(request, month):
     return render(request, 'expenses/monthly_expenses_list.html', context)
 
 
+@login_required(login_url='/account/login/')
+def expense_year_over_year(request):
+    try:
+        years = min(max(int(request.GET.get('years', 3)), 2), 10)
+    except ValueError:
+        years = 3
+    last_year = timezone.localdate().year
+    start, _ = year_range(last_year - years + 1)
+    _, end = year_range(last_year)
+    context = year_over_year(expense_pivot(start, end))
+    context['year_count'] = years
+    return render(request, 'expenses/year_over_year.html', context)
+
+
 @login_required(login_url='/account/login/')
 def expense_overview(request):
     # Data for expense_list
     current_month = timezone.now().month
     current_year = timezone.now().year
-    expenses = Expense.objects.filter(created__month=current_month, created__year=current_year)
+    expenses = Expense.objects.filter(**month_filter('created', current_year, current_month))
     total_expenses = expenses.aggregate(Sum('amount'))['amount__sum']
 
     # Data for fixed_expense_list
@@ -183,7 +173,7 @@ def expense_overview(request):
 
 @login_required(login_url='/account/login/')
 def fixed_expense_list(request):
-        fixed_expenses = FixedExpense.objects.all() 
+        fixed_expenses = FixedExpense.objects.with_balances()
         today = datetime.now().day
         total_amount = sum(fixed_expense.amount for fixed_expense in fixed_expenses)
         context = ({
@@ -195,7 +185,7 @@ def fixed_expense_list(request):
 
 @login_required(login_url='/account/login/')
 def fixed_expense_detail(request, pk):
-    fixed_expense = get_object_or_404(FixedExpense, pk=pk)
+    fixed_expense = get_object_or_404(FixedExpense.objects.with_balances(), pk=pk)
     return render(request, 'expenses/fixed_expense_detail.html', {'fixed_expense': fixed_expense})
 
 @login_required(login_url='/account/login/')
@@ -267,92 +257,47 @@ def delete_budget(request, pk):
 
 @login_required(login_url='/account/login/')
 def calculate_budget_remaining(request):
-    today = datetime.now()
-    current_month = today.month
-    current_year = today.year
-    first_day_of_month = today.replace(day=1)
-    last_day_of_month = (first_day_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-    categories = Category.objects.all()
+    kind = request.GET.get('period', 'month')
+    if kind not in PERIOD_KINDS:
+        kind = 'month'
+    try:
+        compare = min(max(int(request.GET.get('compare', 1)), 1), 12)
+    except ValueError:
+        compare = 1
 
-    
-    expenses = Expense.objects.filter(created__range=(first_day_of_month, last_day_of_month)) \
-                              .values('category')\
-                              .annotate(total_expenses=Coalesce(Sum('amount'), Value(0, output_field=DecimalField())))
-    
-    budgets = Budget.objects.all()\
-                            .values('category')\
-                            .annotate(total_budget=Coalesce(Sum('amount'), Value(0, output_field=DecimalField())))
-    
-    total_expenses_all = sum(item['total_expenses'] for item in expenses)
-    total_budget_all = sum(item['total_budget'] for item in budgets)
-    remaining_total = total_budget_all - total_expenses_all
-
-    budget_remaining = []
-    for category in categories:
-        total_expenses = next((item['total_expenses'] for item in expenses if item['category'] == category.id), 0)
-        total_budget = next((item['total_budget'] for item in budgets if item['category'] == category.id), 0)
-
-        remaining_budget = total_budget - total_expenses
-        budget_remaining.append({
-            'category_name': category.name,
-            'total_budget': total_budget,
-            'total_expenses': total_expenses,
-            'remaining_budget': remaining_budget
-            
-        })
-    context={
-            'budget_remaining': budget_remaining, 
-             'total_expenses_all': total_expenses_all, 
-             'total_budget_all': total_budget_all, 
-             'remaining_total': remaining_total
-        
+    report = budget_report(previous_periods(kind, timezone.localdate(), compare))
+    current = report[-1]
+    context = {
+        'period': current['period'],
+        'period_kind': kind,
+        'period_kinds': PERIOD_KINDS,
+        'budget_remaining': current['rows'],
+        'total_expenses_all': current['total_expenses_all'],
+        'total_budget_all': current['total_budget_all'],
+        'remaining_total': current['remaining_total'],
+        'comparison': report if compare > 1 else None,
     }
-
     return render(request, 'expenses/budget_expenses.html', context)
 
 @login_required(login_url='/account/login/')
 def yearly_budget_remaining(request):
-    # Get the current year
-    current_year = datetime.now().year
-
-    # Get all categories
-    categories = Category.objects.all()
-
-    # Calculate the total expenses for each category in the current year
-    expenses = Expense.objects.filter(created__year=current_year)\
-                              .values('category')\
-                              .annotate(total_expenses=Coalesce(Sum('amount'), Value(0, output_field=DecimalField())))
-
-    # Get the budget for each category in the current year
-    budgets = Budget.objects.filter(date__year=current_year)\
-                            .values('category')\
-                            .annotate(total_budget=Coalesce(Sum('amount'), Value(0, output_field=DecimalField())))
-
-    # Create a list to store the remaining budget for each category
-    budget_remaining = []
-
-    # Calculate the remaining budget for each category
-    for category in categories:
-        total_expenses = next((item['total_expenses'] for item in expenses if item['category'] == category.id), 0)
-        total_budget = next((item['total_budget'] for item in budgets if item['category'] == category.id), 0)
-
-        remaining_budget = total_budget - total_expenses
-        budget_remaining.append({
-            'category_name': category.name,
-            'total_budget': total_budget,
-            'total_expenses': total_expenses,
-            'remaining_budget': remaining_budget
-        })
+    year = _requested_year(request)
 
-    # You can now pass the budget_remaining list to your template or use it as needed
-
-    return render(request, 'expenses/yearly_budget_remaining.html', {'budget_remaining': budget_remaining})
+    report = budget_report([year_period(year)])[0]
+    context = {
+        'year': year,
+        'budget_remaining': report['rows'],
+        'total_expenses_all': report['total_expenses_all'],
+        'total_budget_all': report['total_budget_all'],
+        'remaining_total': report['remaining_total'],
+    }
+    return render(request, 'expenses/yearly_budget_remaining.html', context)
 
 
 
 @login_required(login_url='/account/login/')
 def debt_list(request):
-    debts = Debt.objects.all()
+    debts = Debt.objects.with_balances()
     context = {
         'debts': debts
     }
@@ -361,10 +306,10 @@ def debt_list(request):
 
 @login_required(login_url='/account/login/')
 def debt_details(request, debt_id):
-    debt = get_object_or_404(Debt, pk=debt_id)
-    debt_left = debt.remaining_balance
+    debt = get_object_or_404(Debt.objects.with_balances(), pk=debt_id)
+    debt_left = debt.balance
     
-    # Get John app earnings data if this is a van-related debt
+    # Earnings from the ledger, if this debt is paid down by them
     john_earnings = debt.remaining_after_john_earnings()
     
     context = {
@@ -376,7 +321,7 @@ def debt_details(request, debt_id):
 
 @login_required(login_url='/account/login/')
 def savings_list(request):
-    savings = Savings.objects.all()
+    savings = Savings.objects.with_balances()
     context = {
         'savings': savings
     }
@@ -386,8 +331,8 @@ def savings_list(request):
 
 @login_required(login_url='/account/login/')
 def savings_details(request, savings_id):
-    saving = get_object_or_404(Savings, pk=savings_id)
-    goal_left = (saving.goal - saving.total_amount_saved)
+    saving = get_object_or_404(Savings.objects.with_balances(), pk=savings_id)
+    goal_left = saving.goal_remaining
     context = {
         'saving': saving,
         'goal_left': goal_left
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('income', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='income',
+            index=models.Index(fields=['created'], name='income_created'),
+        ),
+    ]
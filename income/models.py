@@ -16,6 +16,11 @@ class Income(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     created = models.DateField(default=now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created"], name="income_created"),
+        ]
  
     def __init__(self, source):
         self.source = source
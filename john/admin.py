@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils import timezone
 
 from .models import Account, Bill, AccountWithdrawal, BillPayment,WorkEntry \
-    , MileageEntry
+    , MileageEntry, EarningsLedger
 
 
 @admin.register(Account)
@@ -72,4 +72,13 @@ class MileageEntryAdmin(admin.ModelAdmin):
     list_filter = ("date", "rate_per_mile", "created_at")
     search_fields = ("description", "notes")
     date_hierarchy = "date"
-    ordering = ("-date", "-id")
\ No newline at end of file
+    ordering = ("-date", "-id")
+
+@admin.register(EarningsLedger)
+class EarningsLedgerAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "work_total", "mileage_total", "total", "updated_at")
+    readonly_fields = ("work_total", "mileage_total", "updated_at")
+
+    def has_add_permission(self, request):
+        # The one row is created and kept current by john.ledger
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class JohnConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'john'
+
+    def ready(self):
+        from . import signals  # noqa: F401
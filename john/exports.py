@@ -0,0 +1,91 @@
+import json
+import zlib
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Account, AccountWithdrawal, Bill, BillPayment, MileageEntry, WorkEntry
+
+# Rows fetched per database round trip; memory use is bounded by this, not by table size
+EXPORT_CHUNK_SIZE = 2000
+
+# In dependency order, so a file set can go straight back in with loaddata.
+# Derived tables (schedule, ledger, summaries) are rebuilt rather than exported.
+EXPORT_MODELS = {
+    'accounts': Account,
+    'bills': Bill,
+    'bill_payments': BillPayment,
+    'account_withdrawals': AccountWithdrawal,
+    'work_entries': WorkEntry,
+    'mileage_entries': MileageEntry,
+}
+
+
+def parse_since(value):
+    """
+    Accept an ISO date or datetime for incremental exports; naive values are
+    taken as local time. Returns None for an empty value, raises ValueError
+    for anything unparseable.
+    """
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Not a date or datetime: {value!r}")
+        since = datetime.combine(day, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def export_rows(model, since=None):
+    """
+    Lazily yield one dict per row. values() skips model instantiation and
+    iterator() streams in chunks instead of caching the whole queryset.
+    With `since`, only rows changed from then on (updated_at >= since) are
+    included; models without updated_at are always exported whole.
+    """
+    fields = [field.attname for field in model._meta.concrete_fields]
+    rows = model.objects.order_by('pk')
+    if since is not None and 'updated_at' in fields:
+        rows = rows.filter(updated_at__gte=since)
+    return rows.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def ndjson_lines(model, since=None):
+    """
+    One fixture object per line ({"model", "pk", "fields"}), the same shape
+    Django's jsonl serializer writes, so files load back with loaddata.
+    """
+    label = model._meta.label_lower
+    names = {field.attname: field.name for field in model._meta.concrete_fields}
+    pk_name = model._meta.pk.attname
+    for row in export_rows(model, since):
+        pk = row.pop(pk_name)
+        fields = {names[attname]: value for attname, value in row.items()}
+        yield json.dumps({'model': label, 'pk': pk, 'fields': fields}, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_lines(names, since=None):
+    for name in names:
+        yield from ndjson_lines(EXPORT_MODELS[name], since)
+
+
+def gzip_chunks(lines, flush_bytes=64 * 1024):
+    """Compress a stream of text lines into gzip bytes without holding it all."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    pending = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending += len(data)
+        chunk = compressor.compress(data)
+        if pending >= flush_bytes:
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if chunk:
+            yield chunk
+    yield compressor.flush()
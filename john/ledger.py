@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import EarningsLedger, MileageEntry, WorkEntry
+
+# Which running total each entry model feeds
+LEDGER_FIELDS = {
+    WorkEntry: "work_total",
+    MileageEntry: "mileage_total",
+}
+
+
+def ledger_totals():
+    """Fresh totals from the entry tables, keyed by ledger field."""
+    return {
+        field: model.objects.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+        for model, field in LEDGER_FIELDS.items()
+    }
+
+
+def current_ledger():
+    """The ledger row, built from the entry tables if it doesn't exist yet."""
+    return EarningsLedger.objects.filter(pk=EarningsLedger.SINGLETON_PK).first() or rebuild_ledger()
+
+
+def apply_delta(model, delta):
+    """
+    Shift the ledger's running total for `model` by `delta`. Done with F() so
+    concurrent saves can't overwrite each other's update.
+    """
+    if not delta:
+        return
+    field = LEDGER_FIELDS[model]
+    updated = EarningsLedger.objects.filter(pk=EarningsLedger.SINGLETON_PK).update(
+        **{field: F(field) + delta, "updated_at": timezone.now()}
+    )
+    if not updated:
+        # No ledger row yet: start from the real totals, which include this entry
+        rebuild_ledger()
+
+
+@transaction.atomic
+def rebuild_ledger():
+    """
+    Recompute the ledger from the entry tables and return it. Use after bulk
+    loads, which skip the save/delete signals, or to repair drift.
+    """
+    ledger, _ = EarningsLedger.objects.update_or_create(
+        pk=EarningsLedger.SINGLETON_PK, defaults=ledger_totals(),
+    )
+    return ledger
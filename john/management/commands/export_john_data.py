@@ -1,47 +1,58 @@
-from django.core.management.base import BaseCommand
-from django.core.serializers import serialize
-from john.models import Account, Bill, BillPayment, WorkEntry, MileageEntry, AccountWithdrawal
-import json
+import gzip
+import os
 from datetime import datetime
 
+from django.core.management.base import BaseCommand, CommandError
+
+from john.exports import EXPORT_MODELS, ndjson_lines, parse_since
+
 
 class Command(BaseCommand):
-    help = 'Export all John app data to JSON file for PostgreSQL production import'
+    help = 'Stream John app data to one NDJSON file per model (loaddata-ready), optionally gzipped and incremental'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--output',
             type=str,
-            default=f'john_data_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
-            help='Output filename (default: john_data_export_YYYYMMDD_HHMMSS.json)',
+            default=f'john_data_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}',
+            help='Directory to write into (default: john_data_export_YYYYMMDD_HHMMSS)',
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Only rows updated at or after this ISO date/datetime (nightly deltas)',
+        )
+        parser.add_argument('--gzip', action='store_true', help='Write .jsonl.gz instead of .jsonl')
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=list(EXPORT_MODELS),
+            default=list(EXPORT_MODELS),
+            help='Subset of models to export (default: all)',
         )
 
     def handle(self, *args, **options):
-        output_file = options['output']
-        
-        self.stdout.write('Exporting John app data...')
-        
-        # Serialize all data
-        data = {
-            'accounts': json.loads(serialize('json', Account.objects.all())),
-            'bills': json.loads(serialize('json', Bill.objects.all())),
-            'bill_payments': json.loads(serialize('json', BillPayment.objects.all())),
-            'account_withdrawals': json.loads(serialize('json', AccountWithdrawal.objects.all())),
-            'work_entries': json.loads(serialize('json', WorkEntry.objects.all())),
-            'mileage_entries': json.loads(serialize('json', MileageEntry.objects.all())),
-        }
-        
-        # Write to file
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Print summary
-        self.stdout.write(self.style.SUCCESS(f'\nSuccessfully exported data to: {output_file}'))
-        self.stdout.write(f'\nSummary:')
-        self.stdout.write(f'  - Accounts: {len(data["accounts"])}')
-        self.stdout.write(f'  - Bills: {len(data["bills"])}')
-        self.stdout.write(f'  - Bill Payments: {len(data["bill_payments"])}')
-        self.stdout.write(f'  - Account Withdrawals: {len(data["account_withdrawals"])}')
-        self.stdout.write(f'  - Work Entries: {len(data["work_entries"])}')
-        self.stdout.write(f'  - Mileage Entries: {len(data["mileage_entries"])}')
-        self.stdout.write(f'\nTo import in production, use: python manage.py loaddata {output_file}')
+        try:
+            since = parse_since(options['since'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        output_dir = options['output']
+        os.makedirs(output_dir, exist_ok=True)
+        self.stdout.write('Exporting John app data' + (f' changed since {since}' if since else '') + '...')
+
+        paths = []
+        for name in options['models']:
+            path = os.path.join(output_dir, f'{name}.jsonl' + ('.gz' if options['gzip'] else ''))
+            opener = gzip.open if options['gzip'] else open
+            count = 0
+            with opener(path, 'wt', encoding='utf-8') as handle:
+                for line in ndjson_lines(EXPORT_MODELS[name], since):
+                    handle.write(line)
+                    count += 1
+            paths.append(path)
+            self.stdout.write(f'  - {name}: {count}')
+
+        self.stdout.write(self.style.SUCCESS(f'\nSuccessfully exported data to: {output_dir}'))
+        self.stdout.write(f'\nTo import, use: python manage.py loaddata {" ".join(paths)}')
+        self.stdout.write('then rebuild derived data: python manage.py rebuild_earnings_ledger && python manage.py sync_bill_schedule')
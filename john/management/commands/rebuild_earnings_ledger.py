@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from john.ledger import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = "Recompute the earnings ledger totals from WorkEntry and MileageEntry"
+
+    def handle(self, *args, **options):
+        ledger = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(
+            f"Earnings ledger: work ${ledger.work_total}, "
+            f"mileage ${ledger.mileage_total}, total ${ledger.total}"
+        ))
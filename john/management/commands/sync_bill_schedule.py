@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from john.schedule import HORIZON_MONTHS, rebuild_schedule
+
+
+class Command(BaseCommand):
+    help = 'Materialize BillOccurrence rows for the rolling horizon (optionally backfilling history)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First month to build, as YYYY-MM (default: the current month)',
+        )
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=HORIZON_MONTHS,
+            help=f'Months to build after the current one is reached (default: {HORIZON_MONTHS})',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        start = today.replace(day=1)
+        if options['start']:
+            try:
+                start = date.fromisoformat(f"{options['start']}-01")
+            except ValueError:
+                raise CommandError(f"--start must look like YYYY-MM, got {options['start']!r}")
+
+        # Months of history before the current month, plus the forward horizon
+        history = max(0, (today.year - start.year) * 12 + today.month - start.month)
+        created, deleted, linked = rebuild_schedule(start=start, months=history + options['months'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} occurrences created, {deleted} removed, {linked} payments linked'
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('john', '0007_alter_mileageentry_amount_alter_workentry_amount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='billpayment',
+            index=models.Index(fields=['date_paid'], name='billpayment_date_paid'),
+        ),
+        migrations.AddIndex(
+            model_name='billpayment',
+            index=models.Index(fields=['bill', 'date_paid'], name='billpayment_bill_date_paid'),
+        ),
+        migrations.AddIndex(
+            model_name='mileageentry',
+            index=models.Index(fields=['date'], name='mileageentry_date'),
+        ),
+        migrations.AddIndex(
+            model_name='workentry',
+            index=models.Index(fields=['date'], name='workentry_date'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:18
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    EarningsLedger = apps.get_model('john', 'EarningsLedger')
+    WorkEntry = apps.get_model('john', 'WorkEntry')
+    MileageEntry = apps.get_model('john', 'MileageEntry')
+    EarningsLedger.objects.update_or_create(
+        pk=1,
+        defaults={
+            'work_total': WorkEntry.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00'),
+            'mileage_total': MileageEntry.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00'),
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('john', '0008_date_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EarningsLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('mileage_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='earningsledger',
+            constraint=models.CheckConstraint(check=models.Q(('id', 1)), name='earnings_ledger_singleton'),
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
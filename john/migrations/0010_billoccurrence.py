@@ -0,0 +1,61 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def build_schedule(apps, schema_editor):
+    # Same rules as john.schedule.sync_schedule, for the first 12 months
+    import calendar
+    from datetime import date
+
+    Bill = apps.get_model('john', 'Bill')
+    BillPayment = apps.get_model('john', 'BillPayment')
+    BillOccurrence = apps.get_model('john', 'BillOccurrence')
+
+    today = django.utils.timezone.localdate()
+    months = []
+    year, month = today.year, today.month
+    for _ in range(12):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    occurrences = {}
+    for bill in Bill.objects.filter(active=True):
+        for year, month in months:
+            day = min(bill.due_day, calendar.monthrange(year, month)[1])
+            occurrences[(bill.pk, year, month)] = BillOccurrence(bill=bill, due_date=date(year, month, day))
+    for payment in BillPayment.objects.filter(date_paid__gte=date(today.year, today.month, 1)).order_by('date_paid', 'id'):
+        occurrence = occurrences.get((payment.bill_id, payment.date_paid.year, payment.date_paid.month))
+        if occurrence is not None and occurrence.payment_id is None:
+            occurrence.payment = payment
+    BillOccurrence.objects.bulk_create(occurrences.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('john', '0009_earningsledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('bill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='john.bill')),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrence', to='john.billpayment')),
+            ],
+            options={
+                'ordering': ['due_date', 'bill__name'],
+                'indexes': [models.Index(fields=['due_date'], name='billoccurrence_due_date')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='billoccurrence',
+            constraint=models.UniqueConstraint(fields=('bill', 'due_date'), name='uniq_bill_occurrence'),
+        ),
+        migrations.RunPython(build_schedule, migrations.RunPython.noop),
+    ]
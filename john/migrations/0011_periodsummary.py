@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:23
+
+from decimal import Decimal
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('john', '0010_billoccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('month', 'Month'), ('week', 'Week')], max_length=5)),
+                ('start', models.DateField()),
+                ('end', models.DateField(help_text='Exclusive end of the period.')),
+                ('payments_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('payments_count', models.PositiveIntegerField(default=0)),
+                ('totals_by_account', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('totals_by_type', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('hours_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('hours_amount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('miles_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('mileage_amount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Period summaries',
+                'ordering': ['kind', '-start'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='periodsummary',
+            constraint=models.UniqueConstraint(fields=('kind', 'start'), name='uniq_period_summary'),
+        ),
+    ]
@@ -1,7 +1,15 @@
+import calendar
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Value, When
+from django.db.models.functions import Least
 from django.utils import timezone
 from decimal import Decimal
 
+from thisisus.dates import month_filter
+
 
 
 class Account(models.Model):
@@ -24,6 +32,47 @@ class Account(models.Model):
         return f"{self.name} ({self.institution})" if self.institution else self.name
 
 
+class BillQuerySet(models.QuerySet):
+    SOON_DAYS = 7
+
+    def with_status(self, today=None):
+        """
+        Annotate each bill's next unpaid due date, in the same query:
+        paid_this_month (EXISTS over the month's payments), days_until_due
+        (to this month's due date, or to next month's once this month is paid,
+        so it wraps across the month boundary) and due_status
+        (paid / overdue / soon / upcoming). A paid bill whose next due date
+        is within SOON_DAYS is "soon" again rather than "paid".
+        """
+        today = today or timezone.localdate()
+        last_day = calendar.monthrange(today.year, today.month)[1]
+        next_year, next_month = (today.year + 1, 1) if today.month == 12 else (today.year, today.month + 1)
+        next_last_day = calendar.monthrange(next_year, next_month)[1]
+        payments = BillPayment.objects.filter(
+            bill=OuterRef("pk"),
+            **month_filter("date_paid", today.year, today.month),
+        )
+        return self.annotate(
+            paid_this_month=Exists(payments),
+            due_day_this_month=Least(F("due_day"), Value(last_day)),
+            days_until_due=Case(
+                When(
+                    paid_this_month=True,
+                    then=Least(F("due_day"), Value(next_last_day)) + Value(last_day - today.day),
+                ),
+                default=F("due_day_this_month") - Value(today.day),
+                output_field=IntegerField(),
+            ),
+            due_status=Case(
+                When(paid_this_month=True, days_until_due__gt=self.SOON_DAYS, then=Value("paid")),
+                When(days_until_due__lt=0, then=Value("overdue")),
+                When(days_until_due__lte=self.SOON_DAYS, then=Value("soon")),
+                default=Value("upcoming"),
+                output_field=models.CharField(),
+            ),
+        )
+
+
 class Bill(models.Model):
     """
     A recurring monthly bill.
@@ -58,12 +107,19 @@ class Bill(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BillQuerySet.as_manager()
+
     class Meta:
         ordering = ["active", "due_day", "name"]
 
     def __str__(self):
         return f"{self.name} (day {self.due_day})"
 
+    def due_date_in(self, year, month):
+        """The date this bill falls due in the given month (short months clamp)."""
+        last_day = calendar.monthrange(year, month)[1]
+        return date(year, month, min(self.due_day, last_day))
+
 
 class AccountWithdrawal(models.Model):
     """
@@ -164,11 +220,66 @@ class BillPayment(models.Model):
         ordering = ["-date_paid", "-id"]
         verbose_name = "Bill payment"
         verbose_name_plural = "Bill payments"
+        indexes = [
+            models.Index(fields=["date_paid"], name="billpayment_date_paid"),
+            models.Index(fields=["bill", "date_paid"], name="billpayment_bill_date_paid"),
+        ]
 
     def __str__(self):
         return f"{self.bill} paid {self.date_paid} - ${self.amount}"
 
 
+class BillOccurrenceQuerySet(models.QuerySet):
+    def between(self, start, end):
+        """Occurrences due in the half-open range [start, end)."""
+        return self.filter(due_date__gte=start, due_date__lt=end)
+
+    def unpaid(self):
+        return self.filter(payment__isnull=True)
+
+    def overdue(self, today=None):
+        today = today or timezone.localdate()
+        return self.unpaid().filter(due_date__lt=today, bill__active=True)
+
+
+class BillOccurrence(models.Model):
+    """
+    One scheduled due date of a recurring Bill, materialized by john.schedule
+    for a rolling horizon. Linked to the BillPayment that settled it, if any.
+    """
+    bill = models.ForeignKey(
+        Bill,
+        on_delete=models.CASCADE,
+        related_name="occurrences",
+    )
+    due_date = models.DateField()
+    payment = models.OneToOneField(
+        BillPayment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="occurrence",
+    )
+
+    objects = BillOccurrenceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["due_date", "bill__name"]
+        constraints = [
+            models.UniqueConstraint(fields=["bill", "due_date"], name="uniq_bill_occurrence"),
+        ]
+        indexes = [
+            models.Index(fields=["due_date"], name="billoccurrence_due_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.bill.name} due {self.due_date}"
+
+    @property
+    def is_paid(self):
+        return self.payment_id is not None
+
+
 class WorkEntry(models.Model):
     """
     Track hours worked for reimbursement.
@@ -208,6 +319,9 @@ class WorkEntry(models.Model):
         ordering = ["-date", "-id"]
         verbose_name = "Work entry"
         verbose_name_plural = "Work entries"
+        indexes = [
+            models.Index(fields=["date"], name="workentry_date"),
+        ]
 
     def save(self, *args, **kwargs):
         # Calculate hours from start/end time if both are provided
@@ -280,6 +394,9 @@ class MileageEntry(models.Model):
         ordering = ["-date", "-id"]
         verbose_name = "Mileage entry"
         verbose_name_plural = "Mileage entries"
+        indexes = [
+            models.Index(fields=["date"], name="mileageentry_date"),
+        ]
 
     def save(self, *args, **kwargs):
         # Calculate miles from starting/ending mileage if both are provided
@@ -292,3 +409,69 @@ class MileageEntry(models.Model):
 
     def __str__(self):
         return f"{self.date} – {self.miles} miles @ ${self.rate_per_mile}/mile"
+
+
+class EarningsLedger(models.Model):
+    """
+    Running totals of reimbursable earnings (work hours + mileage), kept in a
+    single row. Kept current by the WorkEntry/MileageEntry signals, so reading
+    a balance never has to sum the entry tables. Debts opt in via
+    Debt.paid_by_earnings.
+    """
+    SINGLETON_PK = 1
+
+    work_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    mileage_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(check=models.Q(id=1), name="earnings_ledger_singleton"),
+        ]
+
+    def __str__(self):
+        return f"Earnings ledger – ${self.total}"
+
+    @property
+    def total(self):
+        return self.work_total + self.mileage_total
+
+
+class PeriodSummary(models.Model):
+    """
+    Stored totals for one closed month or week of the summary report.
+    Built once by john.summaries and deleted by the signals whenever a payment,
+    work or mileage row dated inside [start, end) changes.
+    """
+    class Kind(models.TextChoices):
+        MONTH = "month", "Month"
+        WEEK = "week", "Week"
+
+    kind = models.CharField(max_length=5, choices=Kind.choices)
+    start = models.DateField()
+    end = models.DateField(help_text="Exclusive end of the period.")
+
+    payments_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    payments_count = models.PositiveIntegerField(default=0)
+    totals_by_account = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    totals_by_type = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    hours_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    hours_amount_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+    miles_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    mileage_amount_total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["kind", "-start"]
+        verbose_name_plural = "Period summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "start"], name="uniq_period_summary"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.start}"
+
+    @property
+    def grand_total_reimbursement(self):
+        return (self.hours_amount_total + self.mileage_amount_total).quantize(Decimal("0.01"))
@@ -0,0 +1,141 @@
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from thisisus.dates import month_filter
+
+from .models import Bill, BillOccurrence, BillPayment
+
+# How far ahead occurrences are materialized, counting the current month
+HORIZON_MONTHS = 12
+
+
+def month_starts(start, count):
+    """First days of `count` consecutive months beginning with start's month."""
+    year, month = start.year, start.month
+    months = []
+    for _ in range(count):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+@transaction.atomic
+def sync_schedule(bills=None, start=None, months=HORIZON_MONTHS):
+    """
+    Make BillOccurrence match each bill's due_day from start's month through
+    the horizon: missing occurrences are created, and unpaid ones that no longer
+    fit (due_day changed, bill deactivated) are dropped. Paid occurrences and
+    anything before `start` are history and left alone.
+    Returns (created, deleted).
+    """
+    start = (start or timezone.localdate()).replace(day=1)
+    window = month_starts(start, months)
+    if bills is None:
+        bills = Bill.objects.all()
+    bills = list(bills)
+
+    expected = {
+        bill.pk: {bill.due_date_in(m.year, m.month) for m in window} if bill.active else set()
+        for bill in bills
+    }
+
+    stale = []
+    existing = set()
+    rows = BillOccurrence.objects.filter(bill__in=bills, due_date__gte=start).values_list(
+        "id", "bill_id", "due_date", "payment_id"
+    )
+    for pk, bill_id, due_date, payment_id in rows:
+        if payment_id is None and due_date not in expected[bill_id]:
+            stale.append(pk)
+        else:
+            existing.add((bill_id, due_date))
+
+    deleted = BillOccurrence.objects.filter(pk__in=stale).delete()[0] if stale else 0
+    created = BillOccurrence.objects.bulk_create(
+        [
+            BillOccurrence(bill_id=bill_id, due_date=due_date)
+            for bill_id, dates in expected.items()
+            for due_date in sorted(dates)
+            if (bill_id, due_date) not in existing
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    if created:
+        link_payments(
+            BillPayment.objects.filter(
+                bill__in=bills, date_paid__gte=start, occurrence__isnull=True
+            )
+        )
+    return len(created), deleted
+
+
+def link_payments(payments):
+    """
+    Attach each payment to its bill's occurrence in the month it was paid
+    (the same "paid this month" rule the dashboard uses). Payments whose
+    month has no occurrence yet are skipped; returns the number linked.
+    """
+    payments = list(payments)
+    if not payments:
+        return 0
+    first = min(p.date_paid for p in payments).replace(day=1)
+    occurrences = {
+        (o.bill_id, o.due_date.year, o.due_date.month): o
+        for o in BillOccurrence.objects.filter(
+            bill_id__in={p.bill_id for p in payments},
+            due_date__gte=first,
+            payment__isnull=True,
+        )
+    }
+    linked = []
+    for payment in sorted(payments, key=lambda p: (p.date_paid, p.pk)):
+        occurrence = occurrences.pop((payment.bill_id, payment.date_paid.year, payment.date_paid.month), None)
+        if occurrence is not None:
+            occurrence.payment = payment
+            linked.append(occurrence)
+    BillOccurrence.objects.bulk_update(linked, ["payment"], batch_size=500)
+    return len(linked)
+
+
+def link_payment(payment):
+    """
+    Re-point a single saved payment at the occurrence for its bill and paid
+    month. An occurrence it no longer belongs to (the bill or the month was
+    edited) is freed and offered to that bill's other payments from the month.
+    """
+    freed = list(
+        BillOccurrence.objects.filter(payment=payment).exclude(
+            bill_id=payment.bill_id,
+            **month_filter("due_date", payment.date_paid.year, payment.date_paid.month),
+        )
+    )
+    if freed:
+        BillOccurrence.objects.filter(pk__in=[o.pk for o in freed]).update(payment=None)
+    if not BillOccurrence.objects.filter(payment=payment).exists():
+        link_payments([payment])
+    for occurrence in freed:
+        relink(occurrence.bill_id, occurrence.due_date)
+
+
+def relink(bill_id, day):
+    """Link the bill's unlinked payments from day's month to a free occurrence, e.g. after one was deleted."""
+    return link_payments(
+        BillPayment.objects.filter(
+            bill_id=bill_id, occurrence__isnull=True, **month_filter("date_paid", day.year, day.month)
+        )
+    )
+
+
+def rebuild_schedule(start=None, months=HORIZON_MONTHS):
+    """
+    sync_schedule every bill from start's month, then link every payment from
+    that month on that has no occurrence. For bulk loads, which skip the
+    signals. Returns (created, deleted, linked).
+    """
+    start = (start or timezone.localdate()).replace(day=1)
+    created, deleted = sync_schedule(start=start, months=months)
+    linked = link_payments(BillPayment.objects.filter(date_paid__gte=start, occurrence__isnull=True))
+    return created, deleted, linked
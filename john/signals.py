@@ -0,0 +1,108 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import summaries
+from .ledger import apply_delta
+from .models import Account, Bill, BillPayment, MileageEntry, WorkEntry
+from .schedule import link_payment, relink, sync_schedule
+
+# The date that decides which summary period a row belongs to
+PERIOD_DATE_FIELDS = {
+    BillPayment: "date_paid",
+    WorkEntry: "date",
+    MileageEntry: "date",
+}
+
+
+def _amount(value):
+    return value or 0
+
+
+def _period_date(instance):
+    return getattr(instance, PERIOD_DATE_FIELDS[type(instance)])
+
+
+@receiver(pre_save, sender=BillPayment)
+@receiver(pre_save, sender=WorkEntry)
+@receiver(pre_save, sender=MileageEntry)
+def remember_previous_row(sender, instance, raw=False, **kwargs):
+    # An edit only moves the ledger by the difference from what was stored,
+    # and can move the row into another summary period
+    instance._previous_amount = 0
+    instance._previous_date = None
+    if instance.pk and not raw:
+        previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("amount", PERIOD_DATE_FIELDS[sender])
+            .first()
+        )
+        if previous:
+            instance._previous_amount = _amount(previous[0])
+            instance._previous_date = previous[1]
+
+
+@receiver(post_save, sender=WorkEntry)
+@receiver(post_save, sender=MileageEntry)
+def update_ledger_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_amount", 0)
+    apply_delta(sender, _amount(instance.amount) - previous)
+
+
+@receiver(post_delete, sender=WorkEntry)
+@receiver(post_delete, sender=MileageEntry)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    apply_delta(sender, -_amount(instance.amount))
+
+
+@receiver(post_save, sender=BillPayment)
+@receiver(post_save, sender=WorkEntry)
+@receiver(post_save, sender=MileageEntry)
+def invalidate_summaries_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    summaries.invalidate(_period_date(instance), getattr(instance, "_previous_date", None))
+
+
+@receiver(post_delete, sender=BillPayment)
+@receiver(post_delete, sender=WorkEntry)
+@receiver(post_delete, sender=MileageEntry)
+def invalidate_summaries_on_delete(sender, instance, **kwargs):
+    summaries.invalidate(_period_date(instance))
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Account)
+@receiver(post_delete, sender=Bill)
+def invalidate_summary_breakdowns(sender, raw=False, **kwargs):
+    # Summaries break payments down by account name and auto-pay flag
+    if raw:
+        return
+    summaries.invalidate_all()
+
+
+@receiver(post_save, sender=Bill)
+def reschedule_bill(sender, instance, raw=False, **kwargs):
+    # due_day or active may have changed; fix this bill's upcoming occurrences
+    if raw:
+        return
+    sync_schedule(bills=[instance])
+
+
+@receiver(post_save, sender=BillPayment)
+def link_payment_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    link_payment(instance)
+
+
+@receiver(post_delete, sender=BillPayment)
+def relink_on_payment_delete(sender, instance, origin=None, **kwargs):
+    # The deleted payment's occurrence was freed (SET_NULL); another payment
+    # of the bill from that month may belong on it. Payments removed by a
+    # bill or account delete take their occurrences with them, so skip those.
+    if getattr(origin, "model", type(origin)) is not BillPayment:
+        return
+    relink(instance.bill_id, instance.date_paid)
@@ -0,0 +1,153 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, Sum, Value
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from thisisus.dates import month_range
+
+from .models import BillPayment, MileageEntry, PeriodSummary, WorkEntry
+
+Kind = PeriodSummary.Kind
+ZERO = Decimal("0.00")
+
+
+def week_range(start):
+    return start, start + timedelta(days=7)
+
+
+def _month_starts(start, end):
+    day = start
+    while day < end:
+        yield day
+        day = month_range(day.year, day.month)[1]
+
+
+def _bucket(field, start, split_months):
+    if split_months:
+        return TruncMonth(field)
+    return Value(start, output_field=DateField())
+
+
+def compute_summaries(kind, start, end, split_months=False):
+    """
+    Unsaved PeriodSummary rows for [start, end): one for the whole range, or one
+    per month when split_months is set. Either way it's three grouped queries.
+    """
+    summaries = {}
+
+    def summary(period):
+        if period not in summaries:
+            period_end = month_range(period.year, period.month)[1] if split_months else end
+            summaries[period] = PeriodSummary(kind=kind, start=period, end=period_end)
+        return summaries[period]
+
+    if split_months:
+        # Empty months still get a row
+        for day in _month_starts(start, end):
+            summary(day)
+
+    by_account = defaultdict(lambda: defaultdict(lambda: ZERO))
+    by_type = defaultdict(lambda: defaultdict(lambda: ZERO))
+    payments = (
+        BillPayment.objects.filter(date_paid__gte=start, date_paid__lt=end)
+        .annotate(period=_bucket("date_paid", start, split_months))
+        .values("period", "account__name", "bill__is_auto_pay")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    for row in payments:
+        row_summary = summary(row["period"])
+        row_summary.payments_total += row["total"]
+        row_summary.payments_count += row["count"]
+        by_account[row["period"]][row["account__name"]] += row["total"]
+        by_type[row["period"]][row["bill__is_auto_pay"]] += row["total"]
+
+    for period, totals in by_account.items():
+        summaries[period].totals_by_account = [
+            {"account__name": name, "total_amount": total} for name, total in sorted(totals.items())
+        ]
+    for period, totals in by_type.items():
+        summaries[period].totals_by_type = [
+            {"bill__is_auto_pay": auto_pay, "total_amount": total} for auto_pay, total in sorted(totals.items())
+        ]
+
+    for model, total_field, quantity, amount in (
+        (WorkEntry, "hours", "hours_total", "hours_amount_total"),
+        (MileageEntry, "miles", "miles_total", "mileage_amount_total"),
+    ):
+        rows = (
+            model.objects.filter(date__gte=start, date__lt=end)
+            .annotate(period=_bucket("date", start, split_months))
+            .values("period")
+            .annotate(quantity=Sum(total_field), amount=Sum("amount"))
+            .order_by()
+        )
+        for row in rows:
+            row_summary = summary(row["period"])
+            setattr(row_summary, quantity, row["quantity"] or ZERO)
+            setattr(row_summary, amount, row["amount"] or ZERO)
+
+    if not split_months:
+        summary(start)
+    return [summaries[period] for period in sorted(summaries)]
+
+
+def is_closed(end, today=None):
+    return end <= (today or timezone.localdate())
+
+
+def period_summary(kind, start, end):
+    """
+    Totals for one period. Closed periods are read from (or saved to) the
+    PeriodSummary table, so a historical page is a single row read; the
+    current period is always computed live.
+    """
+    if is_closed(end):
+        stored = PeriodSummary.objects.filter(kind=kind, start=start, end=end).first()
+        if stored is not None:
+            return stored
+    summary = compute_summaries(kind, start, end)[0]
+    if is_closed(end):
+        PeriodSummary.objects.bulk_create([summary], ignore_conflicts=True)
+    return summary
+
+
+def monthly_history(months=24, today=None):
+    """
+    The last `months` months (current one included), newest first. Stored
+    closed months are read in one query; any missing ones are computed together
+    in three grouped queries and saved.
+    """
+    today = today or timezone.localdate()
+    end = month_range(today.year, today.month)[1]
+    start = today.replace(day=1)
+    for _ in range(months - 1):
+        start = (start - timedelta(days=1)).replace(day=1)
+
+    stored = {
+        row.start: row
+        for row in PeriodSummary.objects.filter(kind=Kind.MONTH, start__gte=start, start__lt=end)
+    }
+    current = today.replace(day=1)
+    missing = [day for day in _month_starts(start, end) if day not in stored or day == current]
+    if missing:
+        computed = compute_summaries(Kind.MONTH, missing[0], end, split_months=True)
+        closed = [row for row in computed if row.start in missing and is_closed(row.end, today)]
+        PeriodSummary.objects.bulk_create(closed, ignore_conflicts=True)
+        for row in computed:
+            if row.start in missing:
+                stored[row.start] = row
+    return [stored[day] for day in sorted(stored, reverse=True)]
+
+
+def invalidate(*days):
+    """Forget stored summaries covering any of these dates."""
+    for day in {day for day in days if day is not None}:
+        PeriodSummary.objects.filter(start__lte=day, end__gt=day).delete()
+
+
+def invalidate_all():
+    PeriodSummary.objects.all().delete()
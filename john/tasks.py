@@ -0,0 +1,10 @@
+from celery import shared_task
+
+from .schedule import sync_schedule
+
+
+@shared_task
+def extend_bill_schedule():
+    """Roll the BillOccurrence horizon forward; run daily by celery beat."""
+    created, deleted = sync_schedule()
+    return {"created": created, "deleted": deleted}
@@ -1,3 +1,320 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from expenses.models import Debt
+from thisisus.dates import month_range
+from thisisus.testing import QueryBudgetMixin
+
+from .exports import EXPORT_MODELS, export_lines, gzip_chunks, ndjson_lines, parse_since
+from .ledger import current_ledger, rebuild_ledger
+from .models import (
+    Account, AccountWithdrawal, Bill, BillOccurrence, BillPayment, EarningsLedger, MileageEntry, PeriodSummary,
+    WorkEntry,
+)
+from .schedule import rebuild_schedule
+from .summaries import compute_summaries, monthly_history, period_summary
+
+
+class BillViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget')
+        today = timezone.localdate()
+        account = Account.objects.create(name="Checking")
+        bills = [
+            Bill.objects.create(name=f"Bill {i}", amount=Decimal("50.00"), due_day=i + 1, account=account)
+            for i in range(20)
+        ]
+        for bill in bills[::2]:
+            BillPayment.objects.create(bill=bill, account=account, amount=bill.amount, date_paid=today)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_dashboard(self):
+        self.assertViewQueryBudget(reverse('john:dashboard'), 5)
+
+    def test_bill_list(self):
+        self.assertViewQueryBudget(reverse('john:bill_list'), 1)
+
+
+class BillStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name="Checking")
+
+    def status(self, due_day, today, paid_on=None):
+        bill = Bill.objects.create(name=f"Due {due_day}", amount=Decimal("20.00"), due_day=due_day,
+                                   account=self.account)
+        if paid_on:
+            BillPayment.objects.create(bill=bill, account=self.account, amount=bill.amount, date_paid=paid_on)
+        bill = Bill.objects.with_status(today).get(pk=bill.pk)
+        return bill.due_status, bill.days_until_due
+
+    def test_unpaid_bill_counts_to_this_months_due_date(self):
+        self.assertEqual(self.status(5, date(2024, 9, 10)), ("overdue", -5))
+        self.assertEqual(self.status(14, date(2024, 9, 10)), ("soon", 4))
+        self.assertEqual(self.status(25, date(2024, 9, 10)), ("upcoming", 15))
+
+    def test_paid_bill_wraps_to_next_month(self):
+        # Paid on the 2nd and seen on the 30th: the next one is two days out
+        self.assertEqual(self.status(2, date(2024, 9, 30), paid_on=date(2024, 9, 2)), ("soon", 2))
+        self.assertEqual(self.status(25, date(2024, 9, 10), paid_on=date(2024, 9, 8)), ("paid", 45))
+
+    def test_wrap_across_year_end_and_short_months(self):
+        self.assertEqual(self.status(3, date(2024, 12, 29), paid_on=date(2024, 12, 1)), ("soon", 5))
+        # Due on the 31st: February clamps to the 28th
+        self.assertEqual(self.status(31, date(2025, 1, 31), paid_on=date(2025, 1, 31)), ("paid", 28))
+        self.assertEqual(self.status(31, date(2025, 2, 25)), ("soon", 3))
+
+    def test_bill_list_shows_paid_bill_due_again_soon(self):
+        soon = Bill.objects.create(name="Rent", amount=Decimal("900.00"), due_day=2, account=self.account)
+        later = Bill.objects.create(name="Water", amount=Decimal("40.00"), due_day=20, account=self.account)
+        for bill in (soon, later):
+            BillPayment.objects.create(bill=bill, account=self.account, amount=bill.amount,
+                                       date_paid=date(2024, 9, 2))
+        self.client.force_login(User.objects.create_user("status"))
+        with mock.patch("john.views.timezone.localdate", return_value=date(2024, 9, 30)):
+            bills = list(self.client.get(reverse("john:bill_list")).context["bills"])
+        self.assertEqual(bills, [soon])
+        self.assertEqual(bills[0].due_date, date(2024, 10, 2))
+
+
+class EarningsLedgerTests(TestCase):
+    def totals(self):
+        ledger = EarningsLedger.objects.get()
+        return ledger.work_total, ledger.mileage_total
+
+    def test_saves_move_the_ledger_by_the_difference(self):
+        work = WorkEntry.objects.create(hours=Decimal("2.00"))  # $30/hour
+        mileage = MileageEntry.objects.create(miles=Decimal("100.00"))  # $0.21/mile
+        self.assertEqual(self.totals(), (Decimal("60.00"), Decimal("21.00")))
+
+        work.hours = Decimal("3.50")
+        work.save()
+        mileage.delete()
+        self.assertEqual(self.totals(), (Decimal("105.00"), Decimal("0.00")))
+
+    def test_first_save_after_a_bulk_load_starts_from_the_real_totals(self):
+        # bulk_create skips the signals, and the ledger row is missing
+        EarningsLedger.objects.all().delete()
+        WorkEntry.objects.bulk_create([WorkEntry(hours=Decimal("2.00"), amount=Decimal("60.00"))])
+        WorkEntry.objects.create(hours=Decimal("1.00"))
+        self.assertEqual(self.totals(), (Decimal("90.00"), Decimal("0.00")))
+
+        WorkEntry.objects.bulk_create([WorkEntry(hours=Decimal("1.00"), amount=Decimal("30.00"))])
+        self.assertEqual(rebuild_ledger().work_total, Decimal("120.00"))
+
+    def test_there_is_only_one_ledger(self):
+        rebuild_ledger()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EarningsLedger.objects.create(pk=2)
+        self.assertEqual(current_ledger().pk, EarningsLedger.SINGLETON_PK)
+
+    def test_only_opted_in_debts_are_paid_down(self):
+        WorkEntry.objects.create(hours=Decimal("10.00"))
+        van = Debt.objects.create(name="Van", description="", owed=Decimal("1000.00"), paid_by_earnings=True)
+        loan = Debt.objects.create(name="Vanguard loan", description="", owed=Decimal("500.00"))
+
+        self.assertIsNone(loan.remaining_after_john_earnings())
+        van = Debt.objects.with_balances().get(pk=van.pk)
+        with self.assertNumQueries(1):
+            earnings = van.remaining_after_john_earnings()
+        self.assertEqual(earnings["total_john_earnings"], Decimal("300.00"))
+        self.assertEqual(earnings["remaining"], Decimal("700.00"))
+
+
+class BillScheduleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name="Checking")
+        cls.electric = Bill.objects.create(name="Electric", amount=Decimal("80.00"), due_day=5, account=cls.account)
+        cls.water = Bill.objects.create(name="Water", amount=Decimal("30.00"), due_day=9, account=cls.account)
+        cls.today = timezone.localdate()
+
+    def pay(self, bill, day=None):
+        return BillPayment.objects.create(bill=bill, account=self.account, amount=bill.amount,
+                                          date_paid=day or self.today)
+
+    def occurrence(self, bill):
+        return BillOccurrence.objects.get(bill=bill, due_date=bill.due_date_in(self.today.year, self.today.month))
+
+    def test_changing_the_bill_frees_the_old_occurrence(self):
+        payment = self.pay(self.electric)
+        extra = self.pay(self.electric)  # no second occurrence this month
+        self.assertEqual(self.occurrence(self.electric).payment, payment)
+
+        payment.bill = self.water
+        payment.save()
+        self.assertEqual(self.occurrence(self.water).payment, payment)
+        self.assertEqual(self.occurrence(self.electric).payment, extra)
+
+    def test_deleting_a_payment_relinks_its_occurrence(self):
+        payment = self.pay(self.electric)
+        extra = self.pay(self.electric)
+        payment.delete()
+        self.assertEqual(self.occurrence(self.electric).payment, extra)
+
+        extra.delete()
+        self.assertIsNone(self.occurrence(self.electric).payment)
+
+    def test_rebuild_links_bulk_loaded_payments(self):
+        BillPayment.objects.bulk_create([
+            BillPayment(bill=self.water, account=self.account, amount=Decimal("30.00"), date_paid=self.today),
+        ])
+        self.assertIsNone(self.occurrence(self.water).payment)
+        self.assertEqual(rebuild_schedule(), (0, 0, 1))
+        self.assertIsNotNone(self.occurrence(self.water).payment)
+
+
+class PeriodSummaryTests(TestCase):
+    MARCH = (PeriodSummary.Kind.MONTH, date(2024, 3, 1), date(2024, 4, 1))
+    APRIL = (PeriodSummary.Kind.MONTH, date(2024, 4, 1), date(2024, 5, 1))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name="Checking")
+        cls.bill = Bill.objects.create(name="Electric", amount=Decimal("80.00"), due_day=5, account=cls.account)
+
+    def pay(self, amount, day):
+        return BillPayment.objects.create(bill=self.bill, account=self.account, amount=Decimal(amount), date_paid=day)
+
+    def stored(self, period):
+        kind, start, end = period
+        return PeriodSummary.objects.filter(kind=kind, start=start, end=end).first()
+
+    def by_account(self, summary):
+        # Breakdowns are JSON; amounts come back from the database as strings
+        return {row["account__name"]: Decimal(row["total_amount"]) for row in summary.totals_by_account}
+
+    def test_closed_month_is_stored_and_read_back(self):
+        self.pay("80.00", date(2024, 3, 6))
+        WorkEntry.objects.create(date=date(2024, 3, 10), hours=Decimal("2.00"))
+        computed = period_summary(*self.MARCH)
+
+        with self.assertNumQueries(1):
+            stored = period_summary(*self.MARCH)
+        self.assertIsNotNone(stored.pk)
+        self.assertEqual(
+            (stored.payments_total, stored.payments_count, stored.hours_total, stored.hours_amount_total),
+            (Decimal("80.00"), 1, Decimal("2.00"), Decimal("60.00")),
+        )
+        self.assertEqual(self.by_account(stored), self.by_account(computed))
+        self.assertEqual(self.by_account(stored), {"Checking": Decimal("80.00")})
+
+    def test_moving_a_row_invalidates_both_months(self):
+        payment = self.pay("80.00", date(2024, 3, 6))
+        period_summary(*self.MARCH)
+        period_summary(*self.APRIL)
+
+        payment.date_paid = date(2024, 4, 2)
+        payment.save()
+        self.assertIsNone(self.stored(self.MARCH))
+        self.assertIsNone(self.stored(self.APRIL))
+        self.assertEqual(period_summary(*self.MARCH).payments_total, Decimal("0.00"))
+        self.assertEqual(period_summary(*self.APRIL).payments_total, Decimal("80.00"))
+
+        payment.delete()
+        self.assertEqual(period_summary(*self.APRIL).payments_count, 0)
+
+    def test_current_month_is_not_stored(self):
+        today = timezone.localdate()
+        start, end = month_range(today.year, today.month)
+        period_summary(PeriodSummary.Kind.MONTH, start, end)
+        self.assertFalse(PeriodSummary.objects.exists())
+
+    def test_history_matches_fresh_compute(self):
+        BillPayment.objects.create(bill=self.bill, account=self.account, amount=Decimal("80.00"),
+                                   date_paid=date(2024, 3, 6))
+        today = date(2024, 6, 15)
+        history = {row.start: row for row in monthly_history(months=4, today=today)}
+        fresh = {row.start: row for row in compute_summaries(
+            PeriodSummary.Kind.MONTH, date(2024, 3, 1), date(2024, 7, 1), split_months=True,
+        )}
+        self.assertEqual(sorted(history), sorted(fresh))
+        for start, row in fresh.items():
+            self.assertEqual(history[start].payments_total, row.payments_total)
+
+
+class JohnExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name="Checking")
+        cls.bill = Bill.objects.create(name="Electric", amount=Decimal("80.00"), due_day=5, account=cls.account)
+        BillPayment.objects.create(bill=cls.bill, account=cls.account, amount=Decimal("80.00"),
+                                   date_paid=date(2024, 3, 6))
+        AccountWithdrawal.objects.create(account=cls.account, bill=cls.bill, amount=Decimal("80.00"))
+        MileageEntry.objects.create(date=date(2024, 3, 2), miles=Decimal("40.00"))
+        cls.old = WorkEntry.objects.create(date=date(2024, 1, 2), hours=Decimal("2.00"))
+        cls.new = WorkEntry.objects.create(date=date(2024, 3, 2), hours=Decimal("1.50"))
+        WorkEntry.objects.filter(pk=cls.old.pk).update(updated_at=timezone.make_aware(datetime(2024, 1, 2)))
+
+    def test_parse_since(self):
+        self.assertIsNone(parse_since(""))
+        since = parse_since("2024-03-01")
+        self.assertTrue(timezone.is_aware(since))
+        self.assertEqual(timezone.localtime(since).replace(tzinfo=None), datetime(2024, 3, 1))
+        self.assertEqual(parse_since("2024-03-01T08:30").hour, 8)
+        with self.assertRaises(ValueError):
+            parse_since("last tuesday")
+
+    def test_since_keeps_rows_changed_after_it(self):
+        lines = list(ndjson_lines(WorkEntry, parse_since("2024-02-01")))
+        self.assertEqual([json.loads(line)["pk"] for line in lines], [self.new.pk])
+        # Models without updated_at are always exported whole
+        self.assertEqual(len(list(ndjson_lines(Account, parse_since("2030-01-01")))), 1)
+
+    def test_gzip_stream_matches_the_plain_one(self):
+        lines = list(export_lines(EXPORT_MODELS))
+        chunks = list(gzip_chunks(iter(lines), flush_bytes=64))
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(gzip.decompress(b"".join(chunks)).decode(), "".join(lines))
+
+    def test_view_streams_and_rejects_bad_since(self):
+        response = self.client.get(reverse("john:export_work"), {"gzip": "1"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(len(body.splitlines()), 2)
+        self.assertEqual(self.client.get(reverse("john:export_all"), {"since": "soon"}).status_code, 400)
+
+    def test_command_output_loads_back(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command("export_john_data", output=directory, gzip=True, stdout=StringIO())
+            files = sorted(os.listdir(directory))
+            self.assertEqual(len(files), len(EXPORT_MODELS))
+
+            for model in reversed(list(EXPORT_MODELS.values())):
+                model.objects.all().delete()
+            call_command("loaddata", *(os.path.join(directory, f"{name}.jsonl.gz") for name in EXPORT_MODELS),
+                         verbosity=0)
+        self.assertEqual(WorkEntry.objects.get(pk=self.new.pk).amount, Decimal("45.00"))
+        self.assertEqual(BillPayment.objects.get().bill, self.bill)
+        self.assertEqual(AccountWithdrawal.objects.get().bill, self.bill)
+
+
+class PeriodParamTests(TestCase):
+    """Bad ?year=/?month= values are ignored instead of erroring."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('john'))
+
+    def test_paid_bills(self):
+        for query in ({'month': '13'}, {'year': '99999'}, {'month': 'abc', 'year': '2024'}):
+            self.assertEqual(self.client.get(reverse('john:paid_bills'), query).status_code, 200, query)
 
-# Create your tests here.
+    def test_monthly_summary(self):
+        for query in ({'month': '13'}, {'year': '0'}, {'month': 'abc'}):
+            self.assertEqual(self.client.get(reverse('john:monthly_summary'), query).status_code, 200, query)
@@ -8,6 +8,7 @@ urlpatterns = [
     path("", views.dashboard, name="dashboard"), 
     path("bills/", views.bill_list, name="bill_list"),
     path("bills/paid/", views.paid_bills, name="paid_bills"),
+    path("bills/upcoming/", views.upcoming_bills, name="upcoming_bills"),
     path("bills/new/", views.bill_create, name="bill_create"),
     path("bills/<int:pk>/", views.bill_detail, name="bill_detail"),
     path("bills/<int:pk>/edit/", views.bill_edit, name="bill_edit"),
@@ -21,6 +22,7 @@ urlpatterns = [
     path("mileage/<int:pk>/edit/", views.mileage_entry_edit, name="mileage_entry_edit"),
     path("mileage/<int:pk>/delete/", views.mileage_entry_delete, name="mileage_entry_delete"),
     path("reports/summary/", views.monthly_summary, name="monthly_summary"),
+    path("reports/history/", views.summary_history, name="summary_history"),
     
     # Export URLs
     path("export/all/", views.export_john_data, name="export_all"),
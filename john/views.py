@@ -1,22 +1,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone
-from django.http import JsonResponse
-import json
-from .models import Bill, Account, BillPayment, WorkEntry, MileageEntry
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from .models import Bill, Account, BillOccurrence, BillPayment, WorkEntry, MileageEntry
 from .forms import BillForm, PayBillForm, WorkEntryForm, MileageEntryForm
 from datetime import timedelta, date
-from django.db.models import Sum, Q
+from django.db.models import Count, Sum, Q
+from django.db.models.functions import Abs
 from decimal import Decimal
-import calendar
+from thisisus.dates import month_filter, month_range, period_filter, valid_month, valid_year
+from .exports import EXPORT_MODELS, export_lines, gzip_chunks, parse_since
+from .summaries import monthly_history, period_summary, week_range
 
 
 
-def _due_date_for_month(due_day: int, year: int, month: int) -> date:
-    last_day = calendar.monthrange(year, month)[1]
-    safe_day = min(due_day, last_day)
-    return date(year, month, safe_day)
-
 def dashboard(request):
     today = timezone.localdate()
     year, month = today.year, today.month
@@ -26,54 +23,39 @@ def dashboard(request):
     bills = (
         Bill.objects.filter(active=True)
         .select_related("account")
-        .prefetch_related("payments")
+        .with_status(today)
     )
 
     overdue = []
     due_soon = []
-    upcoming = []
     total_unpaid = Decimal("0.00")
     total_overdue = Decimal("0.00")
     total_due_soon = Decimal("0.00")
-    soon_threshold = today + timedelta(days=7)
 
     for bill in bills:
-        bill.due_date = _due_date_for_month(bill.due_day, year, month)
-        bill.days_until_due = (bill.due_date - today).days
-        bill.paid_this_month = bill.payments.filter(
-            date_paid__year=year,
-            date_paid__month=month,
-        ).exists()
-
-        if bill.paid_this_month:
-            bill.due_status = "paid"
-        else:
-            total_unpaid += bill.amount
-            if bill.due_date < today:
-                bill.due_status = "overdue"
-                overdue.append(bill)
-                total_overdue += bill.amount
-            elif bill.due_date <= soon_threshold:
-                bill.due_status = "soon"
-                due_soon.append(bill)
-                total_due_soon += bill.amount
-            else:
-                bill.due_status = "upcoming"
-                upcoming.append(bill)
+        # The next unpaid due date: next month's once this month is paid
+        bill.due_date = today + timedelta(days=bill.days_until_due)
+        if bill.due_status == "paid":
+            continue
+        total_unpaid += bill.amount
+        if bill.due_status == "overdue":
+            overdue.append(bill)
+            total_overdue += bill.amount
+        elif bill.due_status == "soon":
+            due_soon.append(bill)
+            total_due_soon += bill.amount
 
     # Bills paid this month (history)
     paid_this_month = BillPayment.objects.select_related("bill", "account").filter(
-        date_paid__year=year,
-        date_paid__month=month,
+        **month_filter("date_paid", year, month)
     ).order_by("-date_paid")
 
-    total_paid_this_month = (
-        paid_this_month.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
-    )
-    paid_this_month_count = paid_this_month.count()
+    paid_summary = paid_this_month.aggregate(total=Sum("amount"), count=Count("id"))
+    total_paid_this_month = paid_summary["total"] or Decimal("0.00")
+    paid_this_month_count = paid_summary["count"]
 
     # ===== Hours this month =====
-    work_entries = WorkEntry.objects.filter(date__year=year, date__month=month)
+    work_entries = WorkEntry.objects.filter(**month_filter("date", year, month))
     work_summary = work_entries.aggregate(
         total_hours=Sum("hours"),
         total_amount=Sum("amount"),
@@ -82,7 +64,7 @@ def dashboard(request):
     hours_amount_this_month = work_summary["total_amount"] or Decimal("0.00")
 
     # ===== Mileage this month =====
-    mileage_entries = MileageEntry.objects.filter(date__year=year, date__month=month)
+    mileage_entries = MileageEntry.objects.filter(**month_filter("date", year, month))
     mileage_summary = mileage_entries.aggregate(
         total_miles=Sum("miles"),
         total_amount=Sum("amount"),
@@ -116,39 +98,19 @@ def dashboard(request):
 
 def bill_list(request):
     today = timezone.localdate()
-    current_day = today.day
-    soon_threshold_day = (today + timedelta(days=7)).day
-
-    # Get all active bills
-    active_bills = Bill.objects.filter(active=True).order_by("due_day")
-    
-    # Get bills paid this month
-    paid_bill_ids_this_month = BillPayment.objects.filter(
-        date_paid__year=today.year,
-        date_paid__month=today.month,
-    ).values_list('bill_id', flat=True)
-
-    # Unpaid bills this month
-    bills = active_bills.exclude(id__in=paid_bill_ids_this_month)
 
-    # Annotate each bill with helper attributes for the template
+    # Active bills with an open due date (this month's, or next month's when
+    # this month is paid and it is already close), due state worked out in the query
+    bills = (
+        Bill.objects.filter(active=True)
+        .with_status(today)
+        .exclude(due_status="paid")
+        .annotate(days_until_due_abs=Abs("days_until_due"))
+        .select_related("account")
+        .order_by("days_until_due", "name")
+    )
     for bill in bills:
-        # Calculate days until due (approximate, within current month)
-        if bill.due_day >= current_day:
-            bill.days_until_due = bill.due_day - current_day
-        else:
-            # Bill is overdue this month
-            bill.days_until_due = -(current_day - bill.due_day)
-        
-        # Store absolute value for display
-        bill.days_until_due_abs = abs(bill.days_until_due)
-        
-        if bill.due_day < current_day:
-            bill.due_status = "overdue"
-        elif bill.due_day <= current_day + 7:
-            bill.due_status = "soon"
-        else:
-            bill.due_status = "upcoming"
+        bill.due_date = today + timedelta(days=bill.days_until_due)
 
     context = {
         "bills": bills,
@@ -157,6 +119,44 @@ def bill_list(request):
     return render(request, "john/bill_list.html", context)
 
 
+def upcoming_bills(request):
+    """
+    Everything due in the next ?days= days (default 90) across all accounts,
+    read from the materialized BillOccurrence schedule.
+    """
+    today = timezone.localdate()
+    try:
+        days = max(1, min(int(request.GET.get("days", 90)), 366))
+    except ValueError:
+        days = 90
+    end = today + timedelta(days=days)
+
+    occurrences = (
+        BillOccurrence.objects.filter(bill__active=True)
+        .select_related("bill", "bill__account", "payment")
+    )
+    upcoming = occurrences.between(today, end)
+    overdue = occurrences.overdue(today)
+
+    by_account = (
+        upcoming.unpaid()
+        .values("bill__account__name")
+        .annotate(total=Sum("bill__amount"), count=Count("id"))
+        .order_by("bill__account__name")
+    )
+
+    context = {
+        "today": today,
+        "days": days,
+        "end": end,
+        "occurrences": upcoming,
+        "overdue": overdue,
+        "by_account": by_account,
+        "total_due": sum(row["total"] for row in by_account),
+    }
+    return render(request, "john/upcoming_bills.html", context)
+
+
 def paid_bills(request):
     """
     Show all paid bills, filter/sortable by month and year.
@@ -167,10 +167,7 @@ def paid_bills(request):
     year = request.GET.get("year")
     month = request.GET.get("month")
 
-    if year:
-        payments = payments.filter(date_paid__year=year)
-    if month:
-        payments = payments.filter(date_paid__month=month)
+    payments = payments.filter(**period_filter("date_paid", year, month))
 
     payments = payments.order_by("-date_paid", "bill__name")
 
@@ -281,10 +278,7 @@ def time_entries(request):
     year = request.GET.get("year")
     month = request.GET.get("month")
 
-    if year:
-        entries = entries.filter(date__year=year)
-    if month:
-        entries = entries.filter(date__month=month)
+    entries = entries.filter(**period_filter("date", year, month))
 
     total_hours = entries.aggregate(total=Sum("hours"))["total"] or Decimal("0.00")
     total_amount = entries.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
@@ -359,10 +353,7 @@ def mileage_entries(request):
     year = request.GET.get("year")
     month = request.GET.get("month")
 
-    if year:
-        entries = entries.filter(date__year=year)
-    if month:
-        entries = entries.filter(date__month=month)
+    entries = entries.filter(**period_filter("date", year, month))
 
     total_miles = entries.aggregate(total=Sum("miles"))["total"] or Decimal("0.00")
     total_amount = entries.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
@@ -428,52 +419,6 @@ def mileage_entry_delete(request, pk):
     return render(request, "john/mileage_confirm_delete.html", {"entry": entry})
 
 
-def export_john_data(request):
-    """
-    Export all John app data to JSON format for PostgreSQL import.
-    """
-    from django.core.serializers import serialize
-    
-    data = {
-        'accounts': json.loads(serialize('json', Account.objects.all())),
-        'bills': json.loads(serialize('json', Bill.objects.all())),
-        'bill_payments': json.loads(serialize('json', BillPayment.objects.all())),
-        'work_entries': json.loads(serialize('json', WorkEntry.objects.all())),
-        'mileage_entries': json.loads(serialize('json', MileageEntry.objects.all())),
-        'account_withdrawals': json.loads(serialize('json', AccountWithdrawal.objects.all())),
-    }
-    
-    response = JsonResponse(data, json_dumps_params={'indent': 2})
-    response['Content-Disposition'] = f'attachment; filename="john_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-    return response
-
-
-def export_work_entries_json(request):
-    """
-    Export only work entries to JSON.
-    """
-    from django.core.serializers import serialize
-    entries = WorkEntry.objects.all().order_by('-date')
-    data = json.loads(serialize('json', entries))
-    
-    response = JsonResponse(data, safe=False, json_dumps_params={'indent': 2})
-    response['Content-Disposition'] = f'attachment; filename="work_entries_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-    return response
-
-
-def export_mileage_entries_json(request):
-    """
-    Export only mileage entries to JSON.
-    """
-    from django.core.serializers import serialize
-    entries = MileageEntry.objects.all().order_by('-date')
-    data = json.loads(serialize('json', entries))
-    
-    response = JsonResponse(data, safe=False, json_dumps_params={'indent': 2})
-    response['Content-Disposition'] = f'attachment; filename="mileage_entries_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-    return response
-
-
 def monthly_summary(request):
     """
     Summary report for a period:
@@ -511,76 +456,24 @@ def monthly_summary(request):
         end_date = start_date + timedelta(days=6)
 
         period_label = f"Week of {start_date} to {end_date}"
-
-        payment_filter = {"date_paid__range": (start_date, end_date)}
-        work_filter = {"date__range": (start_date, end_date)}
-        mileage_filter = {"date__range": (start_date, end_date)}
+        period_start, period_end = week_range(start_date)
 
     else:
         # Month: use year/month params or current month
-        year_param = request.GET.get("year")
-        month_param = request.GET.get("month")
-
-        try:
-            year = int(year_param) if year_param else today.year
-        except (TypeError, ValueError):
-            year = today.year
-
-        try:
-            month = int(month_param) if month_param else today.month
-        except (TypeError, ValueError):
-            month = today.month
+        year = valid_year(request.GET.get("year")) or today.year
+        month = valid_month(request.GET.get("month")) or today.month
 
         period_label = date(year, month, 1).strftime("%B %Y")
+        period_start, period_end = month_range(year, month)
 
-        payment_filter = {"date_paid__year": year, "date_paid__month": month}
-        work_filter = {"date__year": year, "date__month": month}
-        mileage_filter = {"date__year": year, "date__month": month}
+    # Totals: one stored row for closed periods, computed live for the current one
+    summary = period_summary(summary_type, period_start, period_end)
 
-    # ====== Bill payments in period ======
     payments = BillPayment.objects.select_related("bill", "account").filter(
-        **payment_filter
-    )
-
-    payments_total = (
-        payments.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+        date_paid__gte=period_start, date_paid__lt=period_end
     )
-    payments_count = payments.count()
-
-    # Optional breakdowns (you can surface in template later if you want)
-    totals_by_account = (
-        payments.values("account__name")
-        .annotate(total_amount=Sum("amount"))
-        .order_by("account__name")
-    )
-    totals_by_type = (
-        payments.values("bill__is_auto_pay")
-        .annotate(total_amount=Sum("amount"))
-        .order_by("bill__is_auto_pay")
-    )
-
-    # ====== Work hours in period ======
-    work_entries = WorkEntry.objects.filter(**work_filter)
-    work_summary = work_entries.aggregate(
-        total_hours=Sum("hours"),
-        total_amount=Sum("amount"),
-    )
-    hours_total = work_summary["total_hours"] or Decimal("0.00")
-    hours_amount_total = work_summary["total_amount"] or Decimal("0.00")
-
-    # ====== Mileage in period ======
-    mileage_entries = MileageEntry.objects.filter(**mileage_filter)
-    mileage_summary = mileage_entries.aggregate(
-        total_miles=Sum("miles"),
-        total_amount=Sum("amount"),
-    )
-    miles_total = mileage_summary["total_miles"] or Decimal("0.00")
-    mileage_amount_total = mileage_summary["total_amount"] or Decimal("0.00")
-
-    # Grand total reimbursement (hours + mileage)
-    grand_total_reimbursement = (
-        hours_amount_total + mileage_amount_total
-    ).quantize(Decimal("0.01"))
+    work_entries = WorkEntry.objects.filter(date__gte=period_start, date__lt=period_end)
+    mileage_entries = MileageEntry.objects.filter(date__gte=period_start, date__lt=period_end)
 
     context = {
         "today": today,
@@ -597,72 +490,95 @@ def monthly_summary(request):
 
         # Payments
         "payments": payments.order_by("-date_paid", "bill__name"),
-        "payments_total": payments_total,
-        "payments_count": payments_count,
-        "totals_by_account": totals_by_account,
-        "totals_by_type": totals_by_type,
+        "payments_total": summary.payments_total,
+        "payments_count": summary.payments_count,
+        "totals_by_account": summary.totals_by_account,
+        "totals_by_type": summary.totals_by_type,
 
         # Hours
         "work_entries": work_entries.order_by("-date"),
-        "hours_total": hours_total,
-        "hours_amount_total": hours_amount_total,
+        "hours_total": summary.hours_total,
+        "hours_amount_total": summary.hours_amount_total,
 
         # Mileage
         "mileage_entries": mileage_entries.order_by("-date"),
-        "miles_total": miles_total,
-        "mileage_amount_total": mileage_amount_total,
+        "miles_total": summary.miles_total,
+        "mileage_amount_total": summary.mileage_amount_total,
 
         # Combined
-        "grand_total_reimbursement": grand_total_reimbursement,
+        "grand_total_reimbursement": summary.grand_total_reimbursement,
     }
     return render(request, "john/monthly_summary.html", context)
 
 
-def export_john_data(request):
+def summary_history(request):
     """
-    Export all John app data to JSON format for PostgreSQL import.
+    Month-by-month totals for the last ?months= months (default 24), built from
+    stored period summaries; only months without one are recomputed.
     """
-    from django.core.serializers import serialize
-    from datetime import datetime
-    
-    data = {
-        'accounts': json.loads(serialize('json', Account.objects.all())),
-        'bills': json.loads(serialize('json', Bill.objects.all())),
-        'bill_payments': json.loads(serialize('json', BillPayment.objects.all())),
-        'work_entries': json.loads(serialize('json', WorkEntry.objects.all())),
-        'mileage_entries': json.loads(serialize('json', MileageEntry.objects.all())),
+    try:
+        months = max(1, min(int(request.GET.get("months", 24)), 120))
+    except ValueError:
+        months = 24
+    history = monthly_history(months)
+
+    totals = {
+        field: sum(getattr(row, field) for row in history)
+        for field in (
+            "payments_total",
+            "hours_total",
+            "hours_amount_total",
+            "miles_total",
+            "mileage_amount_total",
+            "grand_total_reimbursement",
+        )
     }
-    
-    response = JsonResponse(data, json_dumps_params={'indent': 2})
-    response['Content-Disposition'] = f'attachment; filename="john_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
+    context = {
+        "months": months,
+        "history": history,
+        "totals": totals,
+    }
+    return render(request, "john/summary_history.html", context)
+
+
+def _export_response(names, request, filename):
+    """
+    Stream the given models as NDJSON (one loaddata-ready object per line),
+    gzipped with ?gzip=1. ?since=YYYY-MM-DD[THH:MM] limits it to rows
+    updated since then, for incremental exports.
+    """
+    try:
+        since = parse_since(request.GET.get("since"))
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    lines = export_lines(names, since)
+    stamp = timezone.now().strftime("%Y%m%d_%H%M%S")
+    if request.GET.get("gzip"):
+        response = StreamingHttpResponse(gzip_chunks(lines), content_type="application/gzip")
+        response["Content-Disposition"] = f'attachment; filename="{filename}_{stamp}.jsonl.gz"'
+    else:
+        response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="{filename}_{stamp}.jsonl"'
     return response
 
 
+def export_john_data(request):
+    """
+    Export all John app data (restore with `manage.py loaddata <file>`).
+    """
+    return _export_response(EXPORT_MODELS, request, "john_data")
+
+
 def export_work_entries_json(request):
     """
-    Export only work entries to JSON.
+    Export only work entries.
     """
-    from django.core.serializers import serialize
-    from datetime import datetime
-    
-    entries = WorkEntry.objects.all().order_by('-date')
-    data = json.loads(serialize('json', entries))
-    
-    response = JsonResponse(data, safe=False, json_dumps_params={'indent': 2})
-    response['Content-Disposition'] = f'attachment; filename="work_entries_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-    return response
+    return _export_response(["work_entries"], request, "work_entries")
 
 
 def export_mileage_entries_json(request):
     """
-    Export only mileage entries to JSON.
+    Export only mileage entries.
     """
-    from django.core.serializers import serialize
-    from datetime import datetime
-    
-    entries = MileageEntry.objects.all().order_by('-date')
-    data = json.loads(serialize('json', entries))
-    
-    response = JsonResponse(data, safe=False, json_dumps_params={'indent': 2})
-    response['Content-Disposition'] = f'attachment; filename="mileage_entries_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json"'
-    return response
+    return _export_response(["mileage_entries"], request, "mileage_entries")
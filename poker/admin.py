@@ -1,7 +1,7 @@
 # poker_session/admin.py
 from django.contrib import admin
-from .models import PokerSession, Casino, PlayerTag, PlayerProfile, PlayerTendency,\
-    PlayerObservation, ExploitTag, PlayerExploit
+from .models import PokerSession, PokerMonthlyRollup, Casino, PlayerTag, PlayerProfile, PlayerTendency,\
+    PlayerObservation, ExploitTag, PlayerExploit, SyncedEvent
 
 @admin.register(PokerSession)
 class PokerSessionAdmin(admin.ModelAdmin):
@@ -11,6 +11,12 @@ class PokerSessionAdmin(admin.ModelAdmin):
     date_hierarchy = 'date'
     ordering = [ 'date']
 
+@admin.register(PokerMonthlyRollup)
+class PokerMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['player', 'month', 'stakes', 'casino', 'profit', 'hours', 'session_count']
+    list_filter = ['player', 'stakes', 'casino']
+    date_hierarchy = 'month'
+
 @admin.register(Casino)
 class CasinoAdmin(admin.ModelAdmin):
     list_display = ['name']
@@ -30,7 +36,7 @@ class PlayerObservationInline(admin.TabularInline):
     
 @admin.register(PlayerProfile)
 class PlayerProfileAdmin(admin.ModelAdmin):
-    list_display = ("display_name", "approximate_age", "summary")
+    list_display = ("display_name", "approximate_age", "summary", "read_score")
     search_fields = ("display_name", "summary", "description", "tags__name")
     list_filter = ("tags",)
 
@@ -44,7 +50,7 @@ class PlayerObservationAdmin(admin.ModelAdmin):
 
 @admin.register(PlayerTendency)
 class PlayerTendencyAdmin(admin.ModelAdmin):
-    list_display = ("player", "metric", "street", "value", "sample_size", "confidence", "updated")
+    list_display = ("player", "metric", "street", "value", "sample_size", "confidence", "score", "updated")
     search_fields = ("player__display_name", "metric", "note")
     list_filter = ("metric", "street", "confidence")
 
@@ -59,6 +65,13 @@ class ExploitTagAdmin(admin.ModelAdmin):
 
 @admin.register(PlayerExploit)
 class PlayerExploitAdmin(admin.ModelAdmin):
-    list_display = ("player", "tag", "strength", "confidence", "updated")
+    list_display = ("player", "tag", "strength", "confidence", "score", "updated")
     search_fields = ("player__display_name", "tag__name", "note")
-    list_filter = ("confidence",)
\ No newline at end of file
+    list_filter = ("confidence",)
+
+
+@admin.register(SyncedEvent)
+class SyncedEventAdmin(admin.ModelAdmin):
+    list_display = ("key", "user", "kind", "batch", "created")
+    list_filter = ("kind", "user")
+    search_fields = ("key", "user__username")
@@ -0,0 +1,336 @@
+import hashlib
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PokerSession
+from .rollups import data_version
+
+
+# Upper bound on points sent per chart series; override with POKER_CHART_MAX_POINTS.
+DEFAULT_MAX_POINTS = 1000
+
+
+def max_chart_points():
+    return getattr(settings, 'POKER_CHART_MAX_POINTS', DEFAULT_MAX_POINTS)
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[s]').astype(np.int64).astype(float)
+    if values.dtype == object and len(values) and hasattr(values[0], 'toordinal'):
+        return np.fromiter((v.toordinal() for v in values), dtype=float, count=len(values))
+    return values.astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of the `threshold` points that best
+    preserve the visual shape of (x, y). The first and last points are always
+    kept; every bucket in between keeps the point forming the largest triangle
+    with the previously kept point and the next bucket's average, which is what
+    keeps spikes (big wins) and dips (big losses) on screen.
+
+    The bucket averages and per-bucket triangle areas are NumPy array ops; the
+    only Python loop is over the output buckets, not the input points.
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 buckets covering the points between first and last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # The "next bucket" of the final bucket is the last point itself
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, threshold):
+    """
+    Keep the minimum and maximum of each bucket (plus both endpoints).
+    Fully vectorised and guarantees every local peak and trough survives.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = max(1, (threshold - 2) // 2)
+    bucket_id = np.arange(n) * buckets // n
+    # Sort by (bucket, value): the first row of each bucket is its min, the last its max
+    order = np.lexsort((y, bucket_id))
+    sorted_buckets = bucket_id[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    keep = np.concatenate(([0, n - 1], order[starts], order[ends]))
+    return np.unique(keep)
+
+
+def downsample(x, y, threshold=None, method='lttb'):
+    """
+    Reduce a series to at most `threshold` points (default: max_chart_points()).
+    Returns (x, y) as lists in the original order.
+    """
+    threshold = threshold or max_chart_points()
+    if method == 'minmax':
+        keep = minmax_indices(y, threshold)
+    else:
+        keep = lttb_indices(x, y, threshold)
+    x = np.asarray(x)
+    y = np.asarray(y)
+    return x[keep].tolist(), y[keep].tolist()
+
+
+# --- Bankroll analytics ---
+
+BANKROLL_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+ROLLING_WINDOW = 20
+BOOTSTRAP_SAMPLES = 2000
+# Max resampled cells (samples x sessions) held in memory per bootstrap chunk
+BOOTSTRAP_CHUNK_CELLS = 2_000_000
+
+
+def filtered_sessions(player, filters):
+    """A player's sessions narrowed by the chart_filters() start/end/stakes."""
+    sessions = PokerSession.objects.filter(player=player)
+    if filters.get('start'):
+        sessions = sessions.filter(date__gte=filters['start'])
+    if filters.get('end'):
+        sessions = sessions.filter(date__lte=filters['end'])
+    if filters.get('stakes'):
+        sessions = sessions.filter(stakes=filters['stakes'])
+    return sessions
+
+
+def session_arrays(sessions):
+    """
+    Pull (date, hours, buy_in, cash_out) for a PokerSession queryset with one
+    values_list query and return NumPy arrays in chronological order.
+    """
+    rows = list(sessions.order_by('date', 'id').values_list('date', 'hours', 'buy_in', 'cash_out'))
+    if not rows:
+        return {
+            'dates': np.array([], dtype='datetime64[D]'),
+            'hours': np.array([], dtype=float),
+            'profit': np.array([], dtype=float),
+        }
+    dates, hours, buy_in, cash_out = zip(*rows)
+    return {
+        'dates': np.array(dates, dtype='datetime64[D]'),
+        'hours': np.array(hours, dtype=float),
+        'profit': np.array(cash_out, dtype=float) - np.array(buy_in, dtype=float),
+    }
+
+
+def cumulative_bankroll(profit):
+    return np.cumsum(profit)
+
+
+def max_drawdown(cumulative):
+    """
+    Largest peak-to-trough drop of the running bankroll.
+    Returns (amount, peak_index, trough_index); indices are None when flat.
+    The starting bankroll (0 before the first session) counts as a peak.
+    """
+    if len(cumulative) == 0:
+        return 0.0, None, None
+    curve = np.r_[0.0, cumulative]
+    peaks = np.maximum.accumulate(curve)
+    drawdowns = peaks - curve
+    trough = int(np.argmax(drawdowns))
+    amount = float(drawdowns[trough])
+    if amount == 0:
+        return 0.0, None, None
+    peak = int(np.argmax(curve[:trough + 1]))
+    # Shift back to session indices (index 0 of curve is the pre-session start)
+    return amount, max(peak - 1, 0), trough - 1
+
+
+def rolling_hourly_rate(profit, hours, window=ROLLING_WINDOW):
+    """
+    Win rate per hour over the trailing `window` sessions (fewer at the start).
+    """
+    if len(profit) == 0:
+        return np.array([], dtype=float)
+    profit_cs = np.r_[0.0, np.cumsum(profit)]
+    hours_cs = np.r_[0.0, np.cumsum(hours)]
+    end = np.arange(1, len(profit) + 1)
+    start = np.maximum(end - window, 0)
+    window_hours = hours_cs[end] - hours_cs[start]
+    window_profit = profit_cs[end] - profit_cs[start]
+    return np.divide(window_profit, window_hours, out=np.zeros_like(window_profit), where=window_hours > 0)
+
+
+def stdev_per_hour(profit, hours):
+    """
+    Hour-weighted standard deviation of results per hour: each session's
+    deviation from the overall win rate is scaled by its length, the usual
+    way poker trackers report SD/hr.
+    """
+    played = hours > 0
+    profit, hours = profit[played], hours[played]
+    if len(profit) < 2:
+        return 0.0
+    win_rate = profit.sum() / hours.sum()
+    variance = np.sum((profit - win_rate * hours) ** 2 / hours) / (len(profit) - 1)
+    return float(np.sqrt(variance))
+
+
+def bootstrap_win_rate_ci(profit, hours, samples=BOOTSTRAP_SAMPLES, confidence=0.95, seed=None):
+    """
+    Bootstrap confidence interval for the hourly win rate: resample whole
+    sessions with replacement, recompute total profit / total hours per
+    resample, take percentiles. Resampling is done in array chunks so memory
+    stays bounded for long histories.
+    """
+    played = hours > 0
+    profit, hours = profit[played], hours[played]
+    n = len(profit)
+    if n < 2:
+        return None, None
+
+    rng = np.random.default_rng(seed)
+    rates = np.empty(samples)
+    chunk = max(1, BOOTSTRAP_CHUNK_CELLS // n)
+    for lo in range(0, samples, chunk):
+        hi = min(lo + chunk, samples)
+        idx = rng.integers(0, n, size=(hi - lo, n))
+        rates[lo:hi] = profit[idx].sum(axis=1) / hours[idx].sum(axis=1)
+
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(rates, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def bankroll_stats(arrays, window=ROLLING_WINDOW, seed=0):
+    profit, hours, dates = arrays['profit'], arrays['hours'], arrays['dates']
+    cumulative = cumulative_bankroll(profit)
+    total_hours = float(hours.sum())
+    total_profit = float(profit.sum())
+    drawdown, peak, trough = max_drawdown(cumulative)
+    ci_low, ci_high = bootstrap_win_rate_ci(profit, hours, seed=seed)
+    return {
+        'sessions': int(len(profit)),
+        'total_profit': total_profit,
+        'total_hours': total_hours,
+        'win_rate': total_profit / total_hours if total_hours > 0 else 0.0,
+        'stdev_per_hour': stdev_per_hour(profit, hours),
+        'win_rate_ci_low': ci_low,
+        'win_rate_ci_high': ci_high,
+        'max_drawdown': drawdown,
+        'max_drawdown_start': dates[peak].item() if peak is not None else None,
+        'max_drawdown_end': dates[trough].item() if trough is not None else None,
+        'cumulative': cumulative,
+        'rolling_win_rate': rolling_hourly_rate(profit, hours, window),
+        'dates': dates,
+    }
+
+
+def bankroll_summary(player, filters=None):
+    """
+    bankroll_stats for a player's sessions, narrowed by the same start/end/stakes
+    filters as the chart beside it, cached per filters and data version so it
+    is computed once per change to their sessions.
+    """
+    scope = {name: (filters or {}).get(name) or '' for name in ('start', 'end', 'stakes')}
+    digest = hashlib.md5(json.dumps(scope, sort_keys=True).encode()).hexdigest()
+    key = f"poker:bankroll:{player.pk}:{digest}:{data_version(player)}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = bankroll_stats(session_arrays(filtered_sessions(player, scope)))
+        cache.set(key, stats, BANKROLL_CACHE_TIMEOUT)
+    return stats
+
+
+# --- Monte Carlo bankroll simulation ---
+
+# Cells (paths x sessions_ahead) simulated per array chunk; a handful of
+# int64/float64 arrays of this size are alive at once, so keep it well under
+# the worker's memory whatever sessions_ahead the form allowed
+SIMULATION_CHUNK_CELLS = 2_000_000
+BAND_CHECKPOINTS = 100
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def simulate_bankroll(profit, hours, starting_bankroll, target_bankroll, sessions_ahead, paths, seed=None):
+    """
+    Resample real session results (with replacement) into `paths` futures of
+    `sessions_ahead` sessions each. A path that hits zero is ruined and stays
+    there. Returns risk of ruin, the distribution of sessions needed to reach
+    the target, and percentile bands of the bankroll over time.
+    """
+    profit = np.asarray(profit, dtype=float)
+    hours = np.asarray(hours, dtype=float)
+    n = len(profit)
+    if n == 0:
+        raise ValueError("No sessions to resample.")
+
+    rng = np.random.default_rng(seed)
+    checkpoints = np.unique(np.linspace(0, sessions_ahead - 1, min(BAND_CHECKPOINTS, sessions_ahead)).astype(np.int64))
+    band_samples = np.empty((paths, len(checkpoints)), dtype=np.float32)
+    ruined_at = np.full(paths, -1, dtype=np.int64)
+    target_at = np.full(paths, -1, dtype=np.int64)
+    final = np.empty(paths, dtype=np.float32)
+
+    chunk = max(1, SIMULATION_CHUNK_CELLS // sessions_ahead)
+    for lo in range(0, paths, chunk):
+        hi = min(lo + chunk, paths)
+        idx = rng.integers(0, n, size=(hi - lo, sessions_ahead))
+        bank = starting_bankroll + np.cumsum(profit[idx], axis=1)
+
+        broke = bank <= 0
+        any_broke = broke.any(axis=1)
+        first_broke = np.where(any_broke, broke.argmax(axis=1), -1)
+        hit = bank >= target_bankroll
+        any_hit = hit.any(axis=1)
+        first_hit = np.where(any_hit, hit.argmax(axis=1), -1)
+        # Reaching the target only counts if it happened before going broke
+        first_hit = np.where(any_broke & (first_hit > first_broke), -1, first_hit)
+
+        bank = np.where(np.maximum.accumulate(broke, axis=1), 0, bank)
+        band_samples[lo:hi] = bank[:, checkpoints]
+        final[lo:hi] = bank[:, -1]
+        ruined_at[lo:hi] = first_broke
+        target_at[lo:hi] = first_hit
+
+    reached = target_at[target_at >= 0] + 1
+    bands = np.percentile(band_samples, BAND_PERCENTILES, axis=0)
+    hours_per_session = float(hours.mean()) if len(hours) else 0.0
+
+    return {
+        'paths': int(paths),
+        'sessions_ahead': int(sessions_ahead),
+        'sample_size': int(n),
+        'mean_profit': float(profit.mean()),
+        'hours_per_session': hours_per_session,
+        'risk_of_ruin': float((ruined_at >= 0).mean()),
+        'target_probability': float(len(reached) / paths),
+        'sessions_to_target': {
+            str(p): float(np.percentile(reached, p)) for p in BAND_PERCENTILES
+        } if len(reached) else {},
+        'final_bankroll': {str(p): float(v) for p, v in zip(BAND_PERCENTILES, np.percentile(final, BAND_PERCENTILES))},
+        'bands': {
+            'session': (checkpoints + 1).tolist(),
+            **{str(p): row.round(2).tolist() for p, row in zip(BAND_PERCENTILES, bands)},
+        },
+    }
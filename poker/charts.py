@@ -0,0 +1,128 @@
+import hashlib
+import json
+from datetime import date
+
+from django.core.cache import cache
+from plotly import graph_objs as go
+
+from .analytics import bankroll_stats, downsample, filtered_sessions, session_arrays
+from .fields import STAKES_CHOICES
+from .rollups import data_version
+
+
+CHART_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def style_figure(fig, title, yaxis_title='Win/Loss'):
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title=yaxis_title,
+    )
+    fig.update_xaxes(tickangle=45, tickfont=dict(family='Rockwell', color='green', size=14))
+    fig.update_layout(title={
+        'font_size': 22,
+        'xanchor': 'center',
+
+        'x': 0.5
+    })
+    fig.update_layout(
+        autosize=True)
+    return fig
+
+
+def _iso_date(value):
+    try:
+        return date.fromisoformat(value).isoformat() if value else ''
+    except ValueError:
+        return ''
+
+
+def chart_filters(params, default_stakes=None):
+    """
+    Normalise the start/end/stakes query params shared by every session chart.
+    full=1 skips downsampling (full-resolution export).
+    """
+    return {
+        'start': _iso_date(params.get('start')),
+        'end': _iso_date(params.get('end')),
+        'stakes': params.get('stakes') or default_stakes or '',
+        'full': params.get('full') in ('1', 'true', 'yes'),
+    }
+
+
+def win_loss_figure(player, filters):
+    rows = filtered_sessions(player, filters).order_by('date', 'id').values_list('date', 'buy_in', 'cash_out')
+    dates = [day for day, _, _ in rows]
+    win_losses = [cash_out - buy_in for _, buy_in, cash_out in rows]
+    if not filters['full']:
+        dates, win_losses = downsample(dates, win_losses)
+
+    if filters['stakes']:
+        title = f"{dict(STAKES_CHOICES).get(filters['stakes'], filters['stakes'])} Chart"
+    else:
+        title = 'Overall Stats'
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=win_losses,
+        mode='lines+markers',
+        name='Win/Loss'
+    ))
+    return style_figure(fig, title)
+
+
+def cumulative_figure(player, filters):
+    stats = bankroll_stats(session_arrays(filtered_sessions(player, filters)))
+    dates = stats['dates'].tolist()
+    cumulative = stats['cumulative'].tolist()
+    rolling = stats['rolling_win_rate'].tolist()
+    if not filters['full']:
+        rolling_dates, rolling = downsample(dates, rolling)
+        dates, cumulative = downsample(dates, cumulative)
+    else:
+        rolling_dates = dates
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dates,
+        y=cumulative,
+        mode='lines',
+        name='Total Win/Loss'
+    ))
+    fig.add_trace(go.Scatter(
+        x=rolling_dates,
+        y=rolling,
+        mode='lines',
+        name='Rolling $/hr',
+        yaxis='y2',
+        line=dict(dash='dot'),
+    ))
+    fig.update_layout(yaxis2=dict(title='$/hr', overlaying='y', side='right'))
+    return style_figure(fig, 'Win Loss Over Time', yaxis_title='Total Win/Loss')
+
+
+CHART_BUILDERS = {
+    'win_loss': win_loss_figure,
+    'cumulative': cumulative_figure,
+}
+
+
+def chart_cache_key(player, name, filters):
+    digest = hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return f"poker:chart:{player.pk}:{name}:{digest}:{data_version(player)}"
+
+
+def chart_json(player, name, filters):
+    """
+    Plotly figure JSON for one chart, cached per (user, chart, filters, data version).
+    Returns (cache_key, payload); the key doubles as an ETag because it changes
+    whenever the underlying sessions do.
+    """
+    key = chart_cache_key(player, name, filters)
+    payload = cache.get(key)
+    if payload is None:
+        payload = CHART_BUILDERS[name](player, filters).to_json()
+        cache.set(key, payload, CHART_CACHE_TIMEOUT)
+    return key, payload
@@ -0,0 +1,77 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from hands.models import Hands
+
+from .models import PokerSession
+
+# Rows fetched per database round trip; memory use is bounded by this, not by table size
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+SESSION_FIELDS = (
+    'id', 'date', 'stakes', 'casino_id', 'casino__name',
+    'hours', 'buy_in', 'cash_out', 'notes', 'created', 'updated',
+)
+
+
+def _session_rows(player):
+    return PokerSession.objects.filter(player=player).order_by('date', 'id').values(*SESSION_FIELDS)
+
+
+def _hand_fields():
+    return tuple(field.attname for field in Hands._meta.concrete_fields if field.attname != 'hero_id')
+
+
+def _hand_rows(player):
+    return Hands.objects.filter(hero=player).order_by('session_id', 'id').values(*_hand_fields())
+
+
+EXPORTS = {
+    'sessions': (_session_rows, lambda: SESSION_FIELDS),
+    'hands': (_hand_rows, _hand_fields),
+}
+
+
+class Echo:
+    """csv.writer target that hands each formatted line straight back."""
+    def write(self, value):
+        return value
+
+
+def export_fields(name):
+    return EXPORTS[name][1]()
+
+
+def export_rows(name, player):
+    """
+    Lazily yield one dict per row. values() skips model instantiation and
+    iterator() streams in chunks instead of caching the whole queryset.
+    """
+    queryset, _ = EXPORTS[name]
+    return queryset(player).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_lines(name, player, fmt):
+    rows = export_rows(name, player)
+    if fmt == 'csv':
+        return csv_lines(rows, export_fields(name))
+    return ndjson_lines(rows)
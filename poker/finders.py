@@ -0,0 +1,35 @@
+import os
+
+import plotly
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+
+
+PLOTLY_JS_NAME = 'poker/plotly.min.js'
+PLOTLY_PACKAGE_DATA = os.path.join(os.path.dirname(plotly.__file__), 'package_data')
+
+
+class PlotlyJSFinder(BaseFinder):
+    """
+    Expose the plotly.js bundle that ships with the installed plotly package as
+    the static file poker/plotly.min.js, so collectstatic fingerprints it like
+    any other asset and the JS always matches the Python plotly version.
+    Only that one file is exposed (package_data also holds datasets and widgets).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.storage = FileSystemStorage(location=PLOTLY_PACKAGE_DATA)
+        self.storage.prefix = 'poker'
+
+    def find(self, path, all=False):
+        if path != PLOTLY_JS_NAME:
+            return [] if all else None
+        match = os.path.join(PLOTLY_PACKAGE_DATA, 'plotly.min.js')
+        return [match] if all else match
+
+    def list(self, ignore_patterns):
+        yield 'plotly.min.js', self.storage
+
+    def check(self, **kwargs):
+        return []
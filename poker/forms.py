@@ -1,6 +1,6 @@
 # app_name/forms.py
 from django import forms
-from .models import PokerSession, PlayerProfile, PlayerTendency, PlayerExploit
+from .models import PokerSession, PlayerProfile, PlayerTendency, PlayerExploit, BankrollSimulation
 from datetime import date
 from .fields import STAKES_CHOICES
 
@@ -18,6 +18,41 @@ class DateForm(forms.Form):
     stakes = forms.TypedChoiceField(choices=STAKES_CHOICES)
 
 
+class SessionImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV, NDJSON or JSON with date, stakes, casino, hours, buy_in, cash_out (notes optional).")
+    format = forms.ChoiceField(
+        choices=[('', 'From file extension'), ('csv', 'CSV'), ('ndjson', 'NDJSON'), ('json', 'JSON')],
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('file')
+        if upload and not cleaned_data.get('format'):
+            extension = upload.name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'ndjson', 'json'):
+                self.add_error('format', "Can't tell the file format, pick one.")
+            cleaned_data['format'] = extension
+        return cleaned_data
+
+
+class BankrollSimulationForm(forms.ModelForm):
+    sessions_ahead = forms.IntegerField(min_value=1, max_value=5000, initial=500)
+    paths = forms.IntegerField(min_value=1000, max_value=200000, initial=100000)
+
+    class Meta:
+        model = BankrollSimulation
+        fields = ['stakes', 'starting_bankroll', 'target_bankroll', 'sessions_ahead', 'paths']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('starting_bankroll')
+        target = cleaned_data.get('target_bankroll')
+        if start is not None and target is not None and target <= start:
+            self.add_error('target_bankroll', "Target must be above the starting bankroll.")
+        return cleaned_data
+
+
 
 from django import forms
 from .models import (
@@ -0,0 +1,176 @@
+import csv
+import hashlib
+import json
+from datetime import date
+
+from django.db import transaction
+
+from .fields import STAKES_CHOICES
+from .models import Casino, PokerSession
+from .rollups import month_start, rebuild_rollups, refresh_bucket
+
+IMPORT_BATCH_SIZE = 1000
+# Past this many touched rollup buckets one grouped rebuild beats per-bucket refreshes
+REFRESH_BUCKET_LIMIT = 50
+
+# Accept either the stored code ("25") or the label ("2/5")
+STAKES_LOOKUP = {**{label: code for code, label in STAKES_CHOICES}, **{code: code for code, _ in STAKES_CHOICES}}
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def session_hash(player_id, day, casino_id, buy_in, cash_out):
+    return hashlib.sha1(f"{player_id}|{day.isoformat()}|{casino_id}|{buy_in}|{cash_out}".encode()).hexdigest()
+
+
+def read_rows(handle, fmt):
+    """
+    Yield dict rows from a text stream without loading it all. CSV and NDJSON
+    are read line by line; a plain JSON array has to be parsed in one go.
+    A line that doesn't decode is yielded as an ImportRowError so the import
+    can count it and carry on; a file that can't be read any further (bad
+    encoding, broken JSON array) ends with one.
+    """
+    if fmt not in ('csv', 'ndjson', 'json'):
+        raise ValueError(f"Unknown import format '{fmt}'")
+    try:
+        if fmt == 'csv':
+            yield from csv.DictReader(handle)
+        elif fmt == 'ndjson':
+            for line in handle:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as exc:
+                        yield ImportRowError(f"bad JSON: {exc.msg}")
+        else:
+            rows = json.load(handle)
+            if not isinstance(rows, list):
+                yield ImportRowError("expected a JSON array of rows")
+                return
+            yield from rows
+    except UnicodeDecodeError:
+        yield ImportRowError("file is not UTF-8 text; stopped reading")
+    except json.JSONDecodeError as exc:
+        yield ImportRowError(f"bad JSON: {exc.msg}; stopped reading")
+    except csv.Error as exc:
+        yield ImportRowError(f"bad CSV: {exc}; stopped reading")
+
+
+def _int(row, field, default=None):
+    value = row.get(field)
+    if value in (None, ''):
+        if default is not None:
+            return default
+        raise ImportRowError(f"missing {field}")
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        raise ImportRowError(f"bad {field} '{value}'")
+
+
+class CasinoMap:
+    """name -> id lookup loaded once; unknown casinos are created on first sight."""
+    def __init__(self):
+        self.ids = {}
+        for pk, name in Casino.objects.order_by('id').values_list('id', 'name'):
+            # Duplicate names resolve to the oldest casino
+            self.ids.setdefault(name.strip().lower(), pk)
+
+    def resolve(self, name):
+        name = str(name or '').strip()
+        key = name.lower()
+        if not key:
+            raise ImportRowError("missing casino")
+        if key not in self.ids:
+            self.ids[key] = Casino.objects.create(name=name).pk
+        return self.ids[key]
+
+
+def parse_session(row, player, casinos):
+    if isinstance(row, ImportRowError):
+        raise row
+    if not isinstance(row, dict):
+        raise ImportRowError("expected an object with date, stakes, casino, hours, buy_in and cash_out")
+    try:
+        day = date.fromisoformat(str(row.get('date', '')).strip()[:10])
+    except ValueError:
+        raise ImportRowError(f"bad date '{row.get('date')}'")
+    stakes = STAKES_LOOKUP.get(str(row.get('stakes', '')).strip())
+    if stakes is None:
+        raise ImportRowError(f"unknown stakes '{row.get('stakes')}'")
+    hours = _int(row, 'hours', default=0)
+    buy_in = _int(row, 'buy_in')
+    cash_out = _int(row, 'cash_out')
+    return PokerSession(
+        player=player,
+        # Resolved last: an unknown casino is created, so only do it for a valid row
+        casino_id=casinos.resolve(row.get('casino') or row.get('casino__name')),
+        stakes=stakes,
+        date=day,
+        hours=hours,
+        buy_in=buy_in,
+        cash_out=cash_out,
+        notes=row.get('notes') or None,
+    )
+
+
+def import_sessions(player, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Insert parsed rows for `player` with bulk_create, one transaction per batch.
+
+    Rows whose (player, date, casino, buy_in, cash_out) hash matches an existing
+    session - or one earlier in the same file - are skipped, so re-running an
+    import is harmless. bulk_create skips the rollup signals, so the touched
+    rollup buckets are refreshed once at the end instead (or the player's
+    rollups rebuilt in one pass for a big import).
+    Returns a dict of created/duplicates/errors counts plus the first few error messages.
+    """
+    casinos = CasinoMap()
+    seen = {
+        session_hash(player.pk, *values)
+        for values in PokerSession.objects.filter(player=player)
+        .values_list('date', 'casino_id', 'buy_in', 'cash_out').iterator(chunk_size=5000)
+    }
+    result = {'created': 0, 'duplicates': 0, 'errors': 0, 'messages': []}
+    buckets = set()
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            PokerSession.objects.bulk_create(batch)
+        result['created'] += len(batch)
+        batch.clear()
+
+    try:
+        for line, row in enumerate(rows, start=1):
+            try:
+                session = parse_session(row, player, casinos)
+            except ImportRowError as exc:
+                result['errors'] += 1
+                if len(result['messages']) < 20:
+                    result['messages'].append(f"Row {line}: {exc}")
+                continue
+
+            key = session_hash(player.pk, session.date, session.casino_id, session.buy_in, session.cash_out)
+            if key in seen:
+                result['duplicates'] += 1
+                continue
+            seen.add(key)
+            buckets.add((player.pk, month_start(session.date), session.stakes, session.casino_id))
+            batch.append(session)
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+    finally:
+        # Batches already committed must reach the rollups even if a later one failed
+        if len(buckets) > REFRESH_BUCKET_LIMIT:
+            rebuild_rollups(player=player)
+        else:
+            for bucket in buckets:
+                refresh_bucket(*bucket)
+    return result
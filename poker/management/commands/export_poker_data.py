@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from poker.exports import EXPORTS, EXPORT_FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Stream a player\'s poker sessions or hands to a CSV/NDJSON file (or stdout)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument('--user', type=str, required=True, help='Username to export')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Output format (default: csv)')
+        parser.add_argument('--output', type=str, help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            player = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        lines = export_lines(options['dataset'], player, options['format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+            for line in lines:
+                handle.write(line)
+                count += 1
+        if options['format'] == 'csv':
+            count -= 1  # header row
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} {options['dataset']} rows to {options['output']}"))
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from poker.imports import IMPORT_BATCH_SIZE, import_sessions, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import poker sessions from a CSV, NDJSON or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import (columns: date, stakes, casino, hours, buy_in, cash_out, notes)')
+        parser.add_argument('--user', type=str, required=True, help='Username the sessions belong to')
+        parser.add_argument('--format', choices=['csv', 'ndjson', 'json'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            player = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        fmt = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if fmt not in ('csv', 'ndjson', 'json'):
+            raise CommandError(f"Can't tell the format of '{options['path']}', pass --format")
+
+        with open(options['path'], newline='', encoding='utf-8-sig') as handle:
+            result = import_sessions(player, read_rows(handle, fmt), batch_size=options['batch_size'])
+
+        for message in result['messages']:
+            self.stderr.write(message)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} sessions "
+            f"({result['duplicates']} duplicates skipped, {result['errors']} bad rows)"
+        ))
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from poker.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the PokerMonthlyRollup table from PokerSession rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Only rebuild rollups for this username (default: everyone)',
+        )
+
+    def handle(self, *args, **options):
+        player = None
+        if options['user']:
+            try:
+                player = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.stdout.write('Rebuilding poker monthly rollups...')
+        count = rebuild_rollups(player=player)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} rollup rows'))
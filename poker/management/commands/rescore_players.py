@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from poker.scoring import RESCORE_CHUNK_SIZE, rescore_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute decayed read-strength scores for every player profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=RESCORE_CHUNK_SIZE,
+            help=f'Players scored per batch (default: {RESCORE_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rescoring player reads...')
+        count = rescore_all(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rescored {count} players'))
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    from django.db.models import Count, F, Sum
+    from django.db.models.functions import TruncMonth
+
+    PokerSession = apps.get_model('poker', 'PokerSession')
+    PokerMonthlyRollup = apps.get_model('poker', 'PokerMonthlyRollup')
+
+    rows = PokerSession.objects.annotate(
+        month=TruncMonth('date')
+    ).values('player_id', 'month', 'stakes', 'casino_id').annotate(
+        profit=Sum(F('cash_out') - F('buy_in')),
+        total_hours=Sum('hours'),
+        session_count=Count('id'),
+    ).order_by()
+
+    PokerMonthlyRollup.objects.bulk_create(
+        [
+            PokerMonthlyRollup(
+                player_id=row['player_id'],
+                month=row['month'],
+                stakes=row['stakes'],
+                casino_id=row['casino_id'],
+                profit=row['profit'] or 0,
+                hours=row['total_hours'] or 0,
+                session_count=row['session_count'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('poker', '0003_create_exploit_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PokerMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month.')),
+                ('stakes', models.CharField(choices=[('00', 'All'), ('12', '1/2'), ('13', '1/3'), ('23', '2/3'), ('25', '2/5'), ('55', '5/5'), ('510', '5/10'), ('2040', '20/40')], max_length=20)),
+                ('profit', models.IntegerField(default=0)),
+                ('hours', models.IntegerField(default=0)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('casino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='poker.casino')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='poker_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pokermonthlyrollup',
+            constraint=models.UniqueConstraint(fields=('player', 'month', 'stakes', 'casino'), name='uniq_rollup_bucket'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker', '0004_pokermonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pokersession',
+            index=models.Index(fields=['player', 'date'], name='poker_session_player_date'),
+        ),
+        migrations.AddIndex(
+            model_name='pokersession',
+            index=models.Index(fields=['player', 'stakes', 'date'], name='poker_session_player_stakes'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('poker', '0005_date_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankrollSimulation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stakes', models.CharField(blank=True, choices=[('00', 'All'), ('12', '1/2'), ('13', '1/3'), ('23', '2/3'), ('25', '2/5'), ('55', '5/5'), ('510', '5/10'), ('2040', '20/40')], help_text='Blank = all stakes.', max_length=20)),
+                ('starting_bankroll', models.PositiveIntegerField()),
+                ('target_bankroll', models.PositiveIntegerField()),
+                ('sessions_ahead', models.PositiveIntegerField(default=500, help_text='How many future sessions to simulate.')),
+                ('paths', models.PositiveIntegerField(default=100000)),
+                ('sample_size', models.PositiveIntegerField(default=0, help_text='Real sessions resampled.')),
+                ('input_hash', models.CharField(max_length=64, unique=True)),
+                ('inputs', models.JSONField(default=dict, editable=False, help_text='Resampled session profit and hours.')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('dispatched', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bankroll_simulations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:25
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# GIN indexes only exist on Postgres; on SQLite the search falls back to icontains.
+# pg_trgm ships with contrib, which some minimal Postgres builds leave out;
+# without it the name matching skips trigrams (see poker.search).
+SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS playerprofile_search_gin "
+    "ON poker_playerprofile USING gin (search_vector)"
+)
+TRIGRAM_INDEX = (
+    "CREATE INDEX IF NOT EXISTS playerprofile_name_trgm "
+    "ON poker_playerprofile USING gin (display_name gin_trgm_ops)"
+)
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS playerprofile_search_gin",
+    "DROP INDEX IF EXISTS playerprofile_name_trgm",
+]
+
+# Same weighting as poker.search.search_vector_expression
+BACKFILL = """
+UPDATE poker_playerprofile p SET search_vector =
+    setweight(to_tsvector('english', coalesce(p.display_name, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(p.summary, '')), 'B')
+    || setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(t.name, ' ')
+        FROM poker_playertag t
+        JOIN poker_playerprofile_tags pt ON pt.playertag_id = t.id
+        WHERE pt.playerprofile_id = p.id
+    ), '')), 'B')
+    || setweight(to_tsvector('english', coalesce(p.description, '')), 'C')
+"""
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SEARCH_INDEX)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        trigram_available = cursor.fetchone() is not None
+    if trigram_available:
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(TRIGRAM_INDEX)
+    schema_editor.execute(BACKFILL)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in DROP_INDEXES:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker', '0006_bankrollsimulation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerprofile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
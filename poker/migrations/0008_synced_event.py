@@ -0,0 +1,30 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('poker', '0007_player_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('observation', 'Observation'), ('tendency', 'Tendency press'), ('exploit', 'Exploit press')], max_length=20)),
+                ('batch', models.UUIDField(db_index=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synced_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'key'), name='uniq_synced_event_user_key')],
+            },
+        ),
+    ]
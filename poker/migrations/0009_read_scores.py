@@ -0,0 +1,65 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:34
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_read_scores(apps, schema_editor):
+    from poker.scoring import rescore_all
+
+    # Existing rows were last pressed no later than their last save
+    for name in ('PlayerTendency', 'PlayerExploit'):
+        apps.get_model('poker', name).objects.update(last_pressed=F('updated'))
+
+    rescore_all(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poker', '0008_synced_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerexploit',
+            name='last_pressed',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playertendency',
+            name='last_pressed',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playerexploit',
+            name='score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playerprofile',
+            name='read_evidence',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playerprofile',
+            name='read_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='playerprofile',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='playertendency',
+            name='score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['-read_score'], name='poker_player_read_score_idx'),
+        ),
+        migrations.RunPython(backfill_read_scores, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
 from django.contrib.auth.models import User
 from .fields import STAKES_CHOICES
@@ -26,6 +27,10 @@ class PokerSession(models.Model):
     
     class Meta:
         ordering = ('-date',)
+        indexes = [
+            models.Index(fields=["player", "date"], name="poker_session_player_date"),
+            models.Index(fields=["player", "stakes", "date"], name="poker_session_player_stakes"),
+        ]
     
     def __str__(self):
         return str(self.id)
@@ -47,6 +52,70 @@ class PokerSession(models.Model):
             total_hours -= break_hours
         return total_hours
 
+
+class PokerMonthlyRollup(models.Model):
+    """
+    Pre-aggregated PokerSession totals per player / month / stakes / casino.
+    Kept current by poker.signals; rebuild with `manage.py rebuild_poker_rollups`.
+    """
+    player = models.ForeignKey(User, on_delete=models.CASCADE, related_name='poker_rollups')
+    month = models.DateField(help_text="First day of the month.")
+    stakes = models.CharField(max_length=20, choices=STAKES_CHOICES)
+    casino = models.ForeignKey(Casino, on_delete=models.CASCADE, related_name='rollups')
+    profit = models.IntegerField(default=0)
+    hours = models.IntegerField(default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('-month',)
+        constraints = [
+            models.UniqueConstraint(fields=["player", "month", "stakes", "casino"], name="uniq_rollup_bucket")
+        ]
+
+    def __str__(self):
+        return f"{self.player} {self.month:%Y-%m} {self.stakes} {self.casino}"
+
+class BankrollSimulation(models.Model):
+    """
+    A Monte Carlo bankroll run that resamples the player's real session results.
+    inputs is the snapshot of those results taken when the run was requested;
+    input_hash covers it and every parameter, so an identical request reuses
+    the stored result instead of re-running, and the task simulates from the
+    snapshot rather than whatever the sessions look like when it gets to run.
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    player = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bankroll_simulations')
+    stakes = models.CharField(max_length=20, choices=STAKES_CHOICES, blank=True, help_text="Blank = all stakes.")
+    starting_bankroll = models.PositiveIntegerField()
+    target_bankroll = models.PositiveIntegerField()
+    sessions_ahead = models.PositiveIntegerField(default=500, help_text="How many future sessions to simulate.")
+    paths = models.PositiveIntegerField(default=100000)
+    sample_size = models.PositiveIntegerField(default=0, help_text="Real sessions resampled.")
+    input_hash = models.CharField(max_length=64, unique=True)
+    inputs = models.JSONField(default=dict, editable=False, help_text="Resampled session profit and hours.")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    dispatched = models.DateTimeField(null=True, blank=True, editable=False)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created',)
+
+    def __str__(self):
+        return f"{self.player} {self.get_stakes_display() or 'All'} ${self.starting_bankroll} ({self.status})"
+
+    def get_absolute_url(self):
+        return reverse('poker:simulation_detail', kwargs={'pk': self.pk})
+
+
 class PlayerTag(models.Model):
     """
     Flexible labels like: NIT, LAG, Station, Maniac, Reg, OMC, etc.
@@ -70,10 +139,19 @@ class PlayerProfile(models.Model):
     tags = models.ManyToManyField(PlayerTag, blank=True, related_name="players")
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
+    # Maintained by poker.search.refresh_search_vectors (Postgres only); the GIN
+    # and pg_trgm indexes are created in migration 0007
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Maintained by poker.scoring; read_score is the lower bound of the Beta
+    # posterior over every tendency, exploit and observation, as of scored_at
+    read_score = models.FloatField(default=0, editable=False)
+    read_evidence = models.FloatField(default=0, editable=False)
+    scored_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         indexes = [
-            models.Index(fields=["display_name"])
+            models.Index(fields=["display_name"]),
+            models.Index(fields=["-read_score"], name="poker_player_read_score_idx"),
         ]
         
 
@@ -123,6 +201,10 @@ class PlayerTendency(models.Model):
     confidence = models.PositiveSmallIntegerField(default=1, help_text="1-5 subjective confidence.")
 
     note = models.CharField(max_length=240, blank=True)
+    # Decayed Beta lower bound from poker.scoring
+    score = models.FloatField(default=0, editable=False)
+    # Last press or sync; scoring decays from this, so edits don't renew a read
+    last_pressed = models.DateTimeField(default=timezone.now, editable=False)
 
     updated = models.DateTimeField(auto_now=True)
 
@@ -183,6 +265,10 @@ class PlayerExploit(models.Model):
     strength = models.PositiveSmallIntegerField(default=1)   # 1–10
     confidence = models.PositiveSmallIntegerField(default=3) # 1–5
     note = models.CharField(max_length=240, blank=True)
+    # Decayed Beta lower bound from poker.scoring
+    score = models.FloatField(default=0, editable=False)
+    # Last press or sync; scoring decays from this, so edits don't renew a read
+    last_pressed = models.DateTimeField(default=timezone.now, editable=False)
 
     updated = models.DateTimeField(auto_now=True)
 
@@ -192,4 +278,30 @@ class PlayerExploit(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.player} - {self.tag}"
\ No newline at end of file
+        return f"{self.player} - {self.tag}"
+
+class SyncedEvent(models.Model):
+    """
+    Idempotency ledger for the offline sync endpoint: one row per user and
+    client event key that has been applied. batch marks which request claimed
+    the key, so a replayed queue is recognised without re-applying its presses.
+    Keys are only unique per user, so two phones can't collide on them.
+    """
+    class Kind(models.TextChoices):
+        OBSERVATION = "observation", "Observation"
+        TENDENCY = "tendency", "Tendency press"
+        EXPLOIT = "exploit", "Exploit press"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='synced_events')
+    key = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    batch = models.UUIDField(db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="uniq_synced_event_user_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.key}"
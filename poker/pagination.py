@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.db.models import Q
+
+
+def encode_cursor(obj):
+    return f"{obj.date.isoformat()}_{obj.pk}"
+
+
+def decode_cursor(cursor):
+    """
+    Parse a "YYYY-MM-DD_<id>" cursor; anything malformed just means "first page".
+    """
+    if not cursor:
+        return None
+    try:
+        day, pk = cursor.split("_", 1)
+        return date.fromisoformat(day), int(pk)
+    except ValueError:
+        return None
+
+
+def keyset_page(queryset, cursor=None, per_page=50):
+    """
+    Seek pagination over (-date, -id).
+
+    Rather than OFFSET (which reads and throws away every earlier row), each page
+    starts strictly after the last (date, id) of the previous one, so page 500
+    costs the same as page 1 with the (player, date) index.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by("-date", "-id")
+    position = decode_cursor(cursor)
+    if position:
+        day, pk = position
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = encode_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
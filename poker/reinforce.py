@@ -0,0 +1,154 @@
+"""
+Button-press reinforcement for tendencies and exploits.
+
+Each press is applied as one INSERT ... ON CONFLICT DO UPDATE against the
+existing unique constraints, so the counter bump happens inside the database
+and concurrent double-taps can't overwrite each other. Presses are counted per
+row first, which lets a whole batch go out as a single statement.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .models import PlayerExploit, PlayerTendency
+
+MAX_CONFIDENCE = 5
+MAX_STRENGTH = 10
+# A brand-new row from a single press starts at this confidence
+NEW_CONFIDENCE = 3
+
+TENDENCY_UPSERT = """
+INSERT INTO {table} (player_id, metric, street, sample_size, confidence, note, score, last_pressed, updated)
+VALUES {values}
+ON CONFLICT ON CONSTRAINT uniq_player_metric_street DO UPDATE SET
+    sample_size = {table}.sample_size + EXCLUDED.sample_size,
+    confidence = LEAST(%s, {table}.confidence + EXCLUDED.sample_size),
+    last_pressed = EXCLUDED.last_pressed,
+    updated = EXCLUDED.updated
+RETURNING player_id, metric, street, (xmax = 0)
+"""
+
+EXPLOIT_UPSERT = """
+INSERT INTO {table} (player_id, tag_id, strength, confidence, note, score, last_pressed, updated)
+VALUES {values}
+ON CONFLICT ON CONSTRAINT uniq_player_exploit_tag DO UPDATE SET
+    strength = LEAST(%s, {table}.strength + EXCLUDED.strength),
+    confidence = LEAST(%s, {table}.confidence + EXCLUDED.strength),
+    last_pressed = EXCLUDED.last_pressed,
+    updated = EXCLUDED.updated
+RETURNING player_id, tag_id, (xmax = 0)
+"""
+
+
+def _new_confidence(presses):
+    return min(MAX_CONFIDENCE, NEW_CONFIDENCE + presses - 1)
+
+
+def _upsert(sql, table, rows, extra_params):
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(rows[0])) + ")"] * len(rows))
+    params = [value for row in rows for value in row] + list(extra_params)
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(table=table, values=placeholders), params)
+        return cursor.fetchall()
+
+
+def reinforce_tendencies(presses):
+    """
+    Apply (player_id, metric, street) presses: +1 sample and +1 confidence
+    (capped at 5) per press, creating the tendency if it's new.
+    Returns {(player_id, metric, street): created}.
+    """
+    counts = Counter(presses)
+    if not counts:
+        return {}
+    now = timezone.now()
+    if connection.vendor == "postgresql":
+        rows = [
+            (player_id, metric, street, n, _new_confidence(n), "", 0, now, now)
+            for (player_id, metric, street), n in counts.items()
+        ]
+        result = _upsert(TENDENCY_UPSERT, PlayerTendency._meta.db_table, rows, [MAX_CONFIDENCE])
+        return {(player_id, metric, street): created for player_id, metric, street, created in result}
+
+    created = {}
+    for (player_id, metric, street), n in counts.items():
+        created[(player_id, metric, street)] = _update_or_insert(
+            PlayerTendency.objects.filter(player_id=player_id, metric=metric, street=street),
+            {
+                "sample_size": F("sample_size") + n,
+                "confidence": Least(F("confidence") + n, Value(MAX_CONFIDENCE)),
+                "last_pressed": now,
+                "updated": now,
+            },
+            PlayerTendency(
+                player_id=player_id, metric=metric, street=street,
+                sample_size=n, confidence=_new_confidence(n),
+            ),
+        )
+    return created
+
+
+def reinforce_exploits(presses):
+    """
+    Apply (player_id, tag_id) presses: +1 strength (capped at 10) and +1
+    confidence (capped at 5) per press, creating the link if it's new.
+    Returns {(player_id, tag_id): created}.
+    """
+    counts = Counter(presses)
+    if not counts:
+        return {}
+    now = timezone.now()
+    if connection.vendor == "postgresql":
+        rows = [
+            (player_id, tag_id, min(MAX_STRENGTH, n), _new_confidence(n), "", 0, now, now)
+            for (player_id, tag_id), n in counts.items()
+        ]
+        result = _upsert(
+            EXPLOIT_UPSERT, PlayerExploit._meta.db_table, rows, [MAX_STRENGTH, MAX_CONFIDENCE]
+        )
+        return {(player_id, tag_id): created for player_id, tag_id, created in result}
+
+    created = {}
+    for (player_id, tag_id), n in counts.items():
+        created[(player_id, tag_id)] = _update_or_insert(
+            PlayerExploit.objects.filter(player_id=player_id, tag_id=tag_id),
+            {
+                "strength": Least(F("strength") + n, Value(MAX_STRENGTH)),
+                "confidence": Least(F("confidence") + n, Value(MAX_CONFIDENCE)),
+                "last_pressed": now,
+                "updated": now,
+            },
+            PlayerExploit(
+                player_id=player_id, tag_id=tag_id,
+                strength=min(MAX_STRENGTH, n), confidence=_new_confidence(n),
+            ),
+        )
+    return created
+
+
+def _update_or_insert(existing, changes, new):
+    """
+    Portable fallback for databases without the Postgres upsert: an F()
+    update, or an insert when no row matched (retrying the update if another
+    request inserted first). Returns True when the row was created.
+    """
+    if existing.update(**changes):
+        return False
+    try:
+        with transaction.atomic():
+            new.save(force_insert=True)
+        return True
+    except IntegrityError:
+        existing.update(**changes)
+        return False
+
+
+def reinforce_tendency(player_id, metric, street):
+    return reinforce_tendencies([(player_id, metric, street)])[(player_id, metric, street)]
+
+
+def reinforce_exploit(player_id, tag_id):
+    return reinforce_exploits([(player_id, tag_id)])[(player_id, tag_id)]
@@ -0,0 +1,138 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth
+
+from thisisus.dates import month_filter
+
+from .models import PokerSession, PokerMonthlyRollup
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def refresh_bucket(player_id, month, stakes, casino_id):
+    """
+    Recompute a single (player, month, stakes, casino) rollup row from its sessions.
+    Only the handful of sessions inside that bucket are read.
+    """
+    month = month_start(month)
+    totals = PokerSession.objects.filter(
+        player_id=player_id,
+        stakes=stakes,
+        casino_id=casino_id,
+        **month_filter('date', month.year, month.month),
+    ).aggregate(
+        profit=Sum(F('cash_out') - F('buy_in')),
+        hours=Sum('hours'),
+        session_count=Count('id'),
+    )
+
+    bucket = dict(player_id=player_id, month=month, stakes=stakes, casino_id=casino_id)
+    if not totals['session_count']:
+        PokerMonthlyRollup.objects.filter(**bucket).delete()
+        return None
+
+    rollup, _ = PokerMonthlyRollup.objects.update_or_create(
+        **bucket,
+        defaults={
+            'profit': totals['profit'] or 0,
+            'hours': totals['hours'] or 0,
+            'session_count': totals['session_count'],
+        },
+    )
+    return rollup
+
+
+@transaction.atomic
+def rebuild_rollups(player=None):
+    """
+    Throw away and regenerate rollups from PokerSession, optionally for one player.
+    Returns the number of rollup rows written.
+    """
+    sessions = PokerSession.objects.all()
+    rollups = PokerMonthlyRollup.objects.all()
+    if player is not None:
+        sessions = sessions.filter(player=player)
+        rollups = rollups.filter(player=player)
+
+    rows = sessions.annotate(
+        month=TruncMonth('date')
+    ).values('player_id', 'month', 'stakes', 'casino_id').annotate(
+        profit=Sum(F('cash_out') - F('buy_in')),
+        total_hours=Sum('hours'),
+        session_count=Count('id'),
+    ).order_by()
+
+    rollups.delete()
+    created = PokerMonthlyRollup.objects.bulk_create(
+        [
+            PokerMonthlyRollup(
+                player_id=row['player_id'],
+                month=month_start(row['month']),
+                stakes=row['stakes'],
+                casino_id=row['casino_id'],
+                profit=row['profit'] or 0,
+                hours=row['total_hours'] or 0,
+                session_count=row['session_count'],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+    return len(created)
+
+
+def monthly_totals(player, stakes=None):
+    """
+    Per-month profit/hours for a player, read from the rollup table.
+    Same shape as the old TruncMonth queryset used by the month templates.
+    """
+    rollups = PokerMonthlyRollup.objects.filter(player=player)
+    if stakes:
+        rollups = rollups.filter(stakes=stakes)
+
+    months = list(
+        rollups.values('month').annotate(
+            total_profit=Sum('profit'),
+            total_hours=Sum('hours'),
+            session_count=Sum('session_count'),
+        ).order_by('-month')
+    )
+    for row in months:
+        if row['total_hours']:
+            row['win_rate_per_hour'] = row['total_profit'] / row['total_hours']
+        else:
+            row['win_rate_per_hour'] = None
+    return months
+
+
+def overall_totals(player, stakes=None):
+    rollups = PokerMonthlyRollup.objects.filter(player=player)
+    if stakes:
+        rollups = rollups.filter(stakes=stakes)
+
+    totals = rollups.aggregate(total=Sum('profit'), hours=Sum('hours'), sessions=Sum('session_count'))
+    overall_total = totals['total'] or 0
+    overall_hours = totals['hours'] or 0
+    return {
+        'overall_total': overall_total,
+        'overall_hours': overall_hours,
+        'overall_sessions': totals['sessions'] or 0,
+        'overall_hourly_rate': overall_total / overall_hours if overall_hours > 0 else 0,
+    }
+
+
+def data_version(player):
+    """
+    Cheap fingerprint of a player's session data, used in cache keys.
+    Every session save/delete refreshes (or removes) a rollup row, so the
+    (row count, latest update) pair changes whenever any session changes.
+    """
+    stamp = PokerMonthlyRollup.objects.filter(player=player).aggregate(
+        rows=Count('id'), latest=Max('updated'),
+    )
+    latest = stamp['latest'].timestamp() if stamp['latest'] else 0
+    return f"{stamp['rows']}-{latest:.6f}"
@@ -0,0 +1,153 @@
+"""
+Read-strength scores for player profiles.
+
+Every tendency sample, exploit press and observation is treated as a trial
+on "this read holds": its 1-5 confidence (or reliability) becomes
+p = (level - 1) / 4, adding p to alpha and 1 - p to beta of a Beta(1, 1)
+prior. Trials are weighted by exp(-ln 2 * age / HALF_LIFE_DAYS), so reads
+nobody has confirmed lately drift back to the prior. Age is measured from
+the last confirmation: an observation is its own trial and ages from when
+it happened, but a tendency or exploit is one row holding all of its presses
+(sample_size / strength) with a single `last_pressed` stamp, so every press
+on it is decayed from the latest one and a new press renews the whole row.
+Editing a row's note or confidence doesn't count as a confirmation. The
+stored score is the lower end of the posterior (mean - 1.645 sd): a read
+needs both agreement and volume to rank high.
+
+Scores are written onto the rows (PlayerTendency.score, PlayerExploit.score)
+and rolled up onto PlayerProfile, so list and detail pages only sort by a
+column. rescore_players() is cheap enough to run for one player after every
+press; rescore_all() walks every profile in chunks for the nightly decay.
+"""
+import math
+
+import numpy as np
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+HALF_LIFE_DAYS = 90
+PRIOR_ALPHA = 1.0
+PRIOR_BETA = 1.0
+# One-sided 95% lower bound
+LOWER_BOUND_Z = 1.645
+MAX_LEVEL = 5
+RESCORE_CHUNK_SIZE = 1000
+
+SECONDS_PER_DAY = 86400
+
+
+def lower_bound(alpha, beta):
+    """
+    Normal approximation to the lower credible bound of Beta(alpha, beta),
+    clipped to [0, 1]. Works elementwise on arrays.
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    beta = np.asarray(beta, dtype=float)
+    total = alpha + beta
+    mean = alpha / total
+    sd = np.sqrt(alpha * beta / (total * total * (total + 1)))
+    return np.clip(mean - LOWER_BOUND_Z * sd, 0.0, 1.0)
+
+
+def evidence(trials, levels, timestamps, now):
+    """
+    Decayed (alpha, beta) increments for rows of `trials` at a 1-5 level,
+    last confirmed at `timestamps` (epoch seconds).
+    """
+    trials = np.asarray(trials, dtype=float)
+    p = (np.clip(np.asarray(levels, dtype=float), 1, MAX_LEVEL) - 1) / (MAX_LEVEL - 1)
+    age_days = np.maximum(0.0, (now.timestamp() - np.asarray(timestamps, dtype=float)) / SECONDS_PER_DAY)
+    weight = trials * np.exp(-math.log(2) * age_days / HALF_LIFE_DAYS)
+    return weight * p, weight * (1 - p)
+
+
+def _models(apps):
+    return (
+        apps.get_model("poker", "PlayerProfile"),
+        apps.get_model("poker", "PlayerTendency"),
+        apps.get_model("poker", "PlayerExploit"),
+        apps.get_model("poker", "PlayerObservation"),
+    )
+
+
+def _sources(tendency, exploit, observation):
+    # (queryset, trials, level, last confirmed, has a score column); all of a
+    # tendency's or exploit's presses share the row's last confirmation
+    return [
+        (tendency.objects.all(), "sample_size", "confidence", "last_pressed", True),
+        (exploit.objects.all(), "strength", "confidence", "last_pressed", True),
+        (
+            observation.objects.annotate(
+                trials=Value(1), seen=Coalesce("happened_at", "created"),
+            ),
+            "trials", "reliability", "seen", False,
+        ),
+    ]
+
+
+def _load(queryset, trials, level, when, now):
+    rows = list(queryset.values_list("pk", "player_id", trials, level, when))
+    if not rows:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), empty, empty
+    pks, players, counts, levels, times = zip(*rows)
+    alpha, beta = evidence(counts, levels, [t.timestamp() for t in times], now)
+    return np.array(pks, dtype=np.int64), np.array(players, dtype=np.int64), alpha, beta
+
+
+@transaction.atomic
+def rescore_players(player_ids, now=None, apps=global_apps):
+    """
+    Recompute row and profile scores for the given players from their
+    tendencies, exploits and observations. Returns the number of profiles.
+    Migrations pass their historical `apps`.
+    """
+    now = now or timezone.now()
+    profile, tendency, exploit, observation = _models(apps)
+    player_ids = np.unique(np.fromiter(player_ids, dtype=np.int64))
+    if not len(player_ids):
+        return 0
+
+    alpha = np.full(len(player_ids), PRIOR_ALPHA)
+    beta = np.full(len(player_ids), PRIOR_BETA)
+    for queryset, trials, level, when, scored in _sources(tendency, exploit, observation):
+        queryset = queryset.filter(player_id__in=player_ids.tolist())
+        pks, players, row_alpha, row_beta = _load(queryset, trials, level, when, now)
+        slots = np.searchsorted(player_ids, players)
+        np.add.at(alpha, slots, row_alpha)
+        np.add.at(beta, slots, row_beta)
+        if scored and len(pks):
+            scores = lower_bound(PRIOR_ALPHA + row_alpha, PRIOR_BETA + row_beta)
+            queryset.model.objects.bulk_update(
+                [queryset.model(pk=pk, score=score) for pk, score in zip(pks.tolist(), scores.tolist())],
+                ["score"],
+                batch_size=500,
+            )
+
+    scores = lower_bound(alpha, beta)
+    weights = alpha + beta - PRIOR_ALPHA - PRIOR_BETA
+    profile.objects.bulk_update(
+        [
+            profile(pk=pk, read_score=score, read_evidence=weight, scored_at=now)
+            for pk, score, weight in zip(player_ids.tolist(), scores.tolist(), weights.tolist())
+        ],
+        ["read_score", "read_evidence", "scored_at"],
+        batch_size=500,
+    )
+    return len(player_ids)
+
+
+def rescore_all(now=None, chunk_size=RESCORE_CHUNK_SIZE, apps=global_apps):
+    """
+    Rescore every profile, chunk_size players at a time, so the decay keeps
+    moving for players nobody has pressed anything on lately.
+    """
+    now = now or timezone.now()
+    profile = apps.get_model("poker", "PlayerProfile")
+    ids = list(profile.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), chunk_size):
+        rescore_players(ids[start:start + chunk_size], now=now, apps=apps)
+    return len(ids)
@@ -0,0 +1,102 @@
+from functools import lru_cache
+
+from django.db import connection, connections
+from django.db.models import Exists, F, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from .models import PlayerProfile, PlayerTag
+
+# Text search configuration for the stored vector and for queries
+SEARCH_CONFIG = 'english'
+
+# pg_trgm's default similarity threshold for the % operator is 0.3
+TRIGRAM_WEIGHT = 0.5
+
+
+def is_postgres():
+    return connection.vendor == 'postgresql'
+
+
+@lru_cache(maxsize=None)
+def _trigram_installed(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def has_trigram():
+    """Whether pg_trgm is installed (migration 0007 adds it when the server has it)."""
+    return is_postgres() and _trigram_installed(connection.alias)
+
+
+def search_vector_expression():
+    """
+    Weighted vector over name (A), summary and tag names (B), and description (C).
+    Tags live in another table, so they come in through a STRING_AGG subquery.
+    """
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+
+    tag_names = (
+        PlayerTag.objects.filter(players=OuterRef('pk'))
+        .values('players')
+        .annotate(names=StringAgg('name', delimiter=' '))
+        .values('names')
+    )
+    return (
+        SearchVector('display_name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('summary', weight='B', config=SEARCH_CONFIG)
+        + SearchVector(Coalesce(Subquery(tag_names), Value(''), output_field=TextField()), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(players=None):
+    """
+    Recompute the stored search_vector for the given profiles (a queryset, or
+    all of them) in a single UPDATE. No-op outside Postgres.
+    """
+    if not is_postgres():
+        return 0
+    if players is None:
+        players = PlayerProfile.objects.all()
+    return players.update(search_vector=search_vector_expression())
+
+
+def search_players(players, q):
+    """
+    Filter and rank a PlayerProfile queryset by a free-text query.
+
+    On Postgres this is the stored tsvector (GIN index) OR a trigram match on
+    display_name (pg_trgm GIN index), so "hat guy" finds "Hat-Guy"; results
+    are ordered by text rank plus weighted name similarity. Without pg_trgm
+    the name side is a plain icontains. Elsewhere (SQLite in local tests) it
+    falls back to icontains matching ordered by name.
+    """
+    q = q.strip()
+    if not q:
+        return players
+
+    if is_postgres():
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+        query = SearchQuery(q, search_type='websearch', config=SEARCH_CONFIG)
+        rank = SearchRank(F('search_vector'), query)
+        if has_trigram():
+            name_match = Q(display_name__trigram_similar=q)
+            rank = rank + TrigramSimilarity('display_name', q) * TRIGRAM_WEIGHT
+        else:
+            name_match = Q(display_name__icontains=q)
+        return (
+            players.filter(Q(search_vector=query) | name_match)
+            .annotate(rank=rank)
+            .order_by('-rank', 'display_name')
+        )
+
+    tagged = PlayerTag.objects.filter(players=OuterRef('pk'), name__icontains=q)
+    return players.filter(
+        Q(display_name__icontains=q)
+        | Q(summary__icontains=q)
+        | Q(description__icontains=q)
+        | Exists(tagged)
+    ).order_by('display_name')
@@ -0,0 +1,124 @@
+import threading
+
+from django.db.models.signals import m2m_changed, pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import PlayerExploit, PlayerObservation, PlayerProfile, PlayerTag, PlayerTendency, PokerSession
+from .rollups import refresh_bucket
+from .scoring import rescore_players
+from .search import refresh_search_vectors
+
+
+def _bucket(session):
+    return (session.player_id, session.date.replace(day=1), session.stakes, session.casino_id)
+
+
+@receiver(pre_save, sender=PokerSession)
+def remember_previous_bucket(sender, instance, **kwargs):
+    # An edit can move a session to another month/stakes/casino; keep the old
+    # bucket around so post_save can fix up both sides.
+    instance._previous_bucket = None
+    if instance.pk:
+        previous = (
+            PokerSession.objects.filter(pk=instance.pk)
+            .values_list('player_id', 'date', 'stakes', 'casino_id')
+            .first()
+        )
+        if previous:
+            player_id, day, stakes, casino_id = previous
+            instance._previous_bucket = (player_id, day.replace(day=1), stakes, casino_id)
+
+
+@receiver(post_save, sender=PokerSession)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    current = _bucket(instance)
+    refresh_bucket(*current)
+    previous = getattr(instance, '_previous_bucket', None)
+    if previous and previous != current:
+        refresh_bucket(*previous)
+
+
+@receiver(post_delete, sender=PokerSession)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    refresh_bucket(*_bucket(instance))
+
+
+@receiver(post_save, sender=PlayerProfile)
+def refresh_search_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_vectors(PlayerProfile.objects.filter(pk=instance.pk))
+
+
+def _tagged_player_pks(tag):
+    return list(tag.players.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=PlayerProfile.tags.through)
+def refresh_search_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_search_vectors(PlayerProfile.objects.filter(pk=instance.pk))
+        return
+    # tag.players.add(...) etc.: instance is the tag, pk_set the profiles
+    if action == 'pre_clear':
+        instance._search_player_pks = _tagged_player_pks(instance)
+    elif action in ('post_add', 'post_remove'):
+        refresh_search_vectors(PlayerProfile.objects.filter(pk__in=pk_set))
+    elif action == 'post_clear':
+        refresh_search_vectors(PlayerProfile.objects.filter(pk__in=instance._search_player_pks))
+
+
+@receiver(post_save, sender=PlayerTag)
+def refresh_search_on_tag_rename(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    refresh_search_vectors(PlayerProfile.objects.filter(tags=instance))
+
+
+@receiver(pre_delete, sender=PlayerTag)
+def remember_tagged_players(sender, instance, **kwargs):
+    instance._search_player_pks = _tagged_player_pks(instance)
+
+
+@receiver(post_delete, sender=PlayerTag)
+def refresh_search_on_tag_delete(sender, instance, **kwargs):
+    refresh_search_vectors(PlayerProfile.objects.filter(pk__in=instance._search_player_pks))
+
+
+# Profiles whose delete is in progress in this thread; their reads go with them
+_deleting = threading.local()
+
+
+def _deleting_players():
+    if not hasattr(_deleting, 'players'):
+        _deleting.players = set()
+    return _deleting.players
+
+
+@receiver(pre_delete, sender=PlayerProfile)
+def remember_deleting_player(sender, instance, **kwargs):
+    _deleting_players().add(instance.pk)
+
+
+@receiver(post_delete, sender=PlayerProfile)
+def forget_deleting_player(sender, instance, **kwargs):
+    _deleting_players().discard(instance.pk)
+
+
+@receiver(post_save, sender=PlayerTendency)
+@receiver(post_save, sender=PlayerExploit)
+@receiver(post_save, sender=PlayerObservation)
+@receiver(post_delete, sender=PlayerTendency)
+@receiver(post_delete, sender=PlayerExploit)
+@receiver(post_delete, sender=PlayerObservation)
+def rescore_on_read_change(sender, instance, raw=False, **kwargs):
+    # Presses and sync go through raw upserts / bulk_create and rescore
+    # themselves; this covers the edit forms and the admin. The rows a
+    # profile delete cascades to don't need a score for a profile that is
+    # about to disappear, and would otherwise cost one rescore per row.
+    if raw or instance.player_id in _deleting_players():
+        return
+    rescore_players([instance.player_id])
@@ -0,0 +1,189 @@
+"""
+Batched sync for reads captured offline.
+
+A phone queues observations and tendency/exploit presses while the casino
+Wi-Fi is down, then posts the whole queue at once. Every event carries a
+client-generated key; keys are claimed in the SyncedEvent ledger with
+bulk_create(ignore_conflicts=True) inside the same transaction that applies
+the events, so a queue that is replayed after a dropped response only
+applies the events that never made it. Keys are scoped to the user syncing,
+so two devices that happen to generate the same key don't swallow each
+other's events.
+"""
+import uuid
+
+from django.db import transaction
+
+from .forms import PlayerObservationForm
+from .models import ExploitTag, PlayerObservation, PlayerProfile, Street, SyncedEvent, TendencyMetric
+from .reinforce import reinforce_exploits, reinforce_tendencies
+from .scoring import rescore_players
+
+MAX_SYNC_EVENTS = 500
+
+APPLIED = "applied"
+DUPLICATE = "duplicate"
+ERROR = "error"
+
+
+class SyncError(ValueError):
+    pass
+
+
+def _clean_observation(event):
+    form = PlayerObservationForm(data=event)
+    if not form.is_valid():
+        field, errors = next(iter(form.errors.items()))
+        raise SyncError(f"{field}: {errors[0]}")
+    return form.cleaned_data
+
+
+def _clean_tendency(event):
+    metric = str(event.get("metric") or "").strip()
+    street = str(event.get("street") or "").strip()
+    if metric not in TendencyMetric.values:
+        raise SyncError(f"Unknown metric {metric!r}.")
+    if street not in Street.values:
+        raise SyncError(f"Unknown street {street!r}.")
+    return {"metric": metric, "street": street}
+
+
+def _clean_exploit(event):
+    name = str(event.get("name") or "").strip()
+    desc = str(event.get("desc") or "").strip()
+    if not name:
+        raise SyncError("Missing exploit.")
+    if len(name) > ExploitTag._meta.get_field("name").max_length:
+        raise SyncError("Exploit name is too long.")
+    return {"name": name, "desc": desc[:ExploitTag._meta.get_field("description").max_length]}
+
+
+CLEANERS = {
+    SyncedEvent.Kind.OBSERVATION: _clean_observation,
+    SyncedEvent.Kind.TENDENCY: _clean_tendency,
+    SyncedEvent.Kind.EXPLOIT: _clean_exploit,
+}
+
+
+def _validate(events):
+    """
+    Check every event without touching the ledger. Returns (pending, results)
+    where pending holds (index, key, kind, player_id, cleaned) for the events
+    worth applying and results already has the error/duplicate entries.
+    """
+    results = [None] * len(events)
+    pending = []
+    seen = set()
+    key_length = SyncedEvent._meta.get_field("key").max_length
+
+    for index, event in enumerate(events):
+        key = str(event.get("key") or "").strip() if isinstance(event, dict) else ""
+        try:
+            if not key or len(key) > key_length:
+                raise SyncError(f"Every event needs a key of at most {key_length} characters.")
+            if key in seen:
+                results[index] = {"key": key, "status": DUPLICATE}
+                continue
+            seen.add(key)
+
+            kind = event.get("type")
+            if kind not in CLEANERS:
+                raise SyncError(f"Unknown event type {kind!r}.")
+            try:
+                player_id = int(event.get("player"))
+            except (TypeError, ValueError):
+                raise SyncError("Missing player.")
+            pending.append((index, key, kind, player_id, CLEANERS[kind](event)))
+        except SyncError as exc:
+            results[index] = {"key": key, "status": ERROR, "error": str(exc)}
+
+    players = set(
+        PlayerProfile.objects.filter(pk__in={p[3] for p in pending}).values_list("pk", flat=True)
+    )
+    known = []
+    for item in pending:
+        index, key, _, player_id, _ = item
+        if player_id in players:
+            known.append(item)
+        else:
+            results[index] = {"key": key, "status": ERROR, "error": f"Unknown player {player_id}."}
+    return known, results
+
+
+def _exploit_tags(cleaned):
+    """
+    Map exploit names to tag ids, creating any new tags in one insert.
+    """
+    descriptions = {}
+    for values in cleaned:
+        descriptions.setdefault(values["name"], values["desc"])
+    tags = dict(ExploitTag.objects.filter(name__in=descriptions).values_list("name", "pk"))
+    missing = [ExploitTag(name=name, description=desc) for name, desc in descriptions.items() if name not in tags]
+    if missing:
+        ExploitTag.objects.bulk_create(missing, ignore_conflicts=True)
+        tags = dict(ExploitTag.objects.filter(name__in=descriptions).values_list("name", "pk"))
+    return tags
+
+
+@transaction.atomic
+def apply_events(user, events):
+    """
+    Apply `user`'s queue of sync events and return one status dict per event,
+    in order.
+
+    A key that is already in the user's ledger (from an earlier sync, or from a
+    concurrent request that got there first) comes back as "duplicate" and is
+    not applied again. Invalid events come back as "error" and are not
+    recorded, so the client can fix or drop them.
+    """
+    pending, results = _validate(events)
+    if not pending:
+        return results
+
+    batch = uuid.uuid4()
+    SyncedEvent.objects.bulk_create(
+        [SyncedEvent(user=user, key=key, kind=kind, batch=batch) for _, key, kind, _, _ in pending],
+        ignore_conflicts=True,
+    )
+    # A concurrent insert of the same key blocks until the other transaction
+    # finishes and is then skipped, so only keys stamped with our batch are ours.
+    claimed = set(SyncedEvent.objects.filter(user=user, batch=batch).values_list("key", flat=True))
+
+    observations, tendencies, exploits = [], [], []
+    for item in pending:
+        index, key, kind, _, _ = item
+        if key not in claimed:
+            results[index] = {"key": key, "status": DUPLICATE}
+        elif kind == SyncedEvent.Kind.OBSERVATION:
+            observations.append(item)
+        elif kind == SyncedEvent.Kind.TENDENCY:
+            tendencies.append(item)
+        else:
+            exploits.append(item)
+
+    created = PlayerObservation.objects.bulk_create(
+        [PlayerObservation(player_id=player_id, **cleaned) for _, _, _, player_id, cleaned in observations]
+    )
+    for (index, key, _, _, _), obs in zip(observations, created):
+        results[index] = {"key": key, "status": APPLIED, "id": obs.pk}
+
+    tendency_keys = {
+        index: (player_id, cleaned["metric"], cleaned["street"])
+        for index, _, _, player_id, cleaned in tendencies
+    }
+    new_tendencies = reinforce_tendencies(tendency_keys.values())
+    for index, key, _, _, _ in tendencies:
+        results[index] = {"key": key, "status": APPLIED, "created": new_tendencies[tendency_keys[index]]}
+
+    tags = _exploit_tags([cleaned for _, _, _, _, cleaned in exploits])
+    exploit_keys = {
+        index: (player_id, tags[cleaned["name"]])
+        for index, _, _, player_id, cleaned in exploits
+    }
+    new_exploits = reinforce_exploits(exploit_keys.values())
+    for index, key, _, _, _ in exploits:
+        results[index] = {"key": key, "status": APPLIED, "created": new_exploits[exploit_keys[index]]}
+
+    # bulk_create and the upserts skip the scoring signals
+    rescore_players({player_id for _, _, _, player_id, _ in observations + tendencies + exploits})
+    return results
@@ -0,0 +1,49 @@
+from celery import shared_task
+from django.utils import timezone
+
+from .analytics import simulate_bankroll
+from .models import BankrollSimulation, PokerSession
+from .scoring import rescore_all
+
+
+def simulation_sessions(player, stakes):
+    sessions = PokerSession.objects.filter(player=player)
+    if stakes:
+        sessions = sessions.filter(stakes=stakes)
+    return sessions
+
+
+@shared_task
+def run_bankroll_simulation(simulation_id):
+    simulation = BankrollSimulation.objects.get(pk=simulation_id)
+    if simulation.status == BankrollSimulation.Status.DONE:
+        return simulation.pk
+
+    simulation.status = BankrollSimulation.Status.RUNNING
+    simulation.save(update_fields=['status'])
+    try:
+        # The snapshot input_hash was computed from, so the result matches its key
+        simulation.result = simulate_bankroll(
+            simulation.inputs['profit'],
+            simulation.inputs['hours'],
+            simulation.starting_bankroll,
+            simulation.target_bankroll,
+            simulation.sessions_ahead,
+            simulation.paths,
+            # Same inputs -> same seed -> reproducible result
+            seed=int(simulation.input_hash[:16], 16),
+        )
+        simulation.status = BankrollSimulation.Status.DONE
+        simulation.error = ''
+    except Exception as exc:
+        simulation.status = BankrollSimulation.Status.FAILED
+        simulation.error = str(exc)
+    simulation.finished = timezone.now()
+    simulation.save(update_fields=['result', 'status', 'error', 'finished'])
+    return simulation.pk
+
+
+@shared_task
+def rescore_read_strength():
+    """Let read scores decay for players with no new presses; run daily by celery beat."""
+    return rescore_all()
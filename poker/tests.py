@@ -1,3 +1,674 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from hands.models import Hands
+from thisisus.testing import plain_static_storage
+
+from .analytics import (
+    bankroll_summary, bootstrap_win_rate_ci, max_drawdown, rolling_hourly_rate, simulate_bankroll, stdev_per_hour,
+)
+from .charts import chart_filters
+from .exports import SESSION_FIELDS, export_lines, export_rows
+from .forms import PlayerTendencyEditForm
+from .imports import REFRESH_BUCKET_LIMIT, CasinoMap, ImportRowError, import_sessions, parse_session, read_rows
+from .models import (
+    BankrollSimulation, Casino, PlayerExploit, PlayerObservation, PlayerProfile, PlayerTag, PlayerTendency, PokerMonthlyRollup,
+    PokerSession, SyncedEvent,
+)
+from .pagination import decode_cursor, keyset_page
+from .rollups import data_version, monthly_totals, overall_totals, rebuild_rollups
+from .scoring import rescore_all, rescore_players
+from . import typeahead
+from .search import refresh_search_vectors, search_players
+from .sync import apply_events
+from .tasks import run_bankroll_simulation
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        cls.villain = User.objects.create_user('villain')
+        cls.bike = Casino.objects.create(name='Bike')
+        cls.commerce = Casino.objects.create(name='Commerce')
+
+    def session(self, **kwargs):
+        values = dict(player=self.user, casino=self.bike, stakes='25', date=date(2024, 3, 5),
+                      hours=4, buy_in=500, cash_out=800)
+        values.update(kwargs)
+        return PokerSession.objects.create(**values)
+
+    def buckets(self, player=None):
+        return {
+            (r.month, r.stakes, r.casino_id): (r.profit, r.hours, r.session_count)
+            for r in PokerMonthlyRollup.objects.filter(player=player or self.user)
+        }
+
+    def test_sessions_in_one_bucket_are_summed(self):
+        self.session()
+        self.session(date=date(2024, 3, 31), hours=2, buy_in=300, cash_out=0)
+        self.assertEqual(self.buckets(), {(date(2024, 3, 1), '25', self.bike.pk): (0, 6, 2)})
+
+    def test_moving_a_session_refreshes_both_buckets(self):
+        moved = self.session()
+        self.session(cash_out=100)
+        moved.date = date(2024, 4, 1)
+        moved.casino = self.commerce
+        moved.save()
+        self.assertEqual(self.buckets(), {
+            (date(2024, 3, 1), '25', self.bike.pk): (-400, 4, 1),
+            (date(2024, 4, 1), '25', self.commerce.pk): (300, 4, 1),
+        })
+
+    def test_deleting_the_last_session_drops_the_bucket(self):
+        self.session().delete()
+        self.assertEqual(self.buckets(), {})
+
+    def test_rebuild_for_one_player_leaves_others_alone(self):
+        # bulk_create skips the signals, as the importer and load generator do
+        PokerSession.objects.bulk_create([
+            PokerSession(player=self.user, casino=self.bike, stakes='25', date=date(2024, 3, 5),
+                         hours=4, buy_in=500, cash_out=800),
+            PokerSession(player=self.villain, casino=self.bike, stakes='25', date=date(2024, 3, 5),
+                         hours=4, buy_in=500, cash_out=0),
+        ])
+        self.assertEqual(rebuild_rollups(player=self.user), 1)
+        self.assertEqual(self.buckets(), {(date(2024, 3, 1), '25', self.bike.pk): (300, 4, 1)})
+        self.assertEqual(self.buckets(self.villain), {})
+
+    def test_monthly_totals_with_zero_hours(self):
+        self.session(hours=0)
+        self.session(stakes='13', date=date(2024, 2, 5), hours=5, buy_in=100, cash_out=600)
+        march, february = monthly_totals(self.user)
+        self.assertIsNone(march['win_rate_per_hour'])
+        self.assertEqual(february['win_rate_per_hour'], 100)
+        self.assertEqual(overall_totals(self.user, stakes='25')['overall_hourly_rate'], 0)
+
+    def test_data_version_follows_edits(self):
+        session = self.session()
+        before = data_version(self.user)
+        session.cash_out = 900
+        session.save()
+        self.assertNotEqual(data_version(self.user), before)
+        self.assertEqual(data_version(self.villain), '0-0.000000')
+
+
+class PlayerSearchTests(TestCase):
+    """Player search must follow profile and tag writes, with or without Postgres."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher')
+        cls.hat = PlayerProfile.objects.create(display_name='Hat Guy', summary='Never bluffs river')
+        cls.mike = PlayerProfile.objects.create(display_name='Mike', description='Sits with a hat guy on weekends')
+
+    def names(self, q):
+        return [p.display_name for p in search_players(PlayerProfile.objects.order_by('display_name'), q)]
+
+    def test_matches_each_field(self):
+        self.assertEqual(self.names('bluffs'), ['Hat Guy'])
+        self.assertEqual(self.names('weekends'), ['Mike'])
+        self.assertEqual(self.names('nobody'), [])
+
+    def test_blank_query_keeps_the_list(self):
+        self.assertEqual(self.names('  '), ['Hat Guy', 'Mike'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'ranking needs full-text search')
+    def test_name_outranks_description(self):
+        self.assertEqual(self.names('hat guy'), ['Hat Guy', 'Mike'])
+
+    def test_description_edit_is_searchable(self):
+        self.hat.description = 'Red cap, sunglasses'
+        self.hat.save()
+        self.assertEqual(self.names('sunglasses'), ['Hat Guy'])
+
+    def test_tag_add_rename_clear_and_delete(self):
+        tag = PlayerTag.objects.create(name='station')
+        self.hat.tags.add(tag)
+        self.assertEqual(self.names('station'), ['Hat Guy'])
+
+        tag.name = 'maniac'
+        tag.save()
+        self.assertEqual(self.names('station'), [])
+        self.assertEqual(self.names('maniac'), ['Hat Guy'])
+
+        tag.players.clear()
+        self.assertEqual(self.names('maniac'), [])
+
+        self.mike.tags.add(tag)
+        tag.delete()
+        self.assertEqual(self.names('maniac'), [])
+
+    def test_bulk_created_profiles_after_refresh(self):
+        # bulk_create sends no signals, as in generate_load_data
+        PlayerProfile.objects.bulk_create([PlayerProfile(display_name='Nit', summary='Folds everything')])
+        refresh_search_vectors()
+        self.assertEqual(self.names('folds'), ['Nit'])
+
+    def test_list_view_filters_by_query(self):
+        self.client.force_login(self.user)
+        with plain_static_storage:
+            response = self.client.get(reverse('poker:player_list'), {'q': 'bluffs'})
+        self.assertEqual([p.display_name for p in response.context['players']], ['Hat Guy'])
+
+
+class TypeaheadFreshnessTests(TestCase):
+    """The in-process prefix indexes must follow every write, signalled or not."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bike = Casino.objects.create(name='Bike')
+        cls.commerce = Casino.objects.create(name='Commerce')
+
+    def setUp(self):
+        typeahead._indexes.clear()
+
+    def names(self, q, casino_id=None):
+        return [(p['display_name'], p['here']) for p in typeahead.typeahead(q, casino_id)]
+
+    def test_save_move_and_delete(self):
+        player = PlayerProfile.objects.create(display_name='Hat Guy', casino=self.bike)
+        self.assertEqual(self.names('hat', self.bike.pk), [('Hat Guy', True)])
+
+        player.casino = self.commerce
+        player.save()
+        self.assertEqual(self.names('hat', self.bike.pk), [('Hat Guy', False)])
+        self.assertEqual(self.names('hat', self.commerce.pk), [('Hat Guy', True)])
+
+        player.delete()
+        self.assertEqual(self.names('hat', self.commerce.pk), [])
+
+    def test_bulk_writes_are_picked_up(self):
+        self.assertEqual(self.names('mike', self.bike.pk), [])
+        # bulk_create sends no signals, as in generate_load_data
+        PlayerProfile.objects.bulk_create([PlayerProfile(display_name='Mike', casino=self.bike)])
+        self.assertEqual(self.names('mike', self.bike.pk), [('Mike', True)])
+
+        PlayerProfile.objects.filter(display_name='Mike').delete()
+        self.assertEqual(self.names('mike'), [])
+
+    def test_one_query_when_indexes_are_warm(self):
+        PlayerProfile.objects.create(display_name='Hat Guy', casino=self.bike)
+        self.names('hat', self.bike.pk)
+        with self.assertNumQueries(1):
+            self.names('ha', self.bike.pk)
+
+
+class SyncEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice')
+        cls.bob = User.objects.create_user('bob')
+        cls.player = PlayerProfile.objects.create(display_name='Hat Guy')
+
+    def sync(self, user, *keys):
+        self.client.force_login(user)
+        events = [
+            {'key': key, 'type': 'tendency', 'player': self.player.pk, 'metric': 'cbet_flop', 'street': 'flop'}
+            for key in keys
+        ]
+        response = self.client.post(reverse('poker:sync_events'), json.dumps({'events': events}),
+                                    content_type='application/json')
+        return [result['status'] for result in response.json()['results']]
+
+    def test_keys_are_scoped_per_user(self):
+        self.assertEqual(self.sync(self.alice, 'k1', 'k2'), ['applied', 'applied'])
+        # The same keys from another phone are that user's own events
+        self.assertEqual(self.sync(self.bob, 'k1'), ['applied'])
+        # A replayed queue is only recognised within the same user's ledger
+        self.assertEqual(self.sync(self.alice, 'k1', 'k3'), ['duplicate', 'applied'])
+        self.assertEqual(
+            sorted(SyncedEvent.objects.values_list('user__username', 'key')),
+            [('alice', 'k1'), ('alice', 'k2'), ('alice', 'k3'), ('bob', 'k1')],
+        )
+        self.assertEqual(PlayerTendency.objects.get(player=self.player).sample_size, 4)
+
+
+class ReadScoreTests(TestCase):
+    """Read scores decay from the last press or observation, not the last edit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('scorer')
+        cls.player = PlayerProfile.objects.create(display_name='Hat Guy')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def observe(self, **kwargs):
+        values = dict(player=self.player, street='flop', action='c-bet', reliability=4)
+        values.update(kwargs)
+        return PlayerObservation.objects.create(**values)
+
+    def evidence(self):
+        self.player.refresh_from_db()
+        return self.player.read_evidence
+
+    def test_observations_halve_every_half_life(self):
+        self.observe(happened_at=timezone.now() - timedelta(days=90))
+        self.assertAlmostEqual(self.evidence(), 0.5, places=3)
+        self.observe()
+        self.assertAlmostEqual(self.evidence(), 1.5, places=3)
+
+    def test_edit_does_not_renew_a_tendency(self):
+        tendency = PlayerTendency.objects.create(player=self.player, metric='cbet_flop', street='flop',
+                                                 sample_size=4, confidence=5)
+        PlayerTendency.objects.filter(pk=tendency.pk).update(last_pressed=timezone.now() - timedelta(days=90))
+        rescore_players([self.player.pk])
+        self.assertAlmostEqual(self.evidence(), 2, places=3)
+
+        form = PlayerTendencyEditForm({'sample_size': 4, 'confidence': 5, 'note': 'Checked again'},
+                                      instance=PlayerTendency.objects.get(pk=tendency.pk))
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertAlmostEqual(self.evidence(), 2, places=3)
+
+        self.client.post(reverse('poker:tendency_press', args=[self.player.pk]),
+                         {'metric': 'cbet_flop', 'street': 'flop'})
+        self.assertAlmostEqual(self.evidence(), 5, places=3)
+
+    def test_sync_renews_presses(self):
+        self.client.post(reverse('poker:exploit_press', args=[self.player.pk]), {'name': 'Overfolds river'})
+        PlayerExploit.objects.update(last_pressed=timezone.now() - timedelta(days=90))
+        rescore_players([self.player.pk])
+        self.assertAlmostEqual(self.evidence(), 0.5, places=3)
+
+        apply_events(self.user, [
+            {'key': 'e1', 'type': 'exploit', 'player': self.player.pk, 'name': 'Overfolds river'},
+        ])
+        exploit = PlayerExploit.objects.get()
+        self.assertEqual(exploit.strength, 2)
+        self.assertAlmostEqual(self.evidence(), 2, places=3)
+        self.assertGreater(exploit.score, 0)
+
+    def test_delete_rescores(self):
+        observation = self.observe(reliability=5)
+        self.player.refresh_from_db()
+        self.assertGreater(self.player.read_score, 0)
+        observation.delete()
+        self.assertEqual(self.evidence(), 0)
+
+    def test_bulk_create_then_rescore_all(self):
+        PlayerObservation.objects.bulk_create([
+            PlayerObservation(player=self.player, street='flop', action='c-bet', reliability=5)
+            for _ in range(5)
+        ])
+        self.assertEqual(self.evidence(), 0)
+        rescore_all()
+        self.assertAlmostEqual(self.evidence(), 5, places=3)
+
+    def test_profile_delete_does_not_rescore_each_cascaded_row(self):
+        player = PlayerProfile.objects.create(display_name='Leaving')
+        PlayerObservation.objects.bulk_create([
+            PlayerObservation(player=player, street='flop', action='c-bet', reliability=3)
+            for _ in range(300)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            player.delete()
+        self.assertLess(len(queries), 20)
+
+
+class PeriodParamTests(TestCase):
+    """Bad ?year=/?month= values fall back to the current month instead of erroring."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_session_list_ignores_invalid_period(self):
+        today = timezone.now()
+        for query in ({'month': '13'}, {'month': 'abc'}, {'year': '99999'}, {'year': '0', 'month': '0'}):
+            response = self.client.get(reverse('poker:session_list'), query)
+            self.assertEqual(response.status_code, 200, query)
+            self.assertEqual((response.context['requested_year'], response.context['requested_month']),
+                             (today.year, today.month), query)
+
+    def test_session_detail_by_month_404s_on_invalid_month(self):
+        url = reverse('poker:session_detail_by_month', args=[2025, 13])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = reverse('poker:session_detail_by_month', args=[2025, 2])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        cls.villain = User.objects.create_user('villain')
+        bike = Casino.objects.create(name='Bike')
+        # Several sessions share a date, so the id tiebreak matters
+        days = [date(2024, 3, 1), date(2024, 3, 1), date(2024, 3, 1), date(2024, 2, 10), date(2024, 2, 10)]
+        cls.sessions = [
+            PokerSession.objects.create(player=cls.user, casino=bike, stakes='25', date=day,
+                                        hours=4, buy_in=500, cash_out=600)
+            for day in days
+        ]
+        PokerSession.objects.create(player=cls.villain, casino=bike, stakes='25', date=date(2024, 3, 1),
+                                    hours=1, buy_in=100, cash_out=0)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        queryset = PokerSession.objects.filter(player=self.user)
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(queryset, cursor, per_page=2)
+            seen.extend(rows)
+            if cursor is None:
+                break
+        expected = sorted(self.sessions, key=lambda s: (s.date, s.pk), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        rows, cursor = keyset_page(PokerSession.objects.filter(player=self.user), None, per_page=5)
+        self.assertEqual((len(rows), cursor), (5, None))
+
+    def test_malformed_cursor_means_first_page(self):
+        self.assertIsNone(decode_cursor('yesterday_12'))
+        self.assertIsNone(decode_cursor('2024-03-01'))
+        self.assertEqual(decode_cursor('2024-03-01_7'), (date(2024, 3, 1), 7))
+        first, _ = keyset_page(PokerSession.objects.filter(player=self.user), 'garbage', per_page=2)
+        self.assertEqual(first, keyset_page(PokerSession.objects.filter(player=self.user), None, per_page=2)[0])
+
+    def test_session_list_filters_and_carries_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('poker:session_list'),
+                                   {'start': '2024-02-01', 'end': '2024-03-31', 'stakes': '25'})
+        self.assertEqual(response.context['period'], 'range')
+        self.assertEqual(response.context['session_count'], 5)
+        self.assertEqual(response.context['overall_total'], 500)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(list(response.context['sessions']),
+                         sorted(self.sessions, key=lambda s: (s.date, s.pk), reverse=True))
+
+
+class BankrollAnalyticsTests(SimpleTestCase):
+    def test_max_drawdown_counts_the_start_as_a_peak(self):
+        # 0 -> -50 -> 100 -> 20 -> 150: the worst drop is 100 -> 20
+        self.assertEqual(max_drawdown(np.array([-50.0, 100.0, 20.0, 150.0])), (80.0, 1, 2))
+        # Losing from the very first session is measured from the starting 0
+        self.assertEqual(max_drawdown(np.array([-30.0, -10.0])), (30.0, 0, 0))
+        self.assertEqual(max_drawdown(np.array([10.0, 20.0])), (0.0, None, None))
+        self.assertEqual(max_drawdown(np.array([])), (0.0, None, None))
+
+    def test_rolling_rate_uses_trailing_window_and_skips_zero_hours(self):
+        profit = np.array([100.0, 0.0, -40.0, 60.0])
+        hours = np.array([2.0, 0.0, 2.0, 4.0])
+        np.testing.assert_allclose(rolling_hourly_rate(profit, hours, window=2), [50.0, 50.0, -20.0, 3.33333333])
+        np.testing.assert_allclose(rolling_hourly_rate(np.array([5.0]), np.array([0.0])), [0.0])
+
+    def test_stdev_per_hour_is_hour_weighted(self):
+        profit = np.array([100.0, -100.0])
+        hours = np.array([4.0, 1.0])
+        # win rate 0: (100^2/4 + 100^2/1) / 1
+        self.assertAlmostEqual(stdev_per_hour(profit, hours), math.sqrt(12500))
+        self.assertEqual(stdev_per_hour(np.array([50.0, 10.0]), np.array([5.0, 0.0])), 0.0)
+
+    def test_bootstrap_ci_is_seeded_and_brackets_the_win_rate(self):
+        rng = np.random.default_rng(1)
+        hours = rng.integers(2, 8, 300).astype(float)
+        profit = rng.normal(15, 100, 300) * hours
+        low, high = bootstrap_win_rate_ci(profit, hours, samples=500, seed=3)
+        self.assertLess(low, profit.sum() / hours.sum())
+        self.assertGreater(high, profit.sum() / hours.sum())
+        self.assertEqual((low, high), bootstrap_win_rate_ci(profit, hours, samples=500, seed=3))
+        self.assertEqual(bootstrap_win_rate_ci(profit[:1], hours[:1]), (None, None))
+
+
+@plain_static_storage
+class BankrollSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        bike = Casino.objects.create(name='Bike')
+        for day, stakes, profit in [(date(2024, 1, 5), '13', 300), (date(2024, 2, 5), '25', -200),
+                                    (date(2024, 3, 5), '25', 500)]:
+            PokerSession.objects.create(player=cls.user, casino=bike, stakes=stakes, date=day,
+                                        hours=5, buy_in=1000, cash_out=1000 + profit)
+
+    def test_stats_follow_the_chart_filters(self):
+        self.client.force_login(self.user)
+        stats = self.client.get(reverse('poker:all_sessions_chart')).context['stats']
+        self.assertEqual((stats['sessions'], stats['total_profit']), (3, 600.0))
+
+        response = self.client.get(reverse('poker:all_sessions_chart'), {'stakes': '25', 'start': '2024-02-01'})
+        stats = response.context['stats']
+        self.assertEqual((stats['sessions'], stats['total_profit'], stats['max_drawdown']), (2, 300.0, 200.0))
+        self.assertIn('stakes=25', response.context['chart_url'])
+
+    def test_bad_dates_are_ignored(self):
+        stats = bankroll_summary(self.user, chart_filters({'start': 'soon', 'end': '2024-02-28'}))
+        self.assertEqual(stats['sessions'], 2)
+
+
+class SimulateBankrollTests(SimpleTestCase):
+    def test_winning_sessions_never_go_broke(self):
+        result = simulate_bankroll([100, 50, 200], [4, 4, 4], 1000, 2000, sessions_ahead=50, paths=500, seed=1)
+        self.assertEqual(result['risk_of_ruin'], 0.0)
+        self.assertEqual(result['target_probability'], 1.0)
+        self.assertLessEqual(result['sessions_to_target']['95'], 50)
+        self.assertEqual(result['hours_per_session'], 4.0)
+
+    def test_ruined_paths_stay_at_zero(self):
+        result = simulate_bankroll([-300, 100], [5, 5], 500, 5000, sessions_ahead=200, paths=2000, seed=2)
+        self.assertGreater(result['risk_of_ruin'], 0.9)
+        self.assertEqual(result['final_bankroll']['50'], 0.0)
+        self.assertEqual(result['target_probability'], 0.0)
+        self.assertEqual(result['sessions_to_target'], {})
+
+    def test_same_seed_same_result(self):
+        args = ([120, -80, 40, -200, 300], [5, 4, 6, 3, 8], 2000, 4000, 300, 3000)
+        self.assertEqual(simulate_bankroll(*args, seed=7), simulate_bankroll(*args, seed=7))
+
+    def test_chunking_keeps_every_path(self):
+        with mock.patch('poker.analytics.SIMULATION_CHUNK_CELLS', 100):
+            result = simulate_bankroll([10, -5], [1, 1], 100, 200, sessions_ahead=30, paths=250, seed=3)
+        self.assertEqual(result['paths'], 250)
+        self.assertEqual(len(result['bands']['50']), 30)
+
+    def test_no_sessions(self):
+        with self.assertRaises(ValueError):
+            simulate_bankroll([], [], 100, 200, 10, 10)
+
+
+class SimulationDispatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        cls.bike = Casino.objects.create(name='Bike')
+        for profit in (300, -100, 50):
+            PokerSession.objects.create(player=cls.user, casino=cls.bike, stakes='25', date=date(2024, 3, 5),
+                                        hours=5, buy_in=500, cash_out=500 + profit)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        patcher = mock.patch('poker.views.run_bankroll_simulation.delay')
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request_run(self):
+        self.client.post(reverse('poker:simulation_create'), {
+            'stakes': '25', 'starting_bankroll': 1000, 'target_bankroll': 3000,
+            'sessions_ahead': 100, 'paths': 1000,
+        })
+        return BankrollSimulation.objects.get(player=self.user)
+
+    def test_pending_run_is_sent_once_until_it_looks_lost(self):
+        simulation = self.request_run()
+        self.request_run()
+        self.client.get(reverse('poker:simulation_status', args=[simulation.pk]))
+        self.assertEqual(self.delay.call_count, 1)
+
+        # The message was lost: after a while the next request re-sends it
+        BankrollSimulation.objects.filter(pk=simulation.pk).update(
+            dispatched=timezone.now() - timedelta(minutes=10),
+        )
+        self.client.get(reverse('poker:simulation_status', args=[simulation.pk]))
+        self.assertEqual(self.delay.call_count, 2)
+
+    def test_failed_run_is_retried(self):
+        simulation = self.request_run()
+        BankrollSimulation.objects.filter(pk=simulation.pk).update(status=BankrollSimulation.Status.FAILED)
+        self.request_run()
+        self.assertEqual(self.delay.call_count, 2)
+        simulation.refresh_from_db()
+        self.assertEqual(simulation.status, BankrollSimulation.Status.PENDING)
+
+    def test_task_simulates_the_hashed_snapshot(self):
+        simulation = self.request_run()
+        # Sessions added after the request don't leak into this run's result
+        PokerSession.objects.create(player=self.user, casino=self.bike, stakes='25', date=date(2024, 3, 6),
+                                    hours=5, buy_in=500, cash_out=5000)
+        run_bankroll_simulation(simulation.pk)
+        simulation.refresh_from_db()
+        self.assertEqual(simulation.status, BankrollSimulation.Status.DONE)
+        self.assertEqual(simulation.result['sample_size'], 3)
+        self.assertAlmostEqual(simulation.result['mean_profit'], 250 / 3)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        cls.villain = User.objects.create_user('villain')
+        cls.bike = Casino.objects.create(name='Bike')
+        cls.sessions = [
+            PokerSession.objects.create(player=cls.user, casino=cls.bike, stakes='25', date=date(2024, 3, day),
+                                        hours=4, buy_in=500, cash_out=500 + day, notes='table, "seat" 3')
+            for day in (9, 2, 5)
+        ]
+        PokerSession.objects.create(player=cls.villain, casino=cls.bike, stakes='25', date=date(2024, 3, 1),
+                                    hours=4, buy_in=500, cash_out=0)
+        Hands.objects.create(session=cls.sessions[0], hero=cls.user, result='W')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_csv_quotes_fields_and_orders_by_date(self):
+        rows = list(csv.reader(io.StringIO(''.join(export_lines('sessions', self.user, 'csv')))))
+        self.assertEqual(tuple(rows[0]), SESSION_FIELDS)
+        self.assertEqual([row[1] for row in rows[1:]], ['2024-03-02', '2024-03-05', '2024-03-09'])
+        self.assertEqual(rows[1][SESSION_FIELDS.index('notes')], 'table, "seat" 3')
+        self.assertEqual(rows[1][SESSION_FIELDS.index('casino__name')], 'Bike')
+
+    def test_ndjson_is_one_object_per_line(self):
+        lines = list(export_lines('sessions', self.user, 'ndjson'))
+        self.assertEqual(len(lines), 3)
+        first = json.loads(lines[0])
+        self.assertEqual(first['date'], '2024-03-02')
+        self.assertEqual(first['cash_out'], 502)
+        self.assertEqual(first['casino__name'], 'Bike')
+
+    def test_small_chunks_return_every_row_once(self):
+        with mock.patch('poker.exports.EXPORT_CHUNK_SIZE', 1):
+            ids = [row['id'] for row in export_rows('sessions', self.user)]
+        self.assertEqual(sorted(ids), sorted(s.pk for s in self.sessions))
+
+    def test_hands_export_leaves_out_the_player(self):
+        rows = list(export_rows('hands', self.user))
+        self.assertEqual(len(rows), 1)
+        self.assertNotIn('hero_id', rows[0])
+        self.assertEqual(rows[0]['session_id'], self.sessions[0].pk)
+        self.assertEqual(list(export_rows('hands', self.villain)), [])
+
+    def test_view_streams_only_the_players_rows(self):
+        response = self.client.get(reverse('poker:export_data', args=['sessions']), {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('.ndjson"', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_view_404s_on_unknown_export_or_format(self):
+        self.assertEqual(self.client.get(reverse('poker:export_data', args=['bankroll'])).status_code, 404)
+        response = self.client.get(reverse('poker:export_data', args=['sessions']), {'format': 'xml'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_command_writes_to_stdout(self):
+        out = io.StringIO()
+        call_command('export_poker_data', 'sessions', user='hero', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+        with self.assertRaises(CommandError):
+            call_command('export_poker_data', 'sessions', user='nobody')
+
+
+class SessionImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hero')
+        cls.bike = Casino.objects.create(name='Bike')
+
+    def rows(self, **kwargs):
+        values = dict(date='2024-03-05', stakes='2/5', casino='Bike', hours='4', buy_in='500', cash_out='800')
+        values.update(kwargs)
+        return values
+
+    def test_read_rows_reports_bad_lines_and_keeps_going(self):
+        ndjson = io.StringIO('{"date": "2024-03-05"}\n\nnot json\n{"date": "2024-03-06"}\n')
+        rows = list(read_rows(ndjson, 'ndjson'))
+        self.assertEqual([type(row) for row in rows], [dict, ImportRowError, dict])
+        self.assertIsInstance(list(read_rows(io.StringIO('{"date": 1}'), 'json'))[0], ImportRowError)
+        self.assertEqual(list(read_rows(io.StringIO('date,stakes\n2024-03-05,25\n'), 'csv')),
+                         [{'date': '2024-03-05', 'stakes': '25'}])
+        with self.assertRaises(ValueError):
+            list(read_rows(io.StringIO(''), 'xml'))
+
+    def test_parse_accepts_labels_codes_and_casino_case(self):
+        casinos = CasinoMap()
+        session = parse_session(self.rows(casino=' bike ', stakes='25', hours=''), self.user, casinos)
+        self.assertEqual((session.casino_id, session.stakes, session.hours), (self.bike.pk, '25', 0))
+        for bad in (dict(date='03/05/2024'), dict(stakes='9/9'), dict(buy_in='lots'), dict(cash_out=''),
+                    dict(casino='')):
+            with self.assertRaises(ImportRowError):
+                parse_session(self.rows(**bad), self.user, casinos)
+
+    def test_duplicates_in_file_and_table_are_skipped(self):
+        first = import_sessions(self.user, [self.rows(), self.rows(), self.rows(cash_out='0')])
+        self.assertEqual((first['created'], first['duplicates']), (2, 1))
+        again = import_sessions(self.user, [self.rows(), self.rows(date='2024-03-06')])
+        self.assertEqual((again['created'], again['duplicates']), (1, 1))
+        self.assertEqual(PokerSession.objects.filter(player=self.user).count(), 3)
+
+    def test_errors_are_counted_with_row_numbers(self):
+        result = import_sessions(self.user, [self.rows(), self.rows(stakes='9/9'), ImportRowError('bad JSON')])
+        self.assertEqual((result['created'], result['errors']), (1, 2))
+        self.assertEqual(result['messages'], ["Row 2: unknown stakes '9/9'", 'Row 3: bad JSON'])
+
+    def test_unknown_casino_is_created_once(self):
+        import_sessions(self.user, [self.rows(casino='Hustler'), self.rows(casino='HUSTLER', cash_out='0')])
+        self.assertEqual(Casino.objects.filter(name__iexact='hustler').count(), 1)
+
+    def test_batches_refresh_the_rollups(self):
+        rows = [self.rows(date=f'2024-{month:02d}-0{day}', cash_out=str(500 + day))
+                for month in (1, 2) for day in (1, 2, 3)]
+        for limit in (REFRESH_BUCKET_LIMIT, 0):  # per-bucket refresh, then a full rebuild
+            PokerSession.objects.filter(player=self.user).delete()
+            with mock.patch('poker.imports.REFRESH_BUCKET_LIMIT', limit):
+                import_sessions(self.user, rows, batch_size=4)
+            self.assertEqual(
+                sorted(PokerMonthlyRollup.objects.filter(player=self.user).values_list('month', 'profit', 'session_count')),
+                [(date(2024, 1, 1), 6, 3), (date(2024, 2, 1), 6, 3)],
+            )
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('sessions.csv', b'date,stakes,casino,hours,buy_in,cash_out\n2024-03-05,2/5,Bike,4,500,800\n')
+        response = self.client.post(reverse('poker:import_sessions'), {'file': upload})
+        self.assertRedirects(response, f"{reverse('poker:session_list')}?period=all", fetch_redirect_response=False)
+        self.assertEqual(PokerSession.objects.get(player=self.user).win_loss, 300)
 
-# Create your tests here.
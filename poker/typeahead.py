@@ -0,0 +1,110 @@
+import re
+from bisect import bisect_left
+
+from django.db.models import Count, Max, Q
+
+from .models import PlayerProfile
+
+TYPEAHEAD_LIMIT = 8
+
+# Index key for every player regardless of casino
+ALL_CASINOS = '*'
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Built indexes live in this process, keyed by a version read from the
+# profiles themselves, so every worker notices a change from any other worker,
+# the admin or a bulk load without being told.
+_indexes = {}
+
+
+def tokens(text):
+    """Lowercase word tokens plus the run-together form ("Hat-Guy" -> hat, guy, hatguy)."""
+    words = _TOKEN.findall((text or '').lower())
+    if len(words) > 1:
+        words.append(''.join(words))
+    return words
+
+
+def _versions(casino_id=None):
+    """
+    (row count, latest PlayerProfile.updated) for every player and, if given,
+    for one casino, in a single aggregate query. A save bumps `updated`, a
+    delete drops the count and a move between casinos does both, so a
+    changed version means a stale index.
+    """
+    aggregates = {'all_count': Count('pk'), 'all_updated': Max('updated')}
+    if casino_id is not None:
+        here = Q(casino_id=casino_id)
+        aggregates.update(here_count=Count('pk', filter=here), here_updated=Max('updated', filter=here))
+    row = PlayerProfile.objects.aggregate(**aggregates)
+    versions = {ALL_CASINOS: (row['all_count'], row['all_updated'])}
+    if casino_id is not None:
+        versions[casino_id] = (row['here_count'], row['here_updated'])
+    return versions
+
+
+class PrefixIndex:
+    """
+    Sorted (token, player id) pairs for one casino; a prefix lookup is a
+    bisect plus a short forward scan, with no database access.
+    """
+    def __init__(self, players):
+        self.players = {}
+        entries = set()
+        for pk, name, summary in players:
+            self.players[pk] = {'pk': pk, 'display_name': name, 'summary': summary}
+            entries.update((token, pk) for token in tokens(name))
+        self.entries = sorted(entries)
+        self.keys = [token for token, _ in self.entries]
+
+    def _with_prefix(self, prefix):
+        matches = set()
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[i].startswith(prefix):
+                break
+            matches.add(self.entries[i][1])
+        return matches
+
+    def search(self, q):
+        words = _TOKEN.findall(q.lower())
+        if not words:
+            return []
+        # Every typed word has to prefix some word of the name
+        matches = self._with_prefix(words[0])
+        for word in words[1:]:
+            matches &= self._with_prefix(word)
+        first = words[0]
+        return sorted(
+            (self.players[pk] for pk in matches),
+            key=lambda p: (not p['display_name'].lower().startswith(first), p['display_name'].lower()),
+        )
+
+
+def prefix_index(casino_key, version):
+    cached = _indexes.get(casino_key)
+    if cached is None or cached[0] != version:
+        players = PlayerProfile.objects.all()
+        if casino_key != ALL_CASINOS:
+            players = players.filter(casino_id=casino_key)
+        index = PrefixIndex(players.values_list('pk', 'display_name', 'summary'))
+        _indexes[casino_key] = cached = (version, index)
+    return cached[1]
+
+
+def typeahead(q, casino_id=None, limit=TYPEAHEAD_LIMIT):
+    """
+    Top `limit` players whose name words start with what was typed. Players
+    from `casino_id` come first; the rest is filled from everyone else.
+    """
+    versions = _versions(casino_id)
+    results = []
+    if casino_id is not None:
+        results = [dict(p, here=True) for p in prefix_index(casino_id, versions[casino_id]).search(q)[:limit]]
+    seen = {p['pk'] for p in results}
+    for player in prefix_index(ALL_CASINOS, versions[ALL_CASINOS]).search(q):
+        if len(results) >= limit:
+            break
+        if player['pk'] not in seen:
+            results.append(dict(player, here=False))
+    return results
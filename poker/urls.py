@@ -6,24 +6,25 @@ from django.conf import settings
 from poker.views import (add_session, 
                          session_list, 
                          session_detail,
-                         all_sessions, 
                          session_list_by_month, 
                          session_detail_by_month,
                          edit_session,
                          overall_chart,
-                         session_list_25,
-                         session_list_13,
+                         chart_data,
                          homepage_view,
                          chart_25,
                          session_hands,
                          all_sessions_chart, 
-                         player_list, 
+                         export_data, import_sessions_upload,
+                         simulation_create, simulation_detail, simulation_status,
+                         player_list, player_typeahead,
                          player_create,
                          player_detail, player_update, player_delete,
                          observation_create, observation_update, observation_delete,
                          observation_quick_add,
                          tendency_create, tendency_update, tendency_delete, tendency_press,
-                         exploit_press, exploit_update, exploit_delete      
+                         exploit_press, exploit_update, exploit_delete,
+                         sync_events,
                          )
 
 
@@ -34,17 +35,25 @@ urlpatterns = [
     path('sessions/', session_list, name='session_list'),
     path('sessions/add/', add_session, name='add_session'),
     path('session_detail/<int:session_id>/', session_detail, name='session_detail'),
-    path('all_sessions/', all_sessions, name='all_sessions'),
+    path('all_sessions/', session_list, {'period': 'all'}, name='all_sessions'),
     path('sessions-by-month/', session_list_by_month, name='session_list_by_month'),
     path('sessions-by-month/<int:year>/<int:month>/', session_detail_by_month, name='session_detail_by_month'),
     path('session/edit/<int:session_id>/', edit_session, name='edit_session'),
     path('chart/', overall_chart, name='overall_chart'),
-    path('25_sessions/', session_list_25, name='session_list_25'),
-    path('13_sessions/', session_list_13, name='session_list_13'),
+    path('chart/data/', chart_data, name='chart_data'),
+    path('chart/data/<slug:name>/', chart_data, name='chart_data_named'),
+    path('25_sessions/', session_list, {'default_stakes': '25'}, name='session_list_25'),
+    path('13_sessions/', session_list, {'default_stakes': '13'}, name='session_list_13'),
     path('chart_25/', chart_25, name='chart_25'),
     path('hands/', session_hands, name='session_hands'),
     path('all_sessions_chart/', all_sessions_chart, name='all_sessions_chart'),
+    path('sessions/import/', import_sessions_upload, name='import_sessions'),
+    path('export/<slug:name>/', export_data, name='export_data'),
+    path('simulations/', simulation_create, name='simulation_create'),
+    path('simulations/<int:pk>/', simulation_detail, name='simulation_detail'),
+    path('simulations/<int:pk>/status/', simulation_status, name='simulation_status'),
     path("player/", player_list, name="player_list"),
+    path("player/typeahead/", player_typeahead, name="player_typeahead"),
     path("player/add/", player_create, name="player_create"),
     path("player/<int:pk>/", player_detail, name="player_detail"),
     path("player/<int:pk>/edit/", player_update, name="player_update"),
@@ -61,6 +70,7 @@ urlpatterns = [
     path("tendencies/<int:pk>/delete/", tendency_delete, name="tendency_delete"),
     path("player/<int:player_pk>/tendencies/press/", tendency_press, name="tendency_press"),
     path("player/<int:player_pk>/exploits/press/", exploit_press, name="exploit_press"),
+    path("sync/", sync_events, name="sync_events"),
     path("exploits/<int:pk>/edit/", exploit_update, name="exploit_update"),
     path("exploits/<int:pk>/delete/", exploit_delete, name="exploit_delete"),
 ] 
@@ -1,20 +1,34 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import PokerSession,PlayerProfile, PlayerObservation, PlayerTendency, PlayerProfile, PlayerTendency, ExploitTag, PlayerExploit
+from .models import BankrollSimulation, PokerSession, Casino, PlayerProfile, PlayerObservation, PlayerTendency, PlayerProfile, PlayerTendency, ExploitTag, PlayerExploit
 from hands.models import Hands
-from .forms import PokerSessionForm, DateForm, PlayerProfileForm, PlayerObservationForm, PlayerTendencyForm, PlayerTendencyEditForm, PlayerExploitEditForm
+from .forms import PokerSessionForm, DateForm, PlayerProfileForm, PlayerObservationForm, PlayerTendencyForm, PlayerTendencyEditForm, PlayerExploitEditForm, BankrollSimulationForm, SessionImportForm
 from django.utils import timezone
-from django.db.models import Sum, ExpressionWrapper, F, DurationField
-from django.db.models.functions import TruncMonth
+from django.db.models import Sum, Count, ExpressionWrapper, F, DurationField
 from django.contrib.auth.decorators import login_required
-from plotly.offline import plot
-from plotly import graph_objs as go
-import plotly.express as px
-import pandas as pd
 from calendar import month_name
-from django.db.models import Q
+from datetime import date, timedelta
 from django.contrib import messages
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+import hashlib
+import io
+import json
+from urllib.parse import urlencode
 from django.urls import reverse
 from .presets import TENDENCY_PRESETS, EXPLOIT_PRESETS
+from .rollups import monthly_totals, overall_totals
+from .pagination import keyset_page
+from .charts import chart_filters, chart_json, CHART_BUILDERS
+from .analytics import bankroll_summary, session_arrays
+from .tasks import run_bankroll_simulation, simulation_sessions
+from .imports import import_sessions, read_rows
+from .exports import EXPORTS, EXPORT_FORMATS, export_lines
+from .search import search_players
+from .typeahead import typeahead
+from .reinforce import reinforce_exploit, reinforce_tendency
+from .sync import MAX_SYNC_EVENTS, apply_events
+from .scoring import rescore_players
+from .fields import STAKES_CHOICES
+from thisisus.dates import month_filter, valid_month, valid_year
 
 
 
@@ -22,10 +36,8 @@ from .presets import TENDENCY_PRESETS, EXPLOIT_PRESETS
 @login_required
 def session_detail(request, session_id):
     session = get_object_or_404(PokerSession, id=session_id, player=request.user)
-    try:
-        hands = Hands.objects.get(session_id=session_id)
-    except Hands.DoesNotExist:
-        hands = None  # Set hands to None if no hands are found for the session
+    # The page only links to the session's hands; get() raised once there were two
+    hands = Hands.objects.filter(session_id=session_id).exists()
 
     context = {
         "session": session,
@@ -67,57 +79,99 @@ def add_session(request):
 
     return render(request, 'poker/add_session.html', {'form': form})
 
+SESSIONS_PER_PAGE = 50
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
 @login_required
-def session_list(request):
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    requested_month = int(request.GET.get('month', current_month))
-    requested_year = int(request.GET.get('year', current_year))
+def session_list(request, default_stakes=None, period='month'):
+    """
+    One session list for every stakes/casino/date combination.
 
-    
-    sessions = PokerSession.objects.filter(player=request.user, date__month=requested_month, date__year=requested_year)
-    overall_total = sum(session.win_loss for session in sessions)
-    overall_hours = sum(session.hours for session in sessions)
+    Filters (all optional, GET): stakes, casino, start/end (ISO dates) or
+    month/year, period=all to drop the default current-month window.
+    Pages with a keyset cursor (?after=) and totals the whole filtered set
+    with a single aggregate.
+    """
+    today = timezone.now()
+    current_month = today.month
+    current_year = today.year
+
+    stakes = request.GET.get('stakes', default_stakes) or ''
+    casino = request.GET.get('casino') or ''
+    start = _parse_date(request.GET.get('start'))
+    end = _parse_date(request.GET.get('end'))
+    period = request.GET.get('period', period)
+    requested_month = valid_month(request.GET.get('month')) or current_month
+    requested_year = valid_year(request.GET.get('year')) or current_year
+
+    sessions = PokerSession.objects.filter(player=request.user).select_related('casino')
+    if stakes:
+        sessions = sessions.filter(stakes=stakes)
+    if casino.isdigit():
+        sessions = sessions.filter(casino_id=casino)
+    if start or end:
+        period = 'range'
+        if start:
+            sessions = sessions.filter(date__gte=start)
+        if end:
+            sessions = sessions.filter(date__lte=end)
+    elif period != 'all':
+        period = 'month'
+        sessions = sessions.filter(**month_filter('date', requested_year, requested_month))
+
+    overall_aggregate = sessions.aggregate(
+        total_win_loss=Sum(F('cash_out') - F('buy_in')),
+        total_hours=Sum('hours'),
+        session_count=Count('id'),
+    )
+    overall_total = overall_aggregate['total_win_loss'] or 0
+    overall_hours = overall_aggregate['total_hours'] or 0
     overall_hourly_rate = overall_total / overall_hours if overall_hours > 0 else 0
 
+    page, next_cursor = keyset_page(sessions, request.GET.get('after'), SESSIONS_PER_PAGE)
+
+    # Filters to carry over into the "next page" link
+    params = request.GET.copy()
+    params.pop('after', None)
+    params['period'] = period
+    if stakes:
+        params['stakes'] = stakes
+
     return render(request, 'poker/session_list.html', {
-        'sessions': sessions,
+        'sessions': page,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
+        'filter_query': params.urlencode(),
         'overall_hourly_rate': overall_hourly_rate,
         'overall_total': overall_total,
+        'overall_hours': overall_hours,
+        'session_count': overall_aggregate['session_count'],
         'current_month': current_month,
         'current_year': current_year,
+        'requested_month': requested_month,
+        'requested_year': requested_year,
+        'requested_stakes': stakes,
+        'requested_casino': casino,
+        'start': start,
+        'end': end,
+        'period': period,
+        'month_choices': [(i, month_name[i]) for i in range(1, 13)],
+        'stakes_choices': STAKES_CHOICES,
+        'casinos': Casino.objects.order_by('name'),
     })
-    
 
 
-@login_required
-def all_sessions(request):
-    sessions = PokerSession.objects.filter(player=request.user)
-    overall_total = sum(session.win_loss for session in sessions)
-    overall_hours = sum(session.hours for session in sessions)
-    overall_hourly_rate = overall_total / overall_hours if overall_hours > 0 else 0
-    return render(request, 'poker/all_sessions.html', {'sessions': sessions, 'overall_hourly_rate':overall_hourly_rate, 'overall_total': overall_total,})
-
 @login_required
 def session_list_by_month(request):
     stakes_filter = request.GET.get('stakes')
-    sessions = PokerSession.objects.filter(player=request.user)
-
-    if stakes_filter:
-        sessions = sessions.filter(stakes=stakes_filter)
-
-    sessions_by_month = sessions.annotate(
-        month=TruncMonth('date')
-    ).values('month').annotate(
-        total_profit=Sum('cash_out') - Sum('buy_in'),
-        total_hours=Sum('hours')
-    ).order_by('-month')
-
-    for session in sessions_by_month:
-        if session['total_hours']:
-            session['win_rate_per_hour'] = session['total_profit'] / session['total_hours']
-        else:
-            session['win_rate_per_hour'] = None
+    sessions_by_month = monthly_totals(request.user, stakes=stakes_filter)
 
     context = {
         'sessions_by_month': sessions_by_month,
@@ -127,9 +181,10 @@ def session_list_by_month(request):
 
 @login_required
 def session_detail_by_month(request, year, month):
+    if not (valid_year(year) and valid_month(month)):
+        raise Http404("No such month")
     sessions_in_month = PokerSession.objects.filter(player=request.user,
-        date__year=year,
-        date__month=month,
+        **month_filter('date', year, month),
     ).annotate(
         total_profit=Sum('cash_out') - Sum('buy_in')
     )
@@ -144,184 +199,47 @@ def session_detail_by_month(request, year, month):
 
 @login_required
 def overall_chart(request):
-    session =  PokerSession.objects.filter(player=request.user)
-    start = request.GET.get('start')
-    end = request.GET.get('end')
-    stakes = request.GET.get('stakes')
-    
-    if start:
-        session = session.filter(date__gte=start)
-    if end:
-        session = session.filter(date__lte=end)
-    if stakes:
-        session = session.filter(stakes=stakes)
-    
-    dates = [s.date for s in session]
-    win_losses = [s.win_loss for s in session]
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=win_losses,
-        mode='lines+markers',
-        name='Win/Loss'
-    ))
-    fig.update_layout(
-        title='Overall Stats',
-        xaxis_title='Date',
-        yaxis_title='Win/Loss'
-    )
-    fig.update_xaxes(tickangle=45, tickfont=dict(family='Rockwell', color='green', size=14))
-    fig.update_layout(title={
-        'font_size': 22,
-        'xanchor': 'center',
-
-        'x': 0.5
-    })
-    fig.update_layout(
-        autosize=True)
-    
-    chart = fig.to_html()
-        
-    context = {'chart': chart, 'form':DateForm}
+    chart_url = f"{reverse('poker:chart_data')}?{request.GET.urlencode()}"
+    context = {'chart_url': chart_url, 'form':DateForm}
     return render(request, 'poker/overall_chart.html', context)
-    
-@login_required
-def session_list_25(request):
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    requested_month = int(request.GET.get('month', current_month))
-    requested_year = int(request.GET.get('year', current_year))
-    requested_stakes = request.GET.get('stakes', '25')  # Default to '25' if not provided
-
-    # Generate month choices for the dropdown
-    month_choices = [(str(i), month_name[i]) for i in range(1, 13)]
-
-    sessions = PokerSession.objects.filter(
-        player=request.user,
-        date__month=requested_month,
-        date__year=requested_year,
-        stakes=requested_stakes
-    )
 
-    overall_aggregate = sessions.aggregate(
-        total_win_loss=Sum(F('cash_out') - F('buy_in')),
-        total_hours=Sum('hours')
-    )
-
-    overall_total = overall_aggregate['total_win_loss'] or 0
-    overall_hours = overall_aggregate['total_hours'] or 0
-    overall_hourly_rate = overall_total / overall_hours if overall_hours > 0 else 0
-    overall_win_loss_rate = overall_total / overall_hours if overall_hours > 0 else 0
-
-    return render(request, 'poker/session_list_25.html', {
-        'sessions': sessions,
-        'overall_hourly_rate': overall_hourly_rate,
-        'overall_win_loss_rate': overall_win_loss_rate,
-        'overall_total': overall_total,
-        'current_month': current_month,
-        'current_year': current_year,
-        'requested_month': requested_month,
-        'requested_stakes': requested_stakes,
-        'month_choices': month_choices,
-    })
 
 @login_required
-def session_list_13(request):
-    current_month = timezone.now().month
-    current_year = timezone.now().year
-    requested_month = int(request.GET.get('month', current_month))
-    requested_year = int(request.GET.get('year', current_year))
-    requested_stakes = request.GET.get('stakes', '13')  # Default to '25' if not provided
-
-    # Generate month choices for the dropdown
-    month_choices = [(str(i), month_name[i]) for i in range(1, 13)]
-
-    sessions = PokerSession.objects.filter(
-        player=request.user,
-        date__month=requested_month,
-        date__year=requested_year,
-        stakes=requested_stakes
-    )
-
-    overall_aggregate = sessions.aggregate(
-        total_win_loss=Sum(F('cash_out') - F('buy_in')),
-        total_hours=Sum('hours')
-    )
-
-    overall_total = overall_aggregate['total_win_loss'] or 0
-    overall_hours = overall_aggregate['total_hours'] or 0
-    overall_hourly_rate = overall_total / overall_hours if overall_hours > 0 else 0
-    overall_win_loss_rate = overall_total / overall_hours if overall_hours > 0 else 0
+def chart_data(request, name='win_loss'):
+    """
+    Plotly figure JSON for the session charts (plotly.js itself is a static asset).
+    """
+    if name not in CHART_BUILDERS:
+        raise Http404("Unknown chart")
+    filters = chart_filters(request.GET)
+    key, payload = chart_json(request.user, name, filters)
+    etag = f'"{hashlib.md5(key.encode()).hexdigest()}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    response = HttpResponse(payload, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    return render(request, 'poker/session_list_13.html', {
-        'sessions': sessions,
-        'overall_hourly_rate': overall_hourly_rate,
-        'overall_win_loss_rate': overall_win_loss_rate,
-        'overall_total': overall_total,
-        'current_month': current_month,
-        'current_year': current_year,
-        'requested_month': requested_month,
-        'requested_stakes': requested_stakes,
-        'month_choices': month_choices,
-    })
 @login_required
 def homepage_view(request):
     stakes_filter = request.GET.get('stakes')
-    sessions =  PokerSession.objects.filter(player=request.user)
     current_month = timezone.now().month
     current_year = timezone.now().year
-  
-    
-    
-    overall_total = sum(session.win_loss for session in sessions)
-    overall_hours = sum(session.hours for session in sessions)
-    overall_hourly_rate = overall_total / overall_hours if overall_hours > 0 else 0
-    
+
+    totals = overall_totals(request.user)
+    overall_total = totals['overall_total']
+    overall_hours = totals['overall_hours']
+    overall_hourly_rate = totals['overall_hourly_rate']
+
+    sessions_by_month = monthly_totals(request.user, stakes=stakes_filter)
+
+    chart_url = reverse('poker:chart_data')
     if stakes_filter:
-            sessions = sessions.filter(stakes=stakes_filter)
-
-    sessions_by_month = sessions.annotate(
-        month=TruncMonth('date')
-    ).values('month').annotate(
-        total_profit=Sum('cash_out') - Sum('buy_in'),
-        total_hours=Sum('hours')
-    ).order_by('-month')
-
-    for session in sessions_by_month:
-        if session['total_hours']:
-            session['win_rate_per_hour'] = session['total_profit'] / session['total_hours']
-        else:
-            session['win_rate_per_hour'] = None
-    
-    dates = [s.date for s in sessions]
-    win_losses = [s.win_loss for s in sessions]
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=win_losses,
-        mode='lines+markers',
-        name='Win/Loss'
-    ))
-    fig.update_layout(
-        title='Overall Stats',
-        xaxis_title='Date',
-        yaxis_title='Win/Loss'
-    )
-    fig.update_xaxes(tickangle=45, tickfont=dict(family='Rockwell', color='green', size=14))
-    fig.update_layout(title={
-        'font_size': 22,
-        'xanchor': 'center',
+        chart_url += f"?{urlencode({'stakes': stakes_filter})}"
 
-        'x': 0.5
-    })
-    fig.update_layout(
-        autosize=True)
-    
-    chart = fig.to_html()
-        
-    context = {'chart': chart,
+    context = {'chart_url': chart_url,
         'overall_hourly_rate': overall_hourly_rate,
         'overall_hours': overall_hours,
         'overall_total': overall_total,
@@ -334,46 +252,10 @@ def homepage_view(request):
 
 @login_required
 def chart_25(request):
-    session =  PokerSession.objects.filter(stakes='25').filter(player=request.user)
-    start = request.GET.get('start')
-    end = request.GET.get('end')
-    stakes = request.GET.get('stakes')
-    
-    if start:
-        session = session.filter(date__gte=start)
-    if end:
-        session = session.filter(date__lte=end)
-    if stakes:
-        session = session.filter(stakes=stakes)
-    
-    dates = [s.date for s in session]
-    win_losses = [s.win_loss for s in session]
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=win_losses,
-        mode='lines+markers',
-        name='Win/Loss'
-    ))
-    fig.update_layout(
-        title='2/5 Chart',
-        xaxis_title='Date',
-        yaxis_title='Win/Loss'
-    )
-    fig.update_xaxes(tickangle=45, tickfont=dict(family='Rockwell', color='green', size=14))
-    fig.update_layout(title={
-        'font_size': 22,
-        'xanchor': 'center',
-
-        'x': 0.5
-    })
-    fig.update_layout(
-        autosize=True)
-    
-    chart = fig.to_html()
-        
-    context = {'chart': chart,
+    params = request.GET.copy()
+    params.setdefault('stakes', '25')
+    chart_url = f"{reverse('poker:chart_data')}?{params.urlencode()}"
+    context = {'chart_url': chart_url,
                'form': DateForm
             }
     return render(request, 'poker/chart_25.html', context)
@@ -385,56 +267,186 @@ def session_hands(request):
     return render(request, 'poker/session_hands.html', {'sessions': sessions_with_hands})
 
 
+@login_required
 def all_sessions_chart(request):
-    # Fetch data from the database
-    sessions = PokerSession.objects.all()
+    stats = bankroll_summary(request.user, chart_filters(request.GET))
+    chart_url = f"{reverse('poker:chart_data_named', kwargs={'name': 'cumulative'})}?{request.GET.urlencode()}"
+    return render(request, 'poker/all_sessions_chart.html', {'chart_url': chart_url, 'stats': stats})
 
-    # Create a DataFrame from the queryset
-    data = {
-        'date': [session.date for session in sessions],
-        'win_loss': [session.win_loss for session in sessions],
-    }
-    df = pd.DataFrame(data)
 
-    # Group data by date and calculate cumulative sum for win_loss
-    df['cumulative_win_loss'] = df.groupby('date')['win_loss'].cumsum()
+@login_required
+def export_data(request, name):
+    """
+    Stream the player's sessions or hands as CSV (default) or NDJSON (?format=ndjson).
+    """
+    fmt = request.GET.get('format', 'csv')
+    if name not in EXPORTS or fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export")
+    content_type, extension = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(export_lines(name, request.user, fmt), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="poker_{name}_{date.today():%Y%m%d}.{extension}"'
+    return response
+
+
+@login_required
+def import_sessions_upload(request):
+    if request.method == 'POST':
+        form = SessionImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            handle = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            result = import_sessions(request.user, read_rows(handle, form.cleaned_data['format']))
+            messages.success(
+                request,
+                f"Imported {result['created']} sessions "
+                f"({result['duplicates']} duplicates skipped, {result['errors']} bad rows).",
+            )
+            for message in result['messages']:
+                messages.warning(request, message)
+            return redirect(f"{reverse('poker:session_list')}?period=all")
+    else:
+        form = SessionImportForm()
+    return render(request, 'poker/session_import.html', {'form': form})
+
+
+# A pending run whose task hasn't started by then is assumed lost and re-sent
+SIMULATION_REDISPATCH_AFTER = timedelta(minutes=5)
 
-    # Create the Plotly Express chart
-    fig = px.line(df, x='date', y='cumulative_win_loss', title='Win Loss Over Time', labels={'cumulative_win_loss': 'Total Win/Loss', 'date': 'Date'})
 
-    # Customize the layout if needed
-    fig.update_layout(title='Win Loss Over Time', xaxis_title='Date', yaxis_title='Total Win/Loss')
+def _simulation_hash(player, params, arrays):
+    digest = hashlib.sha256()
+    digest.update(f"{player.pk}|{params['stakes']}|{params['starting_bankroll']}|{params['target_bankroll']}|"
+                  f"{params['sessions_ahead']}|{params['paths']}|".encode())
+    digest.update(arrays['profit'].tobytes())
+    digest.update(arrays['hours'].tobytes())
+    return digest.hexdigest()
 
-    # Convert the Plotly figure to JSON
-    chart_json = fig.to_json()
 
-    return render(request, 'poker/all_sessions_chart.html', {'chart_json': chart_json})
+def _dispatch_simulation(simulation):
+    """
+    Send the task for a failed run, or for a pending one that was never sent or
+    whose message looks lost. The conditional update claims the send, so two
+    requests racing on the same run only queue it once.
+    """
+    now = timezone.now()
+    Status = BankrollSimulation.Status
+    stale = simulation.dispatched is None or simulation.dispatched < now - SIMULATION_REDISPATCH_AFTER
+    if simulation.status == Status.FAILED or (simulation.status == Status.PENDING and stale):
+        claimed = BankrollSimulation.objects.filter(
+            pk=simulation.pk, status=simulation.status, dispatched=simulation.dispatched,
+        ).update(status=Status.PENDING, dispatched=now)
+        if claimed:
+            run_bankroll_simulation.delay(simulation.pk)
+
+
+@login_required
+def simulation_create(request):
+    if request.method == 'POST':
+        form = BankrollSimulationForm(request.POST)
+        if form.is_valid():
+            params = form.cleaned_data
+            arrays = session_arrays(simulation_sessions(request.user, params['stakes']))
+            if not len(arrays['profit']):
+                form.add_error('stakes', "No sessions to simulate from.")
+            else:
+                simulation, _ = BankrollSimulation.objects.get_or_create(
+                    input_hash=_simulation_hash(request.user, params, arrays),
+                    defaults={
+                        **params,
+                        'player': request.user,
+                        'sample_size': len(arrays['profit']),
+                        'inputs': {'profit': arrays['profit'].tolist(), 'hours': arrays['hours'].tolist()},
+                    },
+                )
+                _dispatch_simulation(simulation)
+                return redirect(simulation)
+    else:
+        form = BankrollSimulationForm()
+
+    simulations = BankrollSimulation.objects.filter(player=request.user).defer('inputs')[:10]
+    return render(request, 'poker/simulation_form.html', {'form': form, 'simulations': simulations})
+
+
+@login_required
+def simulation_detail(request, pk):
+    simulation = get_object_or_404(BankrollSimulation.objects.defer('inputs'), pk=pk, player=request.user)
+    return render(request, 'poker/simulation_detail.html', {'simulation': simulation})
+
+
+@login_required
+def simulation_status(request, pk):
+    simulation = get_object_or_404(BankrollSimulation.objects.defer('inputs'), pk=pk, player=request.user)
+    # The detail page polls this, so a run stuck in pending gets re-sent here too
+    if simulation.status == BankrollSimulation.Status.PENDING:
+        _dispatch_simulation(simulation)
+    return JsonResponse({
+        'status': simulation.status,
+        'error': simulation.error,
+        'result': simulation.result,
+    })
 
 
 # --- Player poker ---
 
 
+PLAYER_SORTS = {
+    "name": ("display_name",),
+    "strength": ("-read_score", "display_name"),
+}
+READ_STRENGTH_CHOICES = [("", "Any read"), ("0.25", "25%+"), ("0.5", "50%+"), ("0.75", "75%+")]
+
+
 def player_list(request):
     q = (request.GET.get("q") or "").strip()
-    players = PlayerProfile.objects.all().order_by("display_name")
+    sort = request.GET.get("sort") if request.GET.get("sort") in PLAYER_SORTS else "name"
+    min_strength = request.GET.get("strength") or ""
+    if min_strength not in dict(READ_STRENGTH_CHOICES):
+        min_strength = ""
+    players = PlayerProfile.objects.defer("search_vector").prefetch_related("tags").order_by(*PLAYER_SORTS[sort])
+    if min_strength:
+        players = players.filter(read_score__gte=float(min_strength))
+    # A search ranks by relevance; the sort only applies to the plain list
+    players = search_players(players, q)
+
+    return render(request, "poker/player_list.html", {
+        "players": players,
+        "q": q,
+        "sort": sort,
+        "strength": min_strength,
+        "strength_choices": READ_STRENGTH_CHOICES,
+    })
+
 
-    if q:
-        players = players.filter(
-            Q(display_name__icontains=q)
-            | Q(summary__icontains=q)
-            | Q(description__icontains=q)
-            | Q(tags__name__icontains=q)
-        ).distinct()
+def _current_casino_id(request):
+    """?casino= if given, else the casino of the user's most recent session."""
+    casino = request.GET.get("casino")
+    if casino and casino.isdigit():
+        return int(casino)
+    if request.user.is_authenticated:
+        return (
+            PokerSession.objects.filter(player=request.user)
+            .order_by("-date", "-id")
+            .values_list("casino_id", flat=True)
+            .first()
+        )
+    return None
 
-    return render(request, "poker/player_list.html", {"players": players, "q": q})
+
+def player_typeahead(request):
+    """
+    htmx endpoint behind the player search box: just the top few name matches,
+    players at the current casino first, from the in-memory prefix index.
+    """
+    q = (request.GET.get("q") or "").strip()
+    results = typeahead(q, _current_casino_id(request)) if q else []
+    return render(request, "poker/player_list.html#typeahead-results", {"results": results, "q": q})
 
 
 def player_detail(request, pk):
     player = get_object_or_404(PlayerProfile, pk=pk)
     observations = player.observations.all()
-    tendencies = player.tendencies.all().order_by("metric", "street")
+    tendencies = player.tendencies.all().order_by("-score", "metric", "street")
     quick_obs_form = PlayerObservationForm()
-    exploits = player.exploits.select_related("tag").all().order_by("-confidence", "-strength", "-updated")
+    exploits = player.exploits.select_related("tag").all().order_by("-score", "-updated")
     return render(request, "poker/player_detail.html", {
         "player": player,
         "observations": observations,
@@ -448,31 +460,50 @@ def player_detail(request, pk):
 def tendency_press(request, player_pk):
     player = get_object_or_404(PlayerProfile, pk=player_pk)
     if request.method != "POST":
-        return redirect("profiles:player_detail", pk=player.pk)
+        return redirect("poker:player_detail", pk=player.pk)
 
     metric = request.POST.get("metric", "").strip()
     street = request.POST.get("street", "").strip()
 
     if not metric or not street:
         messages.error(request, "Missing tendency data.")
-        return redirect("profiles:player_detail", pk=player.pk)
-
-    obj, created = PlayerTendency.objects.get_or_create(
-        player=player,
-        metric=metric,
-        street=street,
-        defaults={"sample_size": 1, "confidence": 3}
-    )
+        return redirect("poker:player_detail", pk=player.pk)
 
-    if not created:
-        obj.sample_size = (obj.sample_size or 0) + 1
-        obj.confidence = min(5, (obj.confidence or 1) + 1)
-        obj.save(update_fields=["sample_size", "confidence", "updated"])
-        messages.success(request, "Tendency reinforced (+1 sample).")
-    else:
+    created = reinforce_tendency(player.pk, metric, street)
+    rescore_players([player.pk])
+    if created:
         messages.success(request, "Tendency added.")
+    else:
+        messages.success(request, "Tendency reinforced (+1 sample).")
+
+    return redirect("poker:player_detail", pk=player.pk)
+
+
+@login_required
+def sync_events(request):
+    """
+    JSON batch endpoint for reads captured offline. POST {"events": [...]}
+    where each event has a client "key", a "type" (observation, tendency or
+    exploit), a "player" id and that type's fields; the response lists a
+    status per event in the same order.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST a JSON body."}, status=405)
 
-    return redirect("profiles:player_detail", pk=player.pk)
+    try:
+        events = json.loads(request.body).get("events")
+    except (ValueError, AttributeError):
+        events = None
+    if not isinstance(events, list):
+        return JsonResponse({"error": 'Expected {"events": [...]}.'}, status=400)
+    if len(events) > MAX_SYNC_EVENTS:
+        return JsonResponse({"error": f"At most {MAX_SYNC_EVENTS} events per sync."}, status=400)
+
+    results = apply_events(request.user, events)
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return JsonResponse({"results": results, "counts": counts})
 
 
 def player_create(request):
@@ -669,19 +700,12 @@ def exploit_press(request, player_pk):
 
     tag, _ = ExploitTag.objects.get_or_create(name=name, defaults={"description": desc})
 
-    link, created = PlayerExploit.objects.get_or_create(
-        player=player,
-        tag=tag,
-        defaults={"strength": 1, "confidence": 3},
-    )
-
-    if not created:
-        link.strength = min(10, link.strength + 1)
-        link.confidence = min(5, link.confidence + 1)
-        link.save(update_fields=["strength", "confidence", "updated"])
-        messages.success(request, "Exploit reinforced (+1 strength).")
-    else:
+    created = reinforce_exploit(player.pk, tag.pk)
+    rescore_players([player.pk])
+    if created:
         messages.success(request, "Exploit added.")
+    else:
+        messages.success(request, "Exploit reinforced (+1 strength).")
 
     return redirect("poker:player_detail", pk=player.pk)
 
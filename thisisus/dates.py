@@ -0,0 +1,77 @@
+from datetime import date
+
+
+def month_range(year, month):
+    """
+    Half-open [start, end) dates covering one calendar month.
+    Filtering with these bounds keeps date lookups index-friendly,
+    unlike date__month/date__year which compile to EXTRACT().
+    """
+    year, month = int(year), int(month)
+    start = date(year, month, 1)
+    if month == 12:
+        end = date(year + 1, 1, 1)
+    else:
+        end = date(year, month + 1, 1)
+    return start, end
+
+
+def year_range(year):
+    year = int(year)
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def quarter_range(year, quarter):
+    """Half-open [start, end) dates for quarter 1-4."""
+    quarter = int(quarter)
+    start, _ = month_range(year, 3 * quarter - 2)
+    _, end = month_range(year, 3 * quarter)
+    return start, end
+
+
+def month_filter(field, year, month):
+    """
+    Filter kwargs for one month, e.g.
+    PokerSession.objects.filter(**month_filter('date', 2025, 1))
+    """
+    start, end = month_range(year, month)
+    return {f"{field}__gte": start, f"{field}__lt": end}
+
+
+def year_filter(field, year):
+    start, end = year_range(year)
+    return {f"{field}__gte": start, f"{field}__lt": end}
+
+
+def _bounded_int(value, low, high):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if low <= value <= high else None
+
+
+def valid_year(value):
+    """value as a year usable with year_range(), or None."""
+    return _bounded_int(value, date.min.year, date.max.year - 1)
+
+
+def valid_month(value):
+    """value as a month 1-12, or None."""
+    return _bounded_int(value, 1, 12)
+
+
+def period_filter(field, year, month):
+    """
+    Filter kwargs for the optional ?year=&month= query params used by list pages.
+    Year (+ month) become date ranges; a month on its own can only match by EXTRACT.
+    Values that aren't a real year or a month 1-12 are ignored.
+    """
+    year, month = valid_year(year), valid_month(month)
+    if year and month:
+        return month_filter(field, year, month)
+    if year:
+        return year_filter(field, year)
+    if month:
+        return {f"{field}__month": month}
+    return {}
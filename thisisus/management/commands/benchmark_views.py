@@ -0,0 +1,141 @@
+import json
+import os
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+# Namespaces/views that aren't ours or that change state on GET
+SKIP_NAMESPACES = {'admin', 'the_django_plotly_dash'}
+SKIP_VIEWS = {'hands:sendmail', 'metrics'}
+DEFAULT_SAMPLES = 'load_samples.json'
+
+
+def url_names(patterns, namespace=None):
+    """Yield (view name, required kwargs) for every named route, recursing into includes."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            child = pattern.namespace or namespace
+            if pattern.namespace in SKIP_NAMESPACES:
+                continue
+            if pattern.namespace and namespace:
+                child = f'{namespace}:{pattern.namespace}'
+            yield from url_names(pattern.url_patterns, child)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, list(pattern.pattern.converters), pattern.default_args
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * pct / 100
+    low = int(index)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+class Command(BaseCommand):
+    help = ('Request every GET route in thisisus/urls.py through the test client and report '
+            'p50/p95 latency and query counts as JSON. Routes with object parameters use the '
+            'sample rows recorded by generate_load_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, default='loadtest', help='User to log in as (default: loadtest)')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL (default: 10)')
+        parser.add_argument('--url', action='append', default=[], help='Extra URL to include (repeatable), e.g. "/poker/sessions/?period=all"')
+        parser.add_argument('--samples', type=str, default=DEFAULT_SAMPLES,
+                            help=f'Sample route parameters from generate_load_data (default: {DEFAULT_SAMPLES})')
+        parser.add_argument('--only', type=str, help='Only views whose name contains this')
+        parser.add_argument('--output', type=str, help='Write the JSON report here (default: stdout)')
+        parser.add_argument('--baseline', type=str, help='Earlier report to diff against')
+
+    def targets(self, only, route_samples):
+        today = timezone.localdate()
+        # Date parts can be filled in for any route; object ids come from route_samples
+        dates = {'year': today.year, 'month': today.month}
+        targets, skipped = {}, []
+        for name, params, defaults in url_names(get_resolver().url_patterns):
+            if name in SKIP_VIEWS or (only and only not in name):
+                continue
+            kwargs = {**dates, **route_samples.get(name, {})}
+            if any(param not in kwargs for param in params):
+                skipped.append(name)
+                continue
+            url = reverse(name, kwargs={param: kwargs[param] for param in params})
+            targets.setdefault(url, name)
+        return targets, skipped
+
+    def load_samples(self, path):
+        if not os.path.exists(path):
+            self.stderr.write(f"No samples at {path}; routes with object ids will be skipped")
+            return {}
+        with open(path) as handle:
+            return json.load(handle)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist (run generate_load_data first)")
+
+        targets, skipped = self.targets(options['only'], self.load_samples(options['samples']))
+        for url in options['url']:
+            targets[url] = url
+
+        setup_test_environment()
+        try:
+            # A broken view shows up as status 500 in the report instead of aborting the run
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            results = {name: self.measure(client, url, options['repeat']) | {'url': url}
+                       for url, name in targets.items()}
+        finally:
+            teardown_test_environment()
+
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)['views']
+            for name, result in results.items():
+                if name in baseline:
+                    result['delta_p95_ms'] = round(result['p95_ms'] - baseline[name]['p95_ms'], 2)
+                    result['delta_queries'] = result['queries'] - baseline[name]['queries']
+
+        report = json.dumps({
+            'repeat': options['repeat'],
+            'user': user.username,
+            'views': results,
+            'skipped': sorted(skipped),
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(report)
+            self.stderr.write(self.style.SUCCESS(f"Benchmarked {len(results)} views -> {options['output']}"))
+        else:
+            self.stdout.write(report)
+
+    def measure(self, client, url, repeat):
+        client.get(url)  # warm caches and lazy imports
+        timings, queries = [], []
+        status = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+            status = response.status_code
+        return {
+            'status': status,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': int(statistics.median(queries)),
+        }
@@ -0,0 +1,272 @@
+import json
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from expenses.models import Category, Expense
+from hands.models import Hands
+from john.ledger import rebuild_ledger
+from john.models import Account as JohnAccount, Bill, BillPayment, WorkEntry
+from john.schedule import rebuild_schedule
+from john.summaries import invalidate_all as invalidate_period_summaries
+from poker.fields import STAKES_CHOICES
+from poker.models import Casino, PlayerObservation, PlayerProfile, PokerSession, Street
+from poker.rollups import rebuild_rollups
+from poker.scoring import rescore_all
+from poker.search import refresh_search_vectors
+from todo.models import Task
+
+SCALES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+# Rows per model as a fraction of the scale
+RATIOS = {
+    'sessions': 1,
+    'hands': 0.5,
+    'players': 0.01,
+    'observations': 0.5,
+    'expenses': 1,
+    'bill_payments': 0.1,
+    'work_entries': 0.1,
+    'tasks': 0.1,
+}
+
+BATCH_SIZE = 5000
+# Where the sample route parameters for benchmark_views are written
+DEFAULT_SAMPLES = 'load_samples.json'
+HISTORY_DAYS = 15 * 365
+
+CASINOS = ['Bike', 'Commerce', 'Hustler', 'Gardens', 'Hawaiian Gardens', 'Parq']
+CATEGORIES = ['Groceries', 'Gas', 'Dining', 'Utilities', 'Rent', 'Entertainment', 'Medical', 'Travel']
+BILLS = ['Electric', 'Water', 'Internet', 'Phone', 'Insurance', 'Car', 'Gym', 'Streaming']
+SITUATIONS = ['BTN vs BB SRP', '3bet pot OOP', 'Limped pot', 'SB vs BB', 'Multiway flop']
+ACTIONS = ['3-bet light from BB', 'Check-raised dry flop', 'Overbet river with air',
+           'Called down with second pair', 'Min-raised the nuts', 'Limp-called AA']
+
+
+def first_or_create(model, defaults=None, **lookup):
+    # Like get_or_create, but tolerates the duplicate names real data already has
+    return model.objects.filter(**lookup).order_by('id').first() or model.objects.create(**lookup, **(defaults or {}))
+
+
+def batched(rows, size=BATCH_SIZE):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with seeded synthetic data for load testing. '
+            'Run it against a scratch database: rows are inserted, never cleaned up.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k', help='Base row count per model (default: 1k)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, so runs are reproducible')
+        parser.add_argument('--user', type=str, default='loadtest', help='Owner of the generated rows (created if missing)')
+        parser.add_argument('--samples', type=str, default=DEFAULT_SAMPLES,
+                            help=f'Write sample route parameters for benchmark_views here (default: {DEFAULT_SAMPLES})')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.scale = SCALES[options['scale']]
+        self.today = timezone.localdate()
+        self.user, created = User.objects.get_or_create(username=options['user'])
+        if created:
+            self.user.set_password(options['user'])
+            self.user.save()
+
+        for name, generate in (
+            ('sessions', self.sessions),
+            ('hands', self.hands),
+            ('players', self.players),
+            ('observations', self.observations),
+            ('expenses', self.expenses),
+            ('bill_payments', self.bill_payments),
+            ('work_entries', self.work_entries),
+            ('tasks', self.tasks),
+        ):
+            count = max(1, int(self.scale * RATIOS[name]))
+            start = time.perf_counter()
+            model, rows = generate(count)
+            for batch in batched(rows):
+                model.objects.bulk_create(batch)
+            self.stdout.write(f'{name}: {count} rows in {time.perf_counter() - start:.1f}s')
+
+        # bulk_create skips the rollup, ledger, schedule, summary, search and scoring signals
+        rebuild_rollups(player=self.user)
+        rebuild_ledger()
+        rebuild_schedule()
+        invalidate_period_summaries()
+        refresh_search_vectors()
+        rescore_all()
+
+        with open(options['samples'], 'w') as handle:
+            json.dump(self.sample_routes(), handle, indent=2)
+        self.stdout.write(f"Sample route parameters written to {options['samples']}")
+        self.stdout.write(self.style.SUCCESS(f"Done; log in as '{self.user.username}' to browse it"))
+
+    def sample_routes(self):
+        """
+        URL kwargs for the detail and edit pages, keyed by view name. The
+        busiest row of each kind is used so the benchmark sees the worst case.
+        Delete, toggle and press routes are left out; benchmark_views only GETs,
+        and some of those change state on GET.
+        """
+        session = (PokerSession.objects.filter(player=self.user)
+                   .annotate(n=Count('session')).order_by('-n', 'id').first())
+        hand = Hands.objects.filter(hero=self.user).order_by('id').first()
+        player = PlayerProfile.objects.annotate(n=Count('observations')).order_by('-n', 'id').first()
+        bill = Bill.objects.annotate(n=Count('payments')).order_by('-n', 'id').first()
+        work_entry = WorkEntry.objects.order_by('-date', 'id').first()
+        expense = Expense.objects.filter(user=self.user).order_by('-created', 'id').first()
+        task = Task.objects.order_by('id').first()
+
+        samples = {
+            'poker:chart_data_named': {'name': 'cumulative'},
+            'poker:export_data': {'name': 'sessions'},
+        }
+        for names, kwargs in (
+            (('poker:session_detail', 'poker:edit_session', 'hands:add_hand', 'hands:session_hands_list'),
+             session and {'session_id': session.pk}),
+            (('hands:hand_detail', 'hands:edit_hand'), hand and {'hand_id': hand.pk}),
+            (('poker:player_detail', 'poker:player_update'), player and {'pk': player.pk}),
+            (('john:bill_detail', 'john:bill_edit', 'john:pay_bill'), bill and {'pk': bill.pk}),
+            (('john:time_entry_edit',), work_entry and {'pk': work_entry.pk}),
+            (('expenses:expense-update',), expense and {'expense_id': expense.pk}),
+            (('todo:view-task', 'todo:update-task'), task and {'task_id': task.pk}),
+        ):
+            if kwargs:
+                samples.update(dict.fromkeys(names, kwargs))
+        return samples
+
+    def random_day(self):
+        return self.today - timedelta(days=self.rng.randrange(HISTORY_DAYS))
+
+    def pick(self, choices):
+        return self.rng.choice(choices)[0]
+
+    def sessions(self, count):
+        casinos = [first_or_create(Casino, name=name).pk for name in CASINOS]
+        stakes = [code for code, _ in STAKES_CHOICES if code != '00']
+
+        def rows():
+            for _ in range(count):
+                buy_in = self.rng.choice([300, 500, 1000, 2000])
+                yield PokerSession(
+                    player=self.user,
+                    casino_id=self.rng.choice(casinos),
+                    stakes=self.rng.choice(stakes),
+                    date=self.random_day(),
+                    hours=self.rng.randint(1, 12),
+                    buy_in=buy_in,
+                    cash_out=max(0, int(self.rng.gauss(buy_in * 1.05, buy_in * 0.8))),
+                )
+        return PokerSession, rows()
+
+    def hands(self, count):
+        session_ids = list(PokerSession.objects.filter(player=self.user).values_list('id', flat=True))
+        # Every required choice field gets a random valid value
+        choice_fields = [
+            field for field in Hands._meta.concrete_fields
+            if field.choices and not field.null
+        ]
+
+        def rows():
+            for _ in range(count):
+                values = {field.name: self.pick(field.flatchoices) for field in choice_fields}
+                yield Hands(session_id=self.rng.choice(session_ids), hero=self.user, **values)
+        return Hands, rows()
+
+    def players(self, count):
+        casinos = list(Casino.objects.values_list('id', flat=True))
+
+        def rows():
+            for i in range(count):
+                yield PlayerProfile(
+                    display_name=f'Player {i}',
+                    casino_id=self.rng.choice(casinos),
+                    approximate_age=self.rng.randint(21, 80),
+                    summary=self.rng.choice(ACTIONS),
+                )
+        return PlayerProfile, rows()
+
+    def observations(self, count):
+        player_ids = list(PlayerProfile.objects.values_list('id', flat=True))
+
+        def rows():
+            for _ in range(count):
+                yield PlayerObservation(
+                    player_id=self.rng.choice(player_ids),
+                    street=self.pick(Street.choices),
+                    situation=self.rng.choice(SITUATIONS),
+                    action=self.rng.choice(ACTIONS),
+                    reliability=self.rng.randint(1, 5),
+                    happened_at=timezone.now() - timedelta(days=self.rng.randrange(HISTORY_DAYS)),
+                )
+        return PlayerObservation, rows()
+
+    def expenses(self, count):
+        categories = [first_or_create(Category, name=name).pk for name in CATEGORIES]
+
+        def rows():
+            for i in range(count):
+                yield Expense(
+                    user=self.user,
+                    category_id=self.rng.choice(categories),
+                    name=f'Expense {i}',
+                    amount=Decimal(self.rng.randint(100, 50000)) / 100,
+                    created=self.random_day(),
+                )
+        return Expense, rows()
+
+    def bill_payments(self, count):
+        account = first_or_create(JohnAccount, name='Load test checking')
+        bills = [
+            first_or_create(
+                Bill, name=name, account=account,
+                defaults={'amount': Decimal(self.rng.randint(20, 300)), 'due_day': self.rng.randint(1, 28)},
+            )
+            for name in BILLS
+        ]
+
+        def rows():
+            # Bills already due this month have been paid, so the dashboard and
+            # schedule show linked occurrences like a real household's would
+            for bill in bills:
+                due = bill.due_date_in(self.today.year, self.today.month)
+                if due <= self.today:
+                    yield BillPayment(bill=bill, account=account, amount=bill.amount, date_paid=due)
+            for _ in range(count):
+                bill = self.rng.choice(bills)
+                yield BillPayment(bill=bill, account=account, amount=bill.amount, date_paid=self.random_day())
+        return BillPayment, rows()
+
+    def work_entries(self, count):
+        def rows():
+            for _ in range(count):
+                hours = Decimal(self.rng.randint(50, 1000)) / 100
+                # bulk_create skips WorkEntry.save(), so compute amount here
+                yield WorkEntry(
+                    date=self.random_day(),
+                    description=self.rng.choice(['Errands', 'Yard work', 'Driving', 'Paperwork']),
+                    hours=hours,
+                    hourly_rate=Decimal('30.00'),
+                    amount=hours * Decimal('30.00'),
+                )
+        return WorkEntry, rows()
+
+    def tasks(self, count):
+        def rows():
+            for i in range(count):
+                yield Task(
+                    title=f'Task {i}',
+                    complete=self.rng.random() < 0.7,
+                    due=self.today + timedelta(days=self.rng.randint(-365, 90)),
+                )
+        return Task, rows()
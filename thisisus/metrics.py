@@ -0,0 +1,54 @@
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Query counts are small integers; timings are seconds
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'django_view_latency_seconds', 'Total request latency', ['view', 'method'], buckets=TIME_BUCKETS,
+)
+SQL_QUERIES = Histogram(
+    'django_view_sql_queries', 'SQL queries executed per request', ['view', 'method'], buckets=QUERY_BUCKETS,
+)
+SQL_TIME = Histogram(
+    'django_view_sql_seconds', 'Time spent in SQL per request', ['view', 'method'], buckets=TIME_BUCKETS,
+)
+TEMPLATE_TIME = Histogram(
+    'django_view_template_seconds', 'Time spent rendering templates per request', ['view', 'method'], buckets=TIME_BUCKETS,
+)
+
+
+def observe(view, method, stats):
+    labels = {'view': view, 'method': method}
+    REQUEST_LATENCY.labels(**labels).observe(stats['latency'])
+    SQL_QUERIES.labels(**labels).observe(stats['queries'])
+    SQL_TIME.labels(**labels).observe(stats['sql_time'])
+    TEMPLATE_TIME.labels(**labels).observe(stats['template_time'])
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. If METRICS_TOKEN is set the scraper must send it
+    as a bearer token; without one only logged-in staff can read it. Under
+    gunicorn, set PROMETHEUS_MULTIPROC_DIR so every worker's samples are merged
+    instead of whichever worker answers the scrape.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponseForbidden()
+    elif not request.user.is_staff:
+        return HttpResponseForbidden()
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        payload = generate_latest(registry)
+    else:
+        payload = generate_latest()
+    return HttpResponse(payload, content_type=CONTENT_TYPE_LATEST)
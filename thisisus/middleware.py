@@ -0,0 +1,100 @@
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from .metrics import observe
+
+_request_stats = ContextVar('request_stats', default=None)
+
+
+def new_stats():
+    return {'queries': 0, 'sql_time': 0.0, 'template_time': 0.0, 'latency': 0.0}
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats['queries'] += 1
+            stats['sql_time'] += time.perf_counter() - start
+
+
+@contextmanager
+def timed(key):
+    """Add the time spent in the block to the current request's stats, if any."""
+    stats = _request_stats.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats[key] += time.perf_counter() - start
+
+
+@contextmanager
+def collecting(stats):
+    """Count queries and template time into `stats` for the duration of the block."""
+    token = _request_stats.set(stats)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_count_query))
+            yield
+    finally:
+        _request_stats.reset(token)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match._func_path
+
+
+class QueryMetricsMiddleware:
+    """
+    Record SQL count, SQL time, template render time and total latency for
+    every request, labelled by resolved view name, into Prometheus histograms.
+    Template time comes from thisisus.template_backends.TimedDjangoTemplates.
+
+    A streaming response does its real work while the server iterates it, so
+    its queries are counted chunk by chunk and it is recorded once it closes.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = new_stats()
+        start = time.perf_counter()
+        with collecting(stats):
+            response = self.get_response(request)
+
+        request.query_stats = stats
+        if response.streaming and not getattr(response, 'is_async', False):
+            response.streaming_content = self.stream(response.streaming_content, request, stats, start)
+        else:
+            self.record(request, stats, start)
+        return response
+
+    def stream(self, content, request, stats, start):
+        # The response closes this generator when the server closes the response,
+        # so the finally clause runs for completed and abandoned downloads alike
+        chunks = iter(content)
+        try:
+            while True:
+                with collecting(stats):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.record(request, stats, start)
+
+    def record(self, request, stats, start):
+        stats['latency'] = time.perf_counter() - start
+        observe(view_name(request), request.method, stats)
@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 import dj_database_url
+from celery.schedules import crontab
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -32,7 +33,10 @@ INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'hands.apps.HandsConfig',
     'todo.apps.TodoConfig',
+    'thisisus',
     'django_plotly_dash.apps.DjangoPlotlyDashConfig',
+    'crispy_forms',
+    'crispy_bootstrap5',
     'django.contrib.flatpages',
     'django.contrib.sites',
     'django.contrib.admin',
@@ -41,10 +45,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'django_htmx',
+    'template_partials',
     'celery',
 ]
 
 MIDDLEWARE = [
+    'thisisus.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'django_htmx.middleware.HtmxMiddleware',
 ]
 
 ROOT_URLCONF = 'thisisus.urls'
@@ -60,7 +69,8 @@ CSRF_TRUSTED_ORIGINS = ['https://thisisus.fly.dev/']
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'thisisus.template_backends.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -97,6 +107,21 @@ DATABASES = {
 CSRF_TRUSTED_ORIGINS = ["https://thisisus.fly.dev",  # full URL with https
 ]
 
+# Redis when available (shared between gunicorn workers), otherwise per-process memory.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 
 # Set the session cookie to persist (e.g., 2 weeks)
@@ -157,6 +182,12 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media" 
 STATIC_ROOT = BASE_DIR / "staticfiles"
+STATICFILES_FINDERS = [
+    "django.contrib.staticfiles.finders.FileSystemFinder",
+    "django.contrib.staticfiles.finders.AppDirectoriesFinder",
+    # Serves plotly.js from the installed plotly package as poker/plotly.min.js
+    "poker.finders.PlotlyJSFinder",
+]
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -169,4 +200,22 @@ X_FRAME_OPTIONS = 'SAMEORIGIN'
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 
-CRISPY_TEMPLATE_PACK = "bootstrap5"
\ No newline at end of file
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Poker charts: max points per series before LTTB downsampling (?full=1 bypasses it)
+POKER_CHART_MAX_POINTS = 1000
+
+# /metrics requires "Authorization: Bearer <token>" when this is set; unset, only staff can read it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Periodic jobs, run by `celery -A thisisus beat`
+CELERY_BEAT_SCHEDULE = {
+    'extend-bill-schedule': {
+        'task': 'john.tasks.extend_bill_schedule',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'rescore-read-strength': {
+        'task': 'poker.tasks.rescore_read_strength',
+        'schedule': crontab(hour=3, minute=30),
+    },
+}
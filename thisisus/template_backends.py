@@ -0,0 +1,28 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from .middleware import timed
+
+
+class TimedTemplate(Template):
+    # Only the top-level template is wrapped; {% include %} renders happen
+    # inside it, so nested templates aren't counted twice.
+    def render(self, context=None, request=None):
+        with timed('template_time'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The stock Django backend, with each render's time added to the current
+    request's metrics. Outside a request (mail, management commands) it's a
+    plain render.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Templates that use {% static %} need collectstatic's manifest under the
+# production storage; tests that render them use plain static storage instead
+plain_static_storage = override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+@contextmanager
+def query_budget(budget, using=DEFAULT_DB_ALIAS, label='block'):
+    """
+    Fail if the wrapped block runs more than `budget` queries, listing them so
+    the N+1 is easy to spot.
+    """
+    with CaptureQueriesContext(connections[using]) as captured:
+        yield captured
+    if len(captured) > budget:
+        queries = '\n'.join(f"{i}. {query['sql']}" for i, query in enumerate(captured.captured_queries, start=1))
+        raise AssertionError(f"{label} ran {len(captured)} queries, budget is {budget}:\n{queries}")
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin: assertViewQueryBudget(url, budget) requests `url` with
+    self.client and fails if the view goes over its query budget.
+    """
+    def assertViewQueryBudget(self, url, budget, method='get', data=None, **extra):
+        with query_budget(budget, label=url):
+            response = getattr(self.client, method)(url, data, **extra)
+        self.assertLess(response.status_code, 500, f"{url} returned {response.status_code}")
+        return response
@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import close_old_connections, connection
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from john.ledger import current_ledger
+from john.models import Bill, BillOccurrence, BillPayment, WorkEntry
+from poker.models import PokerMonthlyRollup, PokerSession
+
+from .middleware import QueryMetricsMiddleware
+from .testing import plain_static_storage
+
+
+class MetricsAccessTests(TestCase):
+    def test_anonymous_is_refused_without_token(self):
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_non_staff_is_refused_without_token(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_staff_can_read_without_token(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with override_settings(METRICS_TOKEN=None):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'django_view_sql_queries', response.content)
+
+    def test_token_is_required_when_set(self):
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+
+def run_query():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+class QueryMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch('thisisus.middleware.observe')
+        self.observe = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.request = RequestFactory().get('/')
+        # Closing a response fires request_finished; keep the test's connection open
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+
+    def test_queries_and_template_time_are_recorded(self):
+        template = engines['django'].from_string('{% for i in items %}{{ i }}{% endfor %}')
+
+        def view(request):
+            run_query()
+            return HttpResponse(template.render({'items': range(1000)}))
+
+        QueryMetricsMiddleware(view)(self.request)
+        self.observe.assert_called_once()
+        _, method, stats = self.observe.call_args.args
+        self.assertEqual((method, stats['queries']), ('GET', 1))
+        self.assertGreater(stats['template_time'], 0)
+        self.assertGreaterEqual(stats['latency'], stats['template_time'])
+
+    def test_renders_outside_a_request_are_not_counted(self):
+        QueryMetricsMiddleware(lambda request: HttpResponse())(self.request)
+        engines['django'].from_string('{{ x }}').render({'x': 1})
+        run_query()
+        self.assertEqual(self.observe.call_args.args[2]['queries'], 0)
+
+    def test_streaming_response_is_recorded_when_it_closes(self):
+        def rows():
+            for i in range(3):
+                run_query()
+                yield f'{i}\n'
+
+        response = QueryMetricsMiddleware(lambda request: StreamingHttpResponse(rows()))(self.request)
+        self.observe.assert_not_called()
+        self.assertEqual(b''.join(response.streaming_content), b'0\n1\n2\n')
+        response.close()
+        self.observe.assert_called_once()
+        self.assertEqual(self.observe.call_args.args[2]['queries'], 3)
+
+    def test_abandoned_stream_is_still_recorded(self):
+        response = QueryMetricsMiddleware(lambda request: StreamingHttpResponse(iter(['a', 'b'])))(self.request)
+        next(iter(response))
+        response.close()
+        self.observe.assert_called_once()
+
+
+class GenerateLoadDataTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.samples = os.path.join(directory.name, 'samples.json')
+        call_command('generate_load_data', scale='1k', samples=self.samples, stdout=StringIO())
+
+    def test_derived_tables_match_a_reachable_state(self):
+        month_start = timezone.localdate().replace(day=1)
+
+        # Every active bill is scheduled, and this month's payments are linked like a real save would
+        for bill in Bill.objects.filter(active=True):
+            self.assertTrue(BillOccurrence.objects.filter(bill=bill, due_date__gte=month_start).exists())
+        self.assertFalse(
+            BillPayment.objects.filter(date_paid__gte=month_start, occurrence__isnull=True).exists()
+        )
+
+        ledger = current_ledger()
+        self.assertEqual(ledger.work_total, WorkEntry.objects.aggregate(total=Sum('amount'))['total'])
+        self.assertEqual(
+            PokerMonthlyRollup.objects.aggregate(n=Sum('session_count'))['n'],
+            PokerSession.objects.count(),
+        )
+
+    @plain_static_storage
+    @mock.patch('thisisus.management.commands.benchmark_views.teardown_test_environment')
+    @mock.patch('thisisus.management.commands.benchmark_views.setup_test_environment')
+    def test_benchmark_covers_sampled_routes(self, *mocks):
+        out = StringIO()
+        call_command('benchmark_views', repeat=1, samples=self.samples, stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+
+        with open(self.samples) as handle:
+            sampled = json.load(handle)
+        self.assertIn('poker:session_detail', sampled)
+        for name in sampled:
+            self.assertNotIn(name, report['skipped'])
+        statuses = {name: result['status'] for name, result in report['views'].items()}
+        self.assertEqual(statuses['poker:session_detail'], 200)
+        self.assertEqual(statuses['john:bill_detail'], 200)
+        self.assertEqual({name: statuses[name] for name in sampled if statuses[name] >= 500}, {})
+
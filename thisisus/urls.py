@@ -4,9 +4,11 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
 from blog.views import index
+from thisisus.metrics import metrics_view
 
 urlpatterns = [
     path('', index, name='index'),
+    path('metrics', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('expenses/', include('expenses.urls')),
     path('income/', include('income.urls')),
@@ -85,6 +85,9 @@ class Appointment(models.Model):
 
     class Meta:
         ordering = ['date', 'time']
+        indexes = [
+            models.Index(fields=['date', 'time'], name='appointment_date_time'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.date}"
@@ -1,3 +1,10 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+
+class CalendarPeriodParamTests(TestCase):
+    def test_invalid_year_and_month_fall_back_to_today(self):
+        self.client.force_login(User.objects.create_user('hero'))
+        for query in ({'month': '13'}, {'year': '99999'}, {'year': 'abc', 'month': 'abc'}):
+            self.assertEqual(self.client.get(reverse('todo:calendar'), query).status_code, 200, query)
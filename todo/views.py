@@ -6,6 +6,7 @@ from django.db.models import Sum, F
 from django.db.models.functions import Extract
 import calendar
 from calendar import monthcalendar
+from thisisus.dates import month_filter, valid_month, valid_year
 
 # Dashboard view - shows both tasks and appointments
 def dashboard(request):
@@ -133,16 +134,15 @@ def toggle_appointment_complete(request, appointment_id):
 
 def calendar_view(request):
     # Get current year and month, or from query params
-    year = int(request.GET.get('year', datetime.now().year))
-    month = int(request.GET.get('month', datetime.now().month))
+    year = valid_year(request.GET.get('year')) or datetime.now().year
+    month = valid_month(request.GET.get('month')) or datetime.now().month
     
     # Get calendar for the month
     cal = monthcalendar(year, month)
     
     # Get all appointments for the month
     appointments = Appointment.objects.filter(
-        date__year=year, 
-        date__month=month
+        **month_filter('date', year, month)
     ).order_by('date', 'time')
     
     # Create a dictionary of appointments by day